@@ -0,0 +1,90 @@
+"""Whole-school attendance analytics as grouped SQL over a date range.
+
+Each function is one aggregate query (plus a count of school days) and returns plain rows,
+so it can run as a QueryExecutor job. The index on attendance (date, student_id) lets every
+query read just the rows in the range.
+
+A student's percentage is days present over the school days in the range (days with any
+attendance recorded in the school, or in the class when one is given). Days without a row
+for the student count as absent, as in the Attendance tab.
+"""
+from datetime import timedelta
+
+from sqlalchemy import case, func
+import models
+from models import Student, Attendance
+
+# Students below this percentage are chronic absentees (i.e. missed 10% or more of school days)
+CHRONIC_THRESHOLD = 90.0
+
+
+def _in_range(query, start, end, class_name=None):
+    if start:
+        query = query.filter(Attendance.date >= start)
+    if end:
+        query = query.filter(Attendance.date <= end)
+    if class_name:
+        query = query.filter(Student.class_name == class_name)
+    return query
+
+
+def _present_days():
+    return func.sum(case((Attendance.is_present, 1), else_=0))
+
+
+def term_range(term):
+    """(first, last) day of the term from the configured term calendar (models.term_starts).
+
+    The last term has no end (None); without a calendar this is (None, None).
+    """
+    starts = models.term_starts()
+    if not starts or not 1 <= term <= len(starts):
+        return None, None
+    return starts[term - 1], starts[term] - timedelta(days=1) if term < len(starts) else None
+
+
+def school_days(session, start=None, end=None, class_name=None):
+    query = session.query(func.count(func.distinct(Attendance.date)))
+    if class_name:
+        query = query.join(Student, Attendance.student_id == Student.id)
+    return _in_range(query, start, end, class_name).scalar() or 0
+
+
+def student_percentages(session, start=None, end=None, class_name=None, below=None):
+    """Rows of (id, student_id, name, class_name, present, recorded, percent) ordered by class and name.
+
+    With `below`, only students whose percentage is under it, lowest first.
+    """
+    days = school_days(session, start, end, class_name)
+    if not days:
+        return []
+
+    present = _present_days()
+    percent = (present * 100.0 / days).label('percent')
+    query = session.query(
+        Student.id, Student.student_id, Student.name, Student.class_name,
+        present.label('present'), func.count(Attendance.id).label('recorded'), percent
+    ).join(Attendance, Attendance.student_id == Student.id)
+    query = _in_range(query, start, end, class_name).group_by(Student.id)
+
+    if below is not None:
+        return query.having(present * 100.0 / days < below).order_by(percent, Student.name).all()
+    return query.order_by(Student.class_name, Student.name).all()
+
+
+def chronic_absentees(session, start=None, end=None, class_name=None, threshold=CHRONIC_THRESHOLD):
+    """Students present on fewer than `threshold` percent of school days, lowest first"""
+    return student_percentages(session, start, end, class_name, below=threshold)
+
+
+def daily_rates(session, start=None, end=None, class_name=None):
+    """Rows of (date, class_name, present, recorded, rate) per day and class, in date order"""
+    present = _present_days()
+    query = session.query(
+        Attendance.date, Student.class_name, present.label('present'),
+        func.count(Attendance.id).label('recorded'),
+        (present * 100.0 / func.count(Attendance.id)).label('rate')
+    ).join(Student, Attendance.student_id == Student.id)
+    return _in_range(query, start, end, class_name).group_by(
+        Attendance.date, Student.class_name
+    ).order_by(Attendance.date, Student.class_name).all()
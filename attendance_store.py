@@ -0,0 +1,274 @@
+"""Packed attendance: one bitset per student per term over the school calendar.
+
+The attendance table stays the record the Attendance tab edits. This module keeps a compact
+copy for reporting: `school_days` lists every school day with its term, and
+`attendance_bitmaps` holds two packed bit arrays per student and term (present, recorded)
+whose bit i is the term's i-th school day. Percentages, date ranges and class or school
+totals are NumPy popcounts over a (students x bytes) matrix instead of row scans.
+
+    python attendance_store.py convert [--term-start 2025-09-08 --term-start 2026-01-05 ...]
+    python attendance_store.py report --term 1 [--class JSS1] [--from 2025-09-08] [--to 2025-10-31]
+
+School days are placed in terms by the configured term calendar (SCHOOL_TERM_STARTS, see
+models.term_starts) or --term-start; days before the first term's start belong to no term.
+Without either, the calendar is not built (and saves leave the bitmaps alone) rather than
+guessing terms from the dates. Changing the term starts moves the stored days on the next save
+or convert.
+"""
+import argparse
+from bisect import bisect_right
+from datetime import date as dt_date
+
+import numpy as np
+from sqlalchemy import insert
+import models
+from models import Student, Attendance, SchoolDay, AttendanceBitmap, session_scope
+
+NO_CALENDAR = "No term calendar: set SCHOOL_TERM_STARTS to the first day of each term (YYYY-MM-DD, comma separated)"
+
+
+class AttendanceCalendarError(RuntimeError):
+    """The term calendar is missing or the bitmaps no longer match it"""
+
+
+def pack(bits):
+    """bool matrix (students x days) -> uint8 matrix (students x ceil(days / 8))"""
+    return np.packbits(bits, axis=-1)
+
+
+def popcount(packed):
+    """Set bits in each row of a packed uint8 matrix"""
+    return np.bitwise_count(packed).sum(axis=-1, dtype=np.int64)
+
+
+def configured_term_starts(term_starts=None):
+    """term_starts when given, else the configured ones (models.term_starts). Raises AttendanceCalendarError without any."""
+    if term_starts:
+        return sorted(term_starts)
+    try:
+        starts = models.term_starts()
+    except ValueError as e:
+        raise AttendanceCalendarError(str(e))
+    if not starts:
+        raise AttendanceCalendarError(NO_CALENDAR)
+    return starts
+
+
+def assign_terms(dates, term_starts):
+    """{date: term} for the dates on or after the first term's start; earlier dates are in no term"""
+    starts = sorted(term_starts)
+    terms = {}
+    for day in dates:
+        term = bisect_right(starts, day)
+        if term:
+            terms[day] = term
+    return terms
+
+
+class AttendanceBitmaps:
+    @staticmethod
+    def calendar(session, term):
+        """The term's school days, in order"""
+        return [row[0] for row in session.query(SchoolDay.date).filter_by(term=term).order_by(SchoolDay.date)]
+
+    @staticmethod
+    def sync_calendar(session, dates=None, term_starts=None):
+        """Adds attendance dates missing from the calendar (all of them, or just `dates`) and moves stored
+        days whose term no longer matches the term starts. Returns the terms whose days changed.
+
+        Raises AttendanceCalendarError when no term starts are given or configured.
+        """
+        starts = configured_term_starts(term_starts)
+        known = dict(session.query(SchoolDay.date, SchoolDay.term).all())
+        if dates is None or not known:
+            dates = {row[0] for row in session.query(Attendance.date).distinct()}
+        expected = assign_terms(set(dates) | known.keys(), starts)
+
+        moved = {day for day, term in known.items() if expected.get(day) != term}
+        added = {day for day in expected if day not in known} | (moved & expected.keys())
+        if moved:
+            session.query(SchoolDay).filter(SchoolDay.date.in_(moved)).delete(synchronize_session=False)
+        if added:
+            session.execute(insert(SchoolDay), [{'date': day, 'term': expected[day]} for day in sorted(added)])
+        return {known[day] for day in moved} | {expected[day] for day in added}
+
+    @staticmethod
+    def build_terms(session, terms, student_ids=None):
+        """(Re)writes the bitmaps of the given terms, for every student or only `student_ids`. Returns rows written."""
+        written = 0
+        for term in terms:
+            days = AttendanceBitmaps.calendar(session, term)
+            deleted = session.query(AttendanceBitmap).filter_by(term=term)
+            if student_ids is not None:
+                deleted = deleted.filter(AttendanceBitmap.student_id.in_(student_ids))
+            deleted.delete(synchronize_session=False)
+            if not days:
+                continue
+
+            query = session.query(Attendance.student_id, Attendance.date, Attendance.is_present).filter(
+                Attendance.date.between(days[0], days[-1])
+            )
+            if student_ids is not None:
+                query = query.filter(Attendance.student_id.in_(student_ids))
+            records = query.all()
+            if not records:
+                continue
+
+            # Scatter the rows into (students x days) matrices, then pack each student's row
+            day_index = {day: i for i, day in enumerate(days)}
+            ids, rows = np.unique(np.array([r[0] for r in records]), return_inverse=True)
+            columns = np.array([day_index.get(r[1], -1) for r in records])
+            on_calendar = columns >= 0
+            present = np.zeros((len(ids), len(days)), dtype=bool)
+            recorded = np.zeros_like(present)
+            recorded[rows[on_calendar], columns[on_calendar]] = True
+            present[rows[on_calendar], columns[on_calendar]] = np.array([bool(r[2]) for r in records])[on_calendar]
+
+            present, recorded = pack(present), pack(recorded)
+            session.execute(insert(AttendanceBitmap), [
+                {'student_id': int(student_id), 'term': term, 'days': len(days),
+                 'present': present[i].tobytes(), 'recorded': recorded[i].tobytes()}
+                for i, student_id in enumerate(ids)
+            ])
+            written += len(ids)
+        return written
+
+    @staticmethod
+    def refresh_students(session, student_ids, dates=None):
+        """Brings the bitmaps up to date after these students' attendance rows changed.
+
+        Pass the dates written when known; new school days move bit positions, so their
+        terms are rebuilt for every student. Does nothing while no term calendar is configured.
+        """
+        session.flush()
+        try:
+            grown = AttendanceBitmaps.sync_calendar(session, dates)
+        except AttendanceCalendarError:
+            return # No term calendar to place the days in; reports say so until one is configured
+        if grown:
+            AttendanceBitmaps.build_terms(session, grown)
+
+        query = session.query(SchoolDay.term).distinct()
+        if dates is not None:
+            query = query.filter(SchoolDay.date.in_(set(dates)))
+        terms = {row[0] for row in query} - grown
+        AttendanceBitmaps.build_terms(session, sorted(terms), list(student_ids))
+
+    @staticmethod
+    def rebuild(session, term_starts=None):
+        """Converts the whole attendance table: a fresh calendar and every bitmap. Returns (school days, bitmaps).
+
+        Uses the configured term starts unless term_starts is given; raises AttendanceCalendarError without either.
+        """
+        term_starts = configured_term_starts(term_starts)
+        session.query(AttendanceBitmap).delete(synchronize_session=False)
+        session.query(SchoolDay).delete(synchronize_session=False)
+        AttendanceBitmaps.sync_calendar(session, term_starts=term_starts)
+        terms = [row[0] for row in session.query(SchoolDay.term).distinct().order_by(SchoolDay.term)]
+        return session.query(SchoolDay).count(), AttendanceBitmaps.build_terms(session, terms)
+
+    @staticmethod
+    def load(session, term, class_name=None):
+        """Returns (student ids, school days as datetime64[D], present, recorded, class names).
+
+        present and recorded are packed uint8 matrices with one row per student. Raises
+        AttendanceCalendarError when there is no calendar or a bitmap is older than it.
+        """
+        days = np.array(AttendanceBitmaps.calendar(session, term), dtype='datetime64[D]')
+        if not len(days):
+            configured_term_starts() # An empty term is fine, a missing calendar is reported
+        query = session.query(
+            AttendanceBitmap.student_id, AttendanceBitmap.days, AttendanceBitmap.present,
+            AttendanceBitmap.recorded, Student.class_name
+        ).join(Student, AttendanceBitmap.student_id == Student.id).filter(AttendanceBitmap.term == term)
+        if class_name:
+            query = query.filter(Student.class_name == class_name)
+        rows = query.order_by(AttendanceBitmap.student_id).all()
+        if any(row.days != len(days) for row in rows):
+            raise AttendanceCalendarError(f"Attendance bitmaps for term {term} are out of date; run: python attendance_store.py convert")
+
+        width = (len(days) + 7) // 8
+        present = np.frombuffer(b"".join(row.present for row in rows), dtype=np.uint8).reshape(len(rows), width)
+        recorded = np.frombuffer(b"".join(row.recorded for row in rows), dtype=np.uint8).reshape(len(rows), width)
+        ids = np.array([row.student_id for row in rows], dtype=np.int64)
+        return ids, days, present, recorded, [row.class_name for row in rows]
+
+    @staticmethod
+    def _range_mask(days, start=None, end=None):
+        # Packed mask of the school days between start and end (inclusive)
+        selected = np.ones(len(days), dtype=bool)
+        if start:
+            selected &= days >= np.datetime64(start, 'D')
+        if end:
+            selected &= days <= np.datetime64(end, 'D')
+        return pack(selected), int(selected.sum())
+
+    @staticmethod
+    def percentages(session, term, class_name=None, start=None, end=None):
+        """{student id: percent present} over the term's school days between start and end.
+
+        Days without a record count as absent, as in the Attendance tab. Only students with at
+        least one attendance row in the term are included.
+        """
+        ids, days, present, _, _ = AttendanceBitmaps.load(session, term, class_name)
+        mask, school_days = AttendanceBitmaps._range_mask(days, start, end)
+        if not school_days:
+            return {}
+        percent = popcount(present & mask) * 100 / school_days
+        return dict(zip(ids.tolist(), percent.tolist()))
+
+    @staticmethod
+    def class_summary(session, term, start=None, end=None):
+        """{class name: {'students', 'school_days', 'present', 'recorded', 'percent'}} for the whole school, plus an 'All' total."""
+        ids, days, present, recorded, class_names = AttendanceBitmaps.load(session, term)
+        mask, school_days = AttendanceBitmaps._range_mask(days, start, end)
+        if not len(ids):
+            return {}
+        classes, class_rows = np.unique(np.array(class_names), return_inverse=True)
+        present_days = np.bincount(class_rows, weights=popcount(present & mask), minlength=len(classes))
+        recorded_days = np.bincount(class_rows, weights=popcount(recorded & mask), minlength=len(classes))
+        students = np.bincount(class_rows, minlength=len(classes))
+
+        summary = {}
+        for name, count, present_total, recorded_total in zip(
+            classes.tolist() + ['All'], students.tolist() + [len(ids)],
+            present_days.tolist() + [present_days.sum()], recorded_days.tolist() + [recorded_days.sum()]
+        ):
+            possible = count * school_days
+            summary[name] = {'students': count, 'school_days': school_days, 'present': int(present_total),
+                             'recorded': int(recorded_total),
+                             'percent': float(present_total * 100 / possible) if possible else 0.0}
+        return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Packed attendance bitmaps")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="rebuild the calendar and bitmaps from the attendance table")
+    convert.add_argument("--term-start", type=dt_date.fromisoformat, action="append",
+                         help="first day of a term, YYYY-MM-DD (repeat in order; default: SCHOOL_TERM_STARTS)")
+    report = commands.add_parser("report", help="attendance percentages per class")
+    report.add_argument("--term", type=int, required=True)
+    report.add_argument("--class", dest="class_name", help="list this class's students instead")
+    report.add_argument("--from", dest="start", type=dt_date.fromisoformat)
+    report.add_argument("--to", dest="end", type=dt_date.fromisoformat)
+    args = parser.parse_args()
+
+    from main import prepare_database
+    prepare_database() # Creates or upgrades the schema when this runs before the app ever has
+
+    try:
+        with session_scope() as session:
+            if args.command == "convert":
+                days, bitmaps = AttendanceBitmaps.rebuild(session, args.term_start)
+                print(f"{days} school days, {bitmaps} student-term bitmaps.")
+            elif args.class_name:
+                names = dict(session.query(Student.id, Student.name).filter_by(class_name=args.class_name).all())
+                for student_id, percent in AttendanceBitmaps.percentages(
+                        session, args.term, args.class_name, args.start, args.end).items():
+                    print(f"{names.get(student_id, student_id):<30} {percent:6.1f}%")
+            else:
+                for name, totals in AttendanceBitmaps.class_summary(session, args.term, args.start, args.end).items():
+                    print(f"{name:<8} {totals['students']:5} students  {totals['school_days']:4} days  {totals['percent']:6.1f}%")
+    except AttendanceCalendarError as e:
+        parser.exit(1, f"{e}\n")
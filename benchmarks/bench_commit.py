@@ -0,0 +1,87 @@
+"""Compare commit throughput of the default SQLite engine with the tuned db_config engine.
+
+Each writer thread saves marks one student at a time, committing after every save, like
+MarksEntryTab.save_marks does. Run from the project root:
+
+    python benchmarks/bench_commit.py [--saves 300] [--writers 1 --writers 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Importing models builds its engine from SCHOOL_DB_URL; point it at a throwaway in-memory database, never a real one
+os.environ["SCHOOL_DB_URL"] = "sqlite://"
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from db_config import create_configured_engine
+from models import Base, Student, Subject, bulk_upsert, Mark
+
+SUBJECTS = 20
+
+
+def prepare(engine):
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all(Subject(subject_code=f"S{i}", subject_name=f"Subject {i}") for i in range(SUBJECTS))
+    session.add_all(Student(student_id=f"B{i:05}", name=f"Student {i}", class_name="JSS1") for i in range(1000))
+    session.commit()
+    session.close()
+
+
+def run(engine, saves, writers):
+    Session = sessionmaker(bind=engine)
+    errors = []
+
+    def writer(offset):
+        session = Session()
+        try:
+            for n in range(saves):
+                student_id = (offset * saves + n) % 1000 + 1
+                rows = [{'student_id': student_id, 'subject_id': sub, 'term': 1,
+                         'continuous_assessment': 30.0, 'exams': 40.0, 'total': 70.0, 'grade': 'B'}
+                        for sub in range(1, SUBJECTS + 1)]
+                bulk_upsert(session, Mark, rows, ['student_id', 'subject_id', 'term'])
+                session.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return saves * writers / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--saves", type=int, default=300, help="commits per writer")
+    parser.add_argument("--writers", type=int, action="append", help="concurrent writer threads (repeatable)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for writers in args.writers or [1, 4]:
+            results = {}
+            for label in ("default", "tuned"):
+                url = f"sqlite:///{os.path.join(tmp, f'{label}_{writers}.db')}"
+                engine = create_engine(url) if label == "default" else create_configured_engine(url=url)
+                prepare(engine)
+                results[label] = run(engine, args.saves, writers)
+                engine.dispose()
+
+            (default_rate, default_errors), (tuned_rate, tuned_errors) = results["default"], results["tuned"]
+            print(f"{writers} writer(s): default {default_rate:8.1f} commits/s ({len(default_errors)} errors)   "
+                  f"tuned {tuned_rate:8.1f} commits/s ({len(tuned_errors)} errors)   "
+                  f"x{tuned_rate / default_rate:.1f}")
+
+
+if __name__ == "__main__":
+    main()
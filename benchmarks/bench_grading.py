@@ -0,0 +1,61 @@
+"""Benchmark GradeCalculator.calculate_grades against the scalar calculate_grade.
+
+Run from the project root:  python benchmarks/bench_grading.py [--count 5000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from calculations import GradeCalculator
+
+
+def check_boundaries():
+    # Every half point from -5 to 105 plus the awkward gap values
+    scores = np.concatenate([np.arange(-5, 105.5, 0.5), [79.5, 79.99, 69.5, 49.5, 100.01, np.nan]])
+    expected = [GradeCalculator.calculate_grade(s) for s in scores]
+    assert list(GradeCalculator.calculate_grades(scores)) == expected
+    assert list(GradeCalculator.calculate_grades(pd.Series(scores))) == expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=5_000_000, help="number of scores to grade")
+    parser.add_argument("--scalar-sample", type=int, default=200_000, help="scores timed through the scalar path")
+    args = parser.parse_args()
+
+    check_boundaries()
+
+    rng = np.random.default_rng(42)
+    scores = np.round(rng.uniform(0, 100, args.count) * 2) / 2  # half-point totals, like CA + Exam
+
+    start = time.perf_counter()
+    grades = GradeCalculator.calculate_grades(scores)
+    vector_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    grades_series = GradeCalculator.calculate_grades(pd.Series(scores))
+    series_time = time.perf_counter() - start
+
+    sample = scores[:args.scalar_sample]
+    start = time.perf_counter()
+    scalar = [GradeCalculator.calculate_grade(s) for s in sample]
+    scalar_time = time.perf_counter() - start
+
+    assert list(grades[:len(sample)]) == scalar
+    assert (grades_series.to_numpy() == grades).all()
+
+    scalar_rate = len(sample) / scalar_time
+    print(f"scores graded:       {args.count:,}")
+    print(f"vectorised (array):  {vector_time:.3f}s  ({args.count / vector_time:,.0f} scores/s)")
+    print(f"vectorised (Series): {series_time:.3f}s  ({args.count / series_time:,.0f} scores/s)")
+    print(f"scalar:              {scalar_time:.3f}s for {len(sample):,}  ({scalar_rate:,.0f} scores/s)")
+    print(f"speed-up:            {args.count / vector_time / scalar_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
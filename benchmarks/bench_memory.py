@@ -0,0 +1,95 @@
+"""Memory while opening many classes one after another: one app-wide Session vs a session per load.
+
+    python benchmarks/bench_memory.py --classes 12 --students 100 --rounds 5
+
+"shared" mimics the old app: one Session for the whole run, tabs loading ORM objects.
+"scoped" is the current app: every load is its own session_scope returning plain rows.
+Both keep the latest load's data alive, as the tabs would. Reported after each round over
+all classes: Python heap in use (tracemalloc), and objects held in the Session identity map.
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import seed_data # Also points SCHOOL_DB_URL away from the real database
+
+import models
+import reference_data
+from db_config import create_configured_engine
+from forms import BroadsheetTab, AttendanceTab
+from models import Student, Mark, Attendance, session_scope
+
+
+def open_class_shared(session, class_name, term):
+    # What the tabs used to do on the app-wide session
+    students = session.query(Student).filter_by(class_name=class_name).all()
+    marks = session.query(Mark).join(Student).filter(Student.class_name == class_name, Mark.term == term).all()
+    attendance = session.query(Attendance).join(Student).filter(Student.class_name == class_name).all()
+    details = [(mark.student.name, mark.subject.subject_code) for mark in marks] # Relationship loads, as the details view did
+    return students, marks, attendance, details
+
+
+def open_class_scoped(class_name, term):
+    with session_scope() as session:
+        sheet = BroadsheetTab.fetch_sheet(session, class_name, term)
+    with session_scope() as session:
+        attendance = AttendanceTab.fetch_class(session, class_name)
+    return sheet, attendance
+
+
+def measure(mode, class_names, rounds, term=1):
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    session = models.Session() if mode == "shared" else None
+    held = None
+    samples = []
+    try:
+        for _ in range(rounds):
+            for class_name in class_names:
+                held = open_class_shared(session, class_name, term) if mode == "shared" else open_class_scoped(class_name, term)
+            gc.collect()
+            in_use = tracemalloc.get_traced_memory()[0] - baseline
+            samples.append((in_use, len(session.identity_map) if session else 0))
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        del held
+        if session:
+            session.close()
+        tracemalloc.stop()
+    return samples, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=12)
+    parser.add_argument("--students", type=int, default=100, help="students per class")
+    parser.add_argument("--days", type=int, default=40, help="attendance days per term")
+    parser.add_argument("--rounds", type=int, default=5, help="passes over every class")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        url = f"sqlite:///{os.path.join(workdir, 'bench_memory.db')}"
+        counts = seed_data.generate(url, classes=args.classes, students=args.students, days=args.days)
+        engine = create_configured_engine(url=url)
+        models.Session.configure(bind=engine)
+        reference_data.cache.invalidate()
+        with session_scope() as session:
+            class_names = [row[0] for row in session.query(Student.class_name).distinct().order_by(Student.class_name)]
+        print(f"{counts['students']} students in {len(class_names)} classes, {counts['marks']} marks, "
+              f"{counts['attendance']} attendance rows; {args.rounds} rounds over every class")
+
+        for mode in ("shared", "scoped"):
+            samples, peak = measure(mode, class_names, args.rounds)
+            print(f"\n{mode}: peak {peak / 2**20:.1f} MiB")
+            for i, (in_use, identity_map) in enumerate(samples, 1):
+                print(f"    round {i}: {in_use / 2**20:7.1f} MiB in use, {identity_map:7} objects in identity map")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Times the hot data paths headlessly (no widgets) at several data sizes.
+
+    python benchmarks/run_benchmarks.py                      # compare with benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --sizes small,large --output results.json
+    python benchmarks/run_benchmarks.py --save-baseline      # record a new baseline
+
+Each size gets its own scratch SQLite database built by seed_data.generate. Every path is
+run --repeat times and the median is kept. Results are written as JSON. The run exits with
+status 1 if any path is slower than the baseline by more than --threshold (a fraction,
+0.5 = 50%). Baselines are machine specific: record one on the machine that runs the checks.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import seed_data # Also points SCHOOL_DB_URL away from the real database
+
+import models
+import reference_data
+from db_config import create_configured_engine
+from calculations import PositionCalculator
+from exports import stream_broadsheet
+from forms import BroadsheetTab, AttendanceTab
+from enterprise_forms import StudentsListTab, SchoolFeesTab
+from models import Subject
+
+SIZES = {
+    # name: (classes, students per class, attendance days per term)
+    "small": (3, 30, 20),
+    "medium": (6, 100, 60),
+    "large": (6, 500, 60),
+}
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def data_paths(class_name, term):
+    """{name: fn(session)} for every path timed; each mirrors what a tab does on a click."""
+    def export_term(session):
+        subjects = session.query(Subject.id, Subject.subject_code).order_by(Subject.id).all()
+        for _ in stream_broadsheet(session, term, subjects):
+            pass
+
+    return {
+        "class_positions": lambda session: PositionCalculator.calculate_class_positions(term, class_name),
+        "school_positions": lambda session: PositionCalculator.calculate_school_positions(term),
+        "broadsheet_load": lambda session: BroadsheetTab.fetch_sheet(session, class_name, term),
+        "attendance_load": lambda session: AttendanceTab.fetch_class(session, class_name),
+        "fees_load": lambda session: SchoolFeesTab.fetch_fees(session, class_name, term),
+        "students_page": lambda session: StudentsListTab.fetch_page(session, None, "All", ""),
+        "export_term": export_term,
+    }
+
+
+def time_path(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        session = models.Session()
+        try:
+            start = time.perf_counter()
+            fn(session)
+            timings.append(time.perf_counter() - start)
+        finally:
+            session.close()
+    return statistics.median(timings)
+
+
+def run(sizes, repeat, workdir):
+    results = {}
+    for size in sizes:
+        classes, students, days = SIZES[size]
+        url = f"sqlite:///{os.path.join(workdir, f'bench_{size}.db')}"
+        counts = seed_data.generate(url, classes=classes, students=students, days=days)
+
+        engine = create_configured_engine(url=url)
+        models.Session.configure(bind=engine)
+        reference_data.cache.invalidate() # Entries from the previous size's database
+        reference_data.cache.reset_stats()
+        try:
+            timings = {name: time_path(fn, repeat) for name, fn in data_paths("JSS1", 3).items()}
+        finally:
+            engine.dispose()
+
+        cache = reference_data.cache.stats()
+        results[size] = {"rows": counts, "seconds": timings, "reference_cache": cache}
+        print(f"[{size}] {counts['students']} students, {counts['marks']} marks, {counts['attendance']} attendance rows")
+        for name, seconds in timings.items():
+            print(f"    {name:<18} {seconds * 1000:9.2f} ms")
+        print(f"    reference cache: {cache['hits']} hits, {cache['misses']} misses")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Returns a list of regression messages."""
+    regressions = []
+    for size, result in results.items():
+        base = baseline.get("results", {}).get(size, {}).get("seconds", {})
+        for name, seconds in result["seconds"].items():
+            if name in base and seconds > base[name] * (1 + threshold):
+                regressions.append(f"{size}/{name}: {seconds * 1000:.2f} ms vs baseline {base[name] * 1000:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="small,medium", help=f"comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per path; the median is reported")
+    parser.add_argument("--output", default="bench_output.json", help="where the JSON results are written")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed slowdown vs baseline (0.5 = 50%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run(sizes, args.repeat, workdir)
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "repeat": args.repeat,
+              "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with; run with --save-baseline to record one.")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), args.threshold)
+    if regressions:
+        print("Regressions:")
+        for line in regressions:
+            print(f"    {line}")
+        sys.exit(1)
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Deterministic synthetic school data for benchmarks.
+
+Fills a scratch database (never the real one) using the models.py schema:
+
+    python benchmarks/seed_data.py sqlite:////tmp/school_bench.db --classes 6 --students 200 --days 60
+
+The same arguments and --seed always produce the same rows.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date as dt_date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SCHOOL_DB_URL", "sqlite://") # Importing models must not touch the real database
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+from db_config import create_configured_engine
+from models import Base, DEFAULT_SUBJECTS, Student, Subject, Mark, Attendance, Fee, set_schema_version
+from calculations import GradeCalculator, TermSummaryCalculator
+from attendance_store import AttendanceBitmaps
+from student_search import ensure_search_index
+
+CLASS_NAMES = ["JSS1", "JSS2", "JSS3", "SSS1", "SSS2", "SSS3"]
+FIRST_NAMES = ["Ada", "Bola", "Chidi", "Dayo", "Emeka", "Funmi", "Gbenga", "Halima", "Ife", "Jide",
+               "Kemi", "Lola", "Musa", "Ngozi", "Ope", "Bisi", "Sade", "Tunde", "Uche", "Zainab"]
+LAST_NAMES = ["Adeyemi", "Bello", "Chukwu", "Danjuma", "Eze", "Fashola", "Garba", "Ibrahim", "Okafor",
+              "Ogunleye", "Musa", "Nwosu", "Obi", "Salami", "Usman", "Yusuf"]
+TERM_START = {1: dt_date(2025, 9, 8), 2: dt_date(2026, 1, 5), 3: dt_date(2026, 4, 20)}
+
+
+def school_days(term, count):
+    # Weekdays from the start of the term
+    days, day = [], TERM_START.get(term, dt_date(2025, 9, 8) + timedelta(weeks=15 * (term - 1)))
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def _insert_chunks(session, model, rows, chunk_size=5000):
+    for start in range(0, len(rows), chunk_size):
+        session.execute(insert(model), rows[start:start + chunk_size])
+
+
+def generate(url, classes=6, students=50, terms=3, days=60, fees=True, mark_coverage=0.95, seed=42):
+    """Creates a fresh database at `url` and returns a dict of row counts.
+
+    classes:  number of classes (cycles through JSS1..SSS3, then JSS1-B, ...)
+    students: students per class
+    terms:    terms with marks, attendance and fees
+    days:     attendance days per term
+    """
+    rng = random.Random(seed)
+    engine = create_configured_engine(url=url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    ensure_search_index(engine) # Triggers index the students as they are inserted
+    session = sessionmaker(bind=engine)()
+    try:
+        session.execute(insert(Subject), [{"subject_code": c, "subject_name": n} for c, n in DEFAULT_SUBJECTS])
+
+        class_names = [CLASS_NAMES[i % len(CLASS_NAMES)] + ("" if i < len(CLASS_NAMES) else f"-{i // len(CLASS_NAMES)}")
+                       for i in range(classes)]
+        student_rows = []
+        for class_name in class_names:
+            for _ in range(students):
+                n = len(student_rows)
+                student_rows.append({"student_id": f"B{n:06}", "class_name": class_name,
+                                     "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {n}"})
+        _insert_chunks(session, Student, student_rows)
+        student_ids = list(range(1, len(student_rows) + 1))
+        subject_ids = list(range(1, len(DEFAULT_SUBJECTS) + 1))
+
+        # Marks: each student has an ability level, scores scatter around it
+        mark_rows = []
+        for student_id in student_ids:
+            ability = rng.gauss(55, 12)
+            for term in range(1, terms + 1):
+                for subject_id in subject_ids:
+                    if rng.random() > mark_coverage:
+                        continue
+                    ca = round(min(40, max(0, rng.gauss(ability * 0.4, 6))), 1)
+                    exam = round(min(60, max(0, rng.gauss(ability * 0.6, 9))), 1)
+                    mark_rows.append({"student_id": student_id, "subject_id": subject_id, "term": term,
+                                      "continuous_assessment": ca, "exams": exam, "total": ca + exam})
+        grades = GradeCalculator.calculate_grades([r["total"] for r in mark_rows])
+        for row, grade in zip(mark_rows, grades):
+            row["grade"] = str(grade)
+        _insert_chunks(session, Mark, mark_rows)
+
+        attendance_rows = []
+        for term in range(1, terms + 1):
+            term_days = school_days(term, days)
+            for student_id in student_ids:
+                presence = rng.uniform(0.7, 0.99)
+                attendance_rows.extend({"student_id": student_id, "date": d, "is_present": rng.random() < presence}
+                                       for d in term_days)
+        _insert_chunks(session, Attendance, attendance_rows)
+
+        fee_rows = []
+        if fees:
+            for term in range(1, terms + 1):
+                for student_id in student_ids:
+                    due = rng.choice([45000.0, 50000.0, 60000.0])
+                    fee_rows.append({"student_id": student_id, "term": term, "amount_due": due,
+                                     "amount_paid": rng.choice([0.0, due / 2, due, due])})
+            _insert_chunks(session, Fee, fee_rows)
+
+        summaries = TermSummaryCalculator.rebuild(session)
+        _, bitmaps = AttendanceBitmaps.rebuild(session, [school_days(term, 1)[0] for term in range(1, terms + 1)])
+        session.commit()
+        set_schema_version(engine) # Seeded databases are current; the app won't re-run upgrades on them
+        return {"classes": len(class_names), "students": len(student_rows), "marks": len(mark_rows),
+                "attendance": len(attendance_rows), "fees": len(fee_rows), "term_summary": summaries,
+                "attendance_bitmaps": bitmaps}
+    finally:
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill a scratch database with synthetic school data")
+    parser.add_argument("url", help="database URL to (re)create, e.g. sqlite:////tmp/school_bench.db")
+    parser.add_argument("--classes", type=int, default=6)
+    parser.add_argument("--students", type=int, default=50, help="students per class")
+    parser.add_argument("--terms", type=int, default=3)
+    parser.add_argument("--days", type=int, default=60, help="attendance days per term")
+    parser.add_argument("--no-fees", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    counts = generate(args.url, args.classes, args.students, args.terms, args.days, not args.no_fees, seed=args.seed)
+    print(", ".join(f"{count} {name}" for name, count in counts.items()))
@@ -1,8 +1,11 @@
 # calculations.py
-from sqlalchemy import func
-from models import Session, Mark, Student, Subject
+import numpy as np
+from sqlalchemy import func, and_, insert
+from models import TERMS, Session, Mark, Student, TermSummary
 
 class GradeCalculator:
+    TERMS = TERMS
+
     GRADING_SCALE = {
         'A': (80, 100),
         'B': (70, 79),
@@ -17,70 +20,202 @@ class GradeCalculator:
             if min_score <= score <= max_score:
                 return grade
         return 'F'
-    
+
     @staticmethod
-    def calculate_cumulative_average(student_id, current_term):
-        session = Session()
-        try:
-            if current_term == 1:
-                # Term 1: Just return term 1 average
-                return GradeCalculator._get_term_average(session, student_id, 1)
-            elif current_term == 2:
-                # Term 2: Average of term1 and term2
-                term1_avg = GradeCalculator._get_term_average(session, student_id, 1)
-                term2_avg = GradeCalculator._get_term_average(session, student_id, 2)
-                return (term1_avg + term2_avg) / 2
-            else:  # term 3
-                # Term 3: Average of previous cumulative and term3
-                prev_cumulative = GradeCalculator.calculate_cumulative_average(student_id, 2)
-                term3_avg = GradeCalculator._get_term_average(session, student_id, 3)
-                return (prev_cumulative + term3_avg) / 2
-        finally:
-            session.close()
+    def calculate_grades(totals):
+        """Vectorised calculate_grade for a NumPy array or pandas Series of totals.
+
+        Scores that fall between the integer bands (e.g. 79.5) or outside 0-100
+        get 'F', exactly as the scalar version does.
+        """
+        lows, highs, codes = GradeCalculator._grade_bins()
+        scores = np.asarray(totals, dtype=float)
+
+        # Band whose lower bound is the greatest one <= score, then check its upper bound
+        idx = np.searchsorted(lows, scores, side='right') - 1
+        in_band = (idx >= 0) & (scores <= highs[idx.clip(0)])
+        grades = np.where(in_band, codes[idx.clip(0)], 'F')
+
+        if hasattr(totals, 'index') and hasattr(totals, 'to_numpy'):
+            import pandas as pd
+            return pd.Series(grades, index=totals.index, name=totals.name)
+        return grades
+
+    @staticmethod
+    def _grade_bins():
+        bands = sorted(GradeCalculator.GRADING_SCALE.items(), key=lambda item: item[1][0])
+        lows = np.array([low for _, (low, _) in bands], dtype=float)
+        highs = np.array([high for _, (_, high) in bands], dtype=float)
+        codes = np.array([grade for grade, _ in bands])
+        return lows, highs, codes
     
     @staticmethod
-    def _get_term_average(session, student_id, term):
-        result = session.query(func.avg(Mark.total)).filter(
-            Mark.student_id == student_id,
-            Mark.term == term
-        ).scalar()
-        return result or 0
+    def cumulative_averages(term_averages):
+        """Cumulative averages for many students at once, for any number of terms.
+
+        term_averages: array of (students x terms), term 1 first, 0 for terms without marks.
+        Returns an array of the same shape whose column k is the cumulative average after term k + 1:
+        term 1 is its own average, and every later term averages the previous cumulative with
+        the term's average (so term 2 = (t1 + t2) / 2, term 3 = (cumulative 2 + t3) / 2, ...).
+        """
+        averages = np.asarray(term_averages, dtype=float)
+        cumulative = np.empty_like(averages)
+        if averages.shape[-1]:
+            cumulative[..., 0] = averages[..., 0]
+        # One step per term, each step vectorised over every student
+        for k in range(1, averages.shape[-1]):
+            cumulative[..., k] = (cumulative[..., k - 1] + averages[..., k]) / 2
+        return cumulative
+
+    @staticmethod
+    def class_cumulative_averages(session, class_name, current_term):
+        """{student.id: cumulative average after current_term} for every student in a class, from one query.
+
+        Students without marks get 0.
+        """
+        rows = session.query(Student.id, TermSummary.term, TermSummary.term_average).outerjoin(
+            TermSummary, and_(TermSummary.student_id == Student.id, TermSummary.term <= current_term)
+        ).filter(Student.class_name == class_name).all()
+
+        student_ids = sorted({row.id for row in rows})
+        index = {student_id: i for i, student_id in enumerate(student_ids)}
+        averages = np.zeros((len(student_ids), current_term))
+        for student_id, term, average in rows:
+            if term is not None and term >= 1:
+                averages[index[student_id], term - 1] = average or 0
+        return dict(zip(student_ids, GradeCalculator.cumulative_averages(averages)[:, -1].tolist()))
+
+class TermSummaryCalculator:
+    """Maintains the term_summary table derived from marks.
+
+    Callers pass their own session and commit it, so the summary is written in
+    the same transaction as the marks that changed it.
+    """
+
+    @staticmethod
+    def refresh_students(session, student_ids):
+        # Recompute every term for the given students; later terms depend on earlier ones
+        student_ids = set(student_ids)
+        if not student_ids:
+            return
+        session.flush()
+
+        totals = TermSummaryCalculator._term_totals(session, Mark.student_id.in_(student_ids))
+        existing = {
+            (row.student_id, row.term): row
+            for row in session.query(TermSummary).filter(TermSummary.student_id.in_(student_ids))
+        }
+
+        # Students without marks still get (zero) rows
+        for values in TermSummaryCalculator._summary_rows({s: totals.get(s, {}) for s in student_ids}):
+            row = existing.get((values['student_id'], values['term']))
+            if row:
+                for key, value in values.items():
+                    setattr(row, key, value)
+            else:
+                session.add(TermSummary(**values))
+
+    @staticmethod
+    def rebuild(session):
+        # Full rebuild from the marks table. Returns the number of summary rows written.
+        # Like refresh_students, every student gets rows, with zeros when they have no marks
+        session.query(TermSummary).delete(synchronize_session=False)
+        totals = {student_id: {} for student_id, in session.query(Student.id)}
+        totals.update(TermSummaryCalculator._term_totals(session))
+        rows = TermSummaryCalculator._summary_rows(totals)
+        if rows:
+            session.execute(insert(TermSummary), rows)
+        return len(rows)
+
+    @staticmethod
+    def _term_totals(session, *criteria):
+        # {student_id: {term: (subject_count, total_sum)}} from one grouped aggregate
+        query = session.query(
+            Mark.student_id, Mark.term, func.count(Mark.total), func.sum(Mark.total)
+        ).filter(*criteria).group_by(Mark.student_id, Mark.term)
+
+        totals = {}
+        for student_id, term, count, total_sum in query:
+            totals.setdefault(student_id, {})[term] = (count, total_sum or 0)
+        return totals
+
+    @staticmethod
+    def _summary_rows(totals):
+        # A row for every student and term, so cumulative averages exist even for terms without marks.
+        # totals: {student_id: {term: (subject_count, total_sum)}}
+        student_ids = list(totals)
+        terms = GradeCalculator.TERMS
+        values = np.array(
+            [[totals[student_id].get(term, (0, 0)) for term in terms] for student_id in student_ids], dtype=float
+        ).reshape(len(student_ids), len(terms), 2)
+        counts, sums = values[..., 0].astype(np.int64), values[..., 1]
+
+        # All students' cumulative averages in one pass over the terms
+        averages = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+        cumulative = GradeCalculator.cumulative_averages(averages)
+
+        rows = []
+        for student_id, *values in zip(student_ids, counts.tolist(), sums.tolist(), averages.tolist(), cumulative.tolist()):
+            for term, count, total_sum, average, cumulative_average in zip(terms, *values):
+                rows.append({
+                    'student_id': student_id,
+                    'term': term,
+                    'subject_count': count,
+                    'total_sum': total_sum,
+                    'term_average': average,
+                    'cumulative_average': cumulative_average,
+                })
+        return rows
 
 class PositionCalculator:
     @staticmethod
     def calculate_class_positions(term, class_name):
+        return PositionCalculator._calculate_positions(term, class_name).get(class_name, {})
+
+    @staticmethod
+    def calculate_school_positions(term):
+        """Ranks every class in the school. Returns {class_name: {student_id: position}}."""
+        return PositionCalculator._calculate_positions(term)
+
+    @staticmethod
+    def _calculate_positions(term, class_name=None):
         session = Session()
         try:
-            # Get all students in the class with their averages
-            students_data = []
-            for student in session.query(Student).filter(Student.class_name == class_name):
-                if term == 1:
-                    avg = GradeCalculator._get_term_average(session, student.id, 1)
-                elif term == 2:
-                    avg = GradeCalculator.calculate_cumulative_average(student.id, 2)
-                else:  # term 3
-                    avg = GradeCalculator.calculate_cumulative_average(student.id, 3)
-                
-                students_data.append({
-                    'student_id': student.id,
-                    'name': student.name,
-                    'average': avg
-                })
-            
-            # Sort by average (descending) and assign positions
-            students_data.sort(key=lambda x: x['average'], reverse=True)
-            
-            # Handle ties
-            positions = {}
-            current_position = 1
-            for i, student in enumerate(students_data):
-                if i > 0 and student['average'] == students_data[i-1]['average']:
-                    # Same position as previous student
-                    positions[student['student_id']] = current_position
-                else:
-                    current_position = i + 1
-                    positions[student['student_id']] = current_position
-            
-            return positions
+            # One row per student with the precomputed cumulative average for `term`.
+            # The outer join keeps students without marks so they are ranked with a 0 average.
+            query = session.query(
+                Student.id, Student.class_name, TermSummary.cumulative_average
+            ).outerjoin(
+                TermSummary, and_(TermSummary.student_id == Student.id, TermSummary.term == term)
+            )
+            if class_name is not None:
+                query = query.filter(Student.class_name == class_name)
+
+            classes = {}
+            for student_id, student_class, average in query:
+                classes.setdefault(student_class, {})[student_id] = average or 0
+
+            return {
+                student_class: PositionCalculator._rank(averages)
+                for student_class, averages in classes.items()
+            }
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+
+    @staticmethod
+    def _rank(averages):
+        # Sort by average (descending) and assign positions
+        ordered = sorted(averages.items(), key=lambda x: x[1], reverse=True)
+
+        # Handle ties
+        positions = {}
+        current_position = 1
+        for i, (student_id, average) in enumerate(ordered):
+            if i > 0 and average == ordered[i-1][1]:
+                # Same position as previous student
+                positions[student_id] = current_position
+            else:
+                current_position = i + 1
+                positions[student_id] = current_position
+
+        return positions
@@ -0,0 +1,98 @@
+"""Database engine configuration.
+
+Settings come from, in increasing priority:
+  1. the defaults below,
+  2. the [database] section of an ini file named by SCHOOL_DB_CONFIG
+     (or school_db.ini next to this file, if present),
+  3. environment variables: SCHOOL_DB_URL for the URL, SCHOOL_DB_<SETTING> for the rest
+     (e.g. SCHOOL_DB_SYNCHRONOUS=FULL, SCHOOL_DB_POOL_SIZE=10).
+
+Example school_db.ini:
+
+    [database]
+    url = sqlite:////srv/school/school_management.db
+    busy_timeout = 10000
+
+SQLite connections get WAL journaling and the pragmas below applied on every connect.
+"""
+import configparser
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULTS = {
+    # Absolute path, so the database no longer depends on the working directory
+    'url': 'sqlite:///' + os.path.join(BASE_DIR, 'school_management.db'),
+    # SQLite pragmas
+    'journal_mode': 'WAL',       # readers don't block the writer, writers don't block readers
+    'synchronous': 'NORMAL',     # safe with WAL; one fsync per checkpoint instead of per commit
+    'cache_size': '-65536',      # negative = KiB, i.e. 64 MB page cache per connection
+    'mmap_size': '268435456',    # 256 MB memory-mapped reads
+    'temp_store': 'MEMORY',
+    'busy_timeout': '10000',     # ms to wait for a lock held by another staff machine
+    # Pool (server databases, and SQLite files)
+    'pool_size': '5',
+    'max_overflow': '10',
+    'pool_recycle': '1800',
+}
+
+SQLITE_PRAGMAS = ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout')
+
+
+def load_settings():
+    settings = dict(DEFAULTS)
+
+    config_path = os.environ.get('SCHOOL_DB_CONFIG', os.path.join(BASE_DIR, 'school_db.ini'))
+    if os.path.exists(config_path):
+        parser = configparser.ConfigParser()
+        parser.read(config_path)
+        if parser.has_section('database'):
+            settings.update(parser['database'])
+
+    for key in settings:
+        value = os.environ.get(f'SCHOOL_DB_{key.upper()}')
+        if value is not None:
+            settings[key] = value
+    return settings
+
+
+def create_configured_engine(settings=None, **overrides):
+    """Builds the engine from load_settings() (or the given settings), with a pool suited to the backend."""
+    settings = dict(settings or load_settings(), **overrides)
+    url = make_url(settings['url'])
+
+    if url.get_backend_name() != 'sqlite':
+        # Server databases: a real pool with stale-connection checks
+        return create_engine(
+            url,
+            pool_size=int(settings['pool_size']),
+            max_overflow=int(settings['max_overflow']),
+            pool_recycle=int(settings['pool_recycle']),
+            pool_pre_ping=True,
+        )
+
+    if url.database in (None, '', ':memory:'):
+        # In-memory SQLite exists per connection, so every thread must share the one connection
+        engine = create_engine(url, poolclass=StaticPool, connect_args={'check_same_thread': False})
+    else:
+        engine = create_engine(
+            url,
+            pool_size=int(settings['pool_size']),
+            max_overflow=int(settings['max_overflow']),
+            connect_args={'timeout': int(settings['busy_timeout']) / 1000},
+        )
+
+    pragmas = [(name, settings[name]) for name in SQLITE_PRAGMAS if settings.get(name)]
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    return engine
@@ -0,0 +1,161 @@
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+
+from instrumentation import monitor
+from models import session_scope
+
+
+class Job:
+    """A unit of database work submitted to a QueryExecutor."""
+
+    def __init__(self, fn, on_done=None, on_error=None, key=None, busy=None, label=None):
+        self.fn = fn
+        self.label = label or key or getattr(fn, "__name__", "job") # Action name in SQL instrumentation
+        self.on_done = on_done
+        self.on_error = on_error
+        self.key = key
+        self.busy = busy
+        self.cancelled = False
+
+    def cancel(self):
+        # A cancelled job that is already running finishes, but its result is dropped
+        self.cancelled = True
+
+
+class QueryExecutor:
+    """Runs database jobs on a small thread pool so the Tk mainloop never waits on a query.
+
+    Every job is its own unit of work (models.session_scope). A job is `fn(session)`; it must
+    return plain data (rows, tuples, dicts, arrays), not ORM objects, because the session is
+    committed and closed as soon as the job ends. Results are handed back on the Tk thread by polling with `root.after`,
+    so `on_done(result)` and `on_error(exc)` can touch widgets.
+
+    Jobs submitted with the same `key` supersede each other: only the latest one delivers
+    its result (e.g. when the class filter changes quickly). At most `max_in_flight` jobs
+    run or wait in the pool at once; the rest are held back until a slot frees up.
+    submit() and cancel() must be called from the Tk thread.
+    """
+
+    def __init__(self, root, max_workers=2, max_in_flight=4, poll_ms=30):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.max_in_flight = max_in_flight
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self._results = queue.Queue()
+        self._backlog = deque()
+        self._latest = {} # {key: newest Job for that key}
+        self._in_flight = 0
+        self._closed = False
+        self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, fn, on_done=None, on_error=None, key=None, busy=None, label=None):
+        """Queues fn(session). busy(True/False) is called when the job (or its key) starts/stops being busy."""
+        job = Job(fn, on_done, on_error, key, busy, label)
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous:
+                previous.cancel()
+            self._latest[key] = job
+        if busy:
+            busy(True)
+
+        self._backlog.append(job)
+        self._start_backlog()
+        return job
+
+    def cancel(self, key):
+        job = self._latest.pop(key, None)
+        if job:
+            job.cancel()
+            if job.busy:
+                job.busy(False)
+
+    def shutdown(self):
+        self._closed = True
+        if self._poll_id:
+            self.root.after_cancel(self._poll_id)
+        for job in self._backlog:
+            job.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _start_backlog(self):
+        while self._backlog and self._in_flight < self.max_in_flight:
+            job = self._backlog.popleft()
+            if job.cancelled:
+                continue
+            self._in_flight += 1
+            self._pool.submit(self._run, job)
+
+    def _run(self, job):
+        # Worker thread
+        if job.cancelled:
+            self._results.put((job, None, None))
+            return
+        try:
+            with monitor.action(job.label), session_scope() as session:
+                result = job.fn(session)
+            self._results.put((job, result, None))
+        except Exception as e:
+            self._results.put((job, None, e))
+
+    def _poll(self):
+        # Tk thread: deliver finished jobs
+        while True:
+            try:
+                job, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._in_flight -= 1
+            self._deliver(job, result, error)
+
+        self._start_backlog()
+        if not self._closed:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def _deliver(self, job, result, error):
+        if job.key is not None:
+            if self._latest.get(job.key) is not job:
+                return # Superseded by a newer job with the same key
+            del self._latest[job.key]
+        if job.busy:
+            job.busy(False)
+        if job.cancelled:
+            return
+
+        if error is not None:
+            if job.on_error:
+                job.on_error(error)
+            else:
+                messagebox.showerror("Error", str(error))
+        elif job.on_done:
+            job.on_done(result)
+
+
+class InlineExecutor:
+    """Same interface as QueryExecutor but runs each job immediately, in its own session scope.
+
+    Used when a tab is created without a QueryExecutor (scripts, the legacy app window).
+    """
+
+    def submit(self, fn, on_done=None, on_error=None, key=None, busy=None, label=None):
+        job = Job(fn, on_done, on_error, key, busy, label)
+        try:
+            with monitor.action(job.label), session_scope() as session:
+                result = fn(session)
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            else:
+                messagebox.showerror("Error", str(e))
+        else:
+            if on_done:
+                on_done(result)
+        return job
+
+    def cancel(self, key):
+        pass
+
+    def shutdown(self):
+        pass
@@ -1,13 +1,33 @@
+import time
+from datetime import date as dt_date
 import customtkinter as ctk
 from tkinter import messagebox
-from models import Session, Student, Attendance, Mark, Fee
+from sqlalchemy import and_, case, func, insert, tuple_
+from models import TERMS, Student, Subject, Attendance, Mark, Fee
+from db_worker import QueryExecutor, InlineExecutor
+from instrumentation import monitor
+from widgets import VirtualTable
+import attendance_analytics
+import reference_data
+from student_search import search_filter
+
+TERM_OPTIONS = [str(term) for term in TERMS]
 
 class StudentsListTab(ctk.CTkFrame):
-    def __init__(self, parent, session):
+    PAGE_SIZE = 50
+    CLASSES = ["All", "JSS1", "JSS2", "JSS3", "SSS1", "SSS2", "SSS3"]
+    SEARCH_DELAY_MS = 300
+
+    def __init__(self, parent, executor=None):
         super().__init__(parent)
-        self.session = session
+        self.executor = executor or InlineExecutor()
         self.selected_student_id = None
         self.details_frame = None
+        self.page_starts = [None] # Keyset (name, id) each visited page starts after; None = first page
+        self.has_next_page = False
+        self.last_key = None
+        self.row_widgets = [] # Recycled (id, name, class, button) widgets, one set per page row
+        self._search_job = None
 
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
@@ -22,28 +42,123 @@ class StudentsListTab(ctk.CTkFrame):
 
         ctk.CTkLabel(control_frame, text="All Students", font=("Roboto", 16, "bold")).pack(side="left", padx=10)
 
+        # Search box (debounced) and class filter chips
+        self.search_var = ctk.StringVar()
+        self.search_entry = ctk.CTkEntry(control_frame, textvariable=self.search_var, placeholder_text="Search name or ID", width=220)
+        self.search_entry.pack(side="left", padx=10)
+        self.search_entry.bind("<KeyRelease>", self.on_search_changed)
+
+        self.class_chips = ctk.CTkSegmentedButton(control_frame, values=self.CLASSES, command=lambda _: self.load_students())
+        self.class_chips.set("All")
+        self.class_chips.pack(side="left", padx=10)
+
         # Main frame for the list
         self.students_list_frame = ctk.CTkScrollableFrame(self, label_text="Students")
         self.students_list_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
 
-    def load_students(self):
-        # Clear existing student list
-        for widget in self.students_list_frame.winfo_children():
-            widget.destroy()
-
-        students = self.session.query(Student).order_by(Student.name).all()
-
         headers = ["ID", "Name", "Class", "Actions"]
         for col, header in enumerate(headers):
             ctk.CTkLabel(self.students_list_frame, text=header, font=("Roboto", 12, "bold")).grid(row=0, column=col, padx=10, pady=5)
 
-        for i, student in enumerate(students, start=1):
-            ctk.CTkLabel(self.students_list_frame, text=student.student_id).grid(row=i, column=0, padx=10, pady=5)
-            ctk.CTkLabel(self.students_list_frame, text=student.name).grid(row=i, column=1, padx=10, pady=5)
-            ctk.CTkLabel(self.students_list_frame, text=student.class_name).grid(row=i, column=2, padx=10, pady=5)
+        # Pager
+        pager = ctk.CTkFrame(self)
+        pager.grid(row=3, column=0, padx=10, pady=(0, 10), sticky="ew")
+        self.prev_btn = ctk.CTkButton(pager, text="< Previous", width=100, command=self.previous_page)
+        self.prev_btn.pack(side="left", padx=10, pady=5)
+        self.page_label = ctk.CTkLabel(pager, text="Page 1")
+        self.page_label.pack(side="left", padx=10)
+        self.next_btn = ctk.CTkButton(pager, text="Next >", width=100, command=self.next_page)
+        self.next_btn.pack(side="left", padx=10, pady=5)
+        self.status_label = ctk.CTkLabel(pager, text="")
+        self.status_label.pack(side="right", padx=10)
+
+    def on_search_changed(self, event=None):
+        # Debounce: only query once typing pauses
+        if self._search_job:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(self.SEARCH_DELAY_MS, self.load_students)
 
-            action_button = ctk.CTkButton(self.students_list_frame, text="View Details", command=lambda s=student.id: self.toggle_details(s))
-            action_button.grid(row=i, column=3, padx=10, pady=5)
+    def load_students(self):
+        # Back to the first page with the current search and class filter
+        self._search_job = None
+        self.show_page([None])
+
+    def next_page(self):
+        if self.has_next_page:
+            self.show_page(self.page_starts + [self.last_key])
+
+    def previous_page(self):
+        if len(self.page_starts) > 1:
+            self.show_page(self.page_starts[:-1])
+
+    @staticmethod
+    def fetch_page(session, after, class_name, search, page_size=PAGE_SIZE):
+        """One page of (id, student_id, name, class_name) rows ordered by (name, id), starting after `after`.
+
+        Returns (rows, has_next_page).
+        """
+        query = session.query(Student.id, Student.student_id, Student.name, Student.class_name)
+
+        if class_name and class_name != "All":
+            query = query.filter(Student.class_name == class_name)
+
+        # Every word typed must start a word of the name or the student ID (FTS5 index on SQLite)
+        criterion = search_filter(session, search)
+        if criterion is not None:
+            query = query.filter(criterion)
+
+        if after is not None:
+            query = query.filter(tuple_(Student.name, Student.id) > tuple_(*after))
+
+        # One extra row tells us whether there is a next page
+        rows = query.order_by(Student.name, Student.id).limit(page_size + 1).all()
+        return rows[:page_size], len(rows) > page_size
+
+    def show_page(self, page_starts):
+        after, class_name, search = page_starts[-1], self.class_chips.get(), self.search_var.get()
+        self.executor.submit(
+            lambda session: self.fetch_page(session, after, class_name, search),
+            on_done=lambda result: self.render_page(page_starts, *result),
+            key="students_page", busy=self.set_busy
+        )
+
+    def set_busy(self, busy):
+        self.status_label.configure(text="Loading..." if busy else "")
+
+    def render_page(self, page_starts, students, has_next_page):
+        self.page_starts = page_starts
+        self.has_next_page = has_next_page
+        self.last_key = (students[-1].name, students[-1].id) if students else None
+
+        # Only the current page is materialized; row widgets are reused between pages
+        for i, student in enumerate(students, start=1):
+            if i > len(self.row_widgets):
+                self.row_widgets.append(self.create_row_widgets(i))
+            id_lbl, name_lbl, class_lbl, action_button = self.row_widgets[i - 1]
+            id_lbl.configure(text=student.student_id)
+            name_lbl.configure(text=student.name)
+            class_lbl.configure(text=student.class_name)
+            action_button.configure(command=lambda s=student.id: self.toggle_details(s))
+            for widget in self.row_widgets[i - 1]:
+                widget.grid()
+        for widgets in self.row_widgets[len(students):]:
+            for widget in widgets:
+                widget.grid_remove()
+
+        self.page_label.configure(text=f"Page {len(self.page_starts)}")
+        self.prev_btn.configure(state="normal" if len(self.page_starts) > 1 else "disabled")
+        self.next_btn.configure(state="normal" if self.has_next_page else "disabled")
+
+    def create_row_widgets(self, row):
+        widgets = (
+            ctk.CTkLabel(self.students_list_frame, text=""),
+            ctk.CTkLabel(self.students_list_frame, text=""),
+            ctk.CTkLabel(self.students_list_frame, text=""),
+            ctk.CTkButton(self.students_list_frame, text="View Details"),
+        )
+        for col, widget in enumerate(widgets):
+            widget.grid(row=row, column=col, padx=10, pady=5)
+        return widgets
 
     def toggle_details(self, student_id):
         if self.selected_student_id == student_id:
@@ -61,11 +176,33 @@ class StudentsListTab(ctk.CTkFrame):
             self.details_frame = ctk.CTkFrame(self)
             self.details_frame.grid(row=2, column=0, padx=10, pady=10, sticky="ew")
 
-            student = self.session.query(Student).filter_by(id=student_id).one()
-
-            # Collapsible sections
-            self.create_collapsible_section(self.details_frame, "Attendance", self.get_attendance_details(student))
-            self.create_collapsible_section(self.details_frame, "Results", self.get_results_details(student))
+            self.executor.submit(
+                lambda session: self.fetch_details(session, student_id),
+                on_done=lambda details: self.show_details(student_id, *details),
+                key="student_details"
+            )
+
+    @staticmethod
+    def fetch_details(session, student_id):
+        """Returns (attendance rows, result rows) for one student."""
+        attendance = session.query(Attendance.date, Attendance.is_present).filter_by(
+            student_id=student_id
+        ).order_by(Attendance.date).all()
+        # Subject codes come from the join, not a lazy load per mark
+        marks = session.query(
+            Mark.term, Subject.subject_code, Mark.total, Mark.grade
+        ).join(Subject, Mark.subject_id == Subject.id).filter(
+            Mark.student_id == student_id
+        ).order_by(Mark.term, Subject.id).all()
+        return attendance, marks
+
+    def show_details(self, student_id, attendance, marks):
+        if self.selected_student_id != student_id or not self.details_frame:
+            return # Closed, or another student was opened meanwhile
+
+        # Collapsible sections
+        self.create_collapsible_section(self.details_frame, "Attendance", self.get_attendance_details(attendance))
+        self.create_collapsible_section(self.details_frame, "Results", self.get_results_details(marks))
 
     def create_collapsible_section(self, parent, title, details_widget):
         frame = ctk.CTkFrame(parent)
@@ -83,9 +220,8 @@ class StudentsListTab(ctk.CTkFrame):
         else:
             widget.pack()
 
-    def get_attendance_details(self, student):
+    def get_attendance_details(self, records):
         frame = ctk.CTkFrame(self.details_frame)
-        records = self.session.query(Attendance).filter_by(student_id=student.id).all()
         if not records:
             ctk.CTkLabel(frame, text="No attendance records found.").pack()
         else:
@@ -94,20 +230,22 @@ class StudentsListTab(ctk.CTkFrame):
                 ctk.CTkLabel(frame, text=f"{record.date}: {status}").pack(anchor="w")
         return frame
 
-    def get_results_details(self, student):
+    def get_results_details(self, marks):
         frame = ctk.CTkFrame(self.details_frame)
-        marks = self.session.query(Mark).filter_by(student_id=student.id).all()
         if not marks:
             ctk.CTkLabel(frame, text="No results found.").pack()
         else:
-            for mark in marks:
-                ctk.CTkLabel(frame, text=f"Term {mark.term} - {mark.subject.subject_code}: Total={mark.total}, Grade={mark.grade}").pack(anchor="w")
+            for term, subject_code, total, grade in marks:
+                ctk.CTkLabel(frame, text=f"Term {term} - {subject_code}: Total={total}, Grade={grade}").pack(anchor="w")
         return frame
 
 class SchoolFeesTab(ctk.CTkFrame):
-    def __init__(self, parent, session):
+    def __init__(self, parent, executor=None):
         super().__init__(parent)
-        self.session = session
+        self.executor = executor or InlineExecutor()
+        self.fee_rows = {} # {student.id: {'due', 'paid', 'status': label, 'entry': entry}}
+        self.loaded_class = None
+        self.loaded_term = None
 
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
@@ -124,100 +262,414 @@ class SchoolFeesTab(ctk.CTkFrame):
         self.class_filter.pack(side="left", padx=5)
 
         ctk.CTkLabel(control_frame, text="Term:").pack(side="left", padx=5)
-        self.term_filter = ctk.CTkComboBox(control_frame, values=["1", "2", "3"])
+        self.term_filter = ctk.CTkComboBox(control_frame, values=TERM_OPTIONS)
         self.term_filter.pack(side="left", padx=5)
 
         ctk.CTkButton(control_frame, text="Load Fees", command=self.load_fees).pack(side="left", padx=10)
 
+        self.totals_label = ctk.CTkLabel(control_frame, text="", font=("Roboto", 12, "bold"))
+        self.totals_label.pack(side="right", padx=10)
+        self.status_label = ctk.CTkLabel(control_frame, text="")
+        self.status_label.pack(side="right", padx=5)
+
         self.fees_list_frame = ctk.CTkScrollableFrame(self, label_text="Fees Status")
         self.fees_list_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
 
-    def load_fees(self):
-        for widget in self.fees_list_frame.winfo_children():
-            widget.destroy()
+    @staticmethod
+    def fee_rows_query(session, term):
+        # Students joined to their fee row for the term; status worked out in SQL.
+        # A missing fee row reads as 0 due / 0 paid, which is what load_fees inserts for it.
+        due = func.coalesce(Fee.amount_due, 0)
+        paid = func.coalesce(Fee.amount_paid, 0)
+        return session.query(
+            Student.id, Student.name, Fee.id.label("fee_id"),
+            due.label("amount_due"), paid.label("amount_paid"),
+            case((paid >= due, "Paid"), else_="Pending").label("status")
+        ).outerjoin(Fee, and_(Fee.student_id == Student.id, Fee.term == term))
+
+    @staticmethod
+    def fee_totals(session, class_name, term):
+        # (due, paid, outstanding) for the class, aggregated in SQL
+        due = func.coalesce(Fee.amount_due, 0)
+        paid = func.coalesce(Fee.amount_paid, 0)
+        return tuple(session.query(
+            func.coalesce(func.sum(due), 0),
+            func.coalesce(func.sum(paid), 0),
+            func.coalesce(func.sum(case((due > paid, due - paid), else_=0)), 0)
+        ).join(Student, Fee.student_id == Student.id).filter(
+            Student.class_name == class_name, Fee.term == term
+        ).one())
+
+    @staticmethod
+    def fetch_fees(session, class_name, term):
+        """Returns (fee rows, totals) for the class, creating missing fee rows in one insert and one commit."""
+        rows = SchoolFeesTab.fee_rows_query(session, term).filter(
+            Student.class_name == class_name
+        ).order_by(Student.name).all()
+
+        missing = [{"student_id": row.id, "term": term, "amount_due": 0, "amount_paid": 0}
+                   for row in rows if row.fee_id is None]
+        if missing:
+            session.execute(insert(Fee), missing)
+            session.commit()
+        return rows, SchoolFeesTab.fee_totals(session, class_name, term)
 
+    def load_fees(self):
         class_name = self.class_filter.get()
         term = int(self.term_filter.get())
 
-        students = self.session.query(Student).filter_by(class_name=class_name).all()
+        self.executor.submit(
+            lambda session: self.fetch_fees(session, class_name, term),
+            on_done=lambda result: self.show_fees(class_name, term, *result),
+            on_error=lambda e: messagebox.showerror("Error", f"An error occurred: {e}"),
+            key="fees", busy=self.set_busy
+        )
+
+    def set_busy(self, busy):
+        self.status_label.configure(text="Loading..." if busy else "")
+
+    def show_fees(self, class_name, term, rows, totals):
+        for widget in self.fees_list_frame.winfo_children():
+            widget.destroy()
+        self.fee_rows = {}
+        self.loaded_class, self.loaded_term = class_name, term
 
         headers = ["Student Name", "Amount Due", "Amount Paid", "Status", "Update Paid Amount", "Actions"]
         for col, header in enumerate(headers):
             ctk.CTkLabel(self.fees_list_frame, text=header, font=("Roboto", 12, "bold")).grid(row=0, column=col, padx=10, pady=5)
 
-        for i, student in enumerate(students, start=1):
-            fee = self.session.query(Fee).filter_by(student_id=student.id, term=term).first()
-            if not fee:
-                fee = Fee(student_id=student.id, term=term, amount_due=0, amount_paid=0)
-                self.session.add(fee)
-                self.session.commit()
-
-            status = "Paid" if fee.amount_paid >= fee.amount_due else "Pending"
-
-            ctk.CTkLabel(self.fees_list_frame, text=student.name).grid(row=i, column=0, padx=10, pady=5)
-            ctk.CTkLabel(self.fees_list_frame, text=f"{fee.amount_due:.2f}").grid(row=i, column=1, padx=10, pady=5)
-            ctk.CTkLabel(self.fees_list_frame, text=f"{fee.amount_paid:.2f}").grid(row=i, column=2, padx=10, pady=5)
-            ctk.CTkLabel(self.fees_list_frame, text=status).grid(row=i, column=3, padx=10, pady=5)
+        for i, row in enumerate(rows, start=1):
+            ctk.CTkLabel(self.fees_list_frame, text=row.name).grid(row=i, column=0, padx=10, pady=5)
+            due_lbl = ctk.CTkLabel(self.fees_list_frame, text=f"{row.amount_due:.2f}")
+            due_lbl.grid(row=i, column=1, padx=10, pady=5)
+            paid_lbl = ctk.CTkLabel(self.fees_list_frame, text=f"{row.amount_paid:.2f}")
+            paid_lbl.grid(row=i, column=2, padx=10, pady=5)
+            status_lbl = ctk.CTkLabel(self.fees_list_frame, text=row.status)
+            status_lbl.grid(row=i, column=3, padx=10, pady=5)
 
             entry = ctk.CTkEntry(self.fees_list_frame, placeholder_text="Enter amount")
             entry.grid(row=i, column=4, padx=5)
 
-            button = ctk.CTkButton(self.fees_list_frame, text="Update", command=lambda s=student.id, t=term, e=entry: self.update_fee(s, t, e.get()))
+            button = ctk.CTkButton(self.fees_list_frame, text="Update", command=lambda s=row.id, t=term, e=entry: self.update_fee(s, t, e.get()))
             button.grid(row=i, column=5, padx=5)
 
+            self.fee_rows[row.id] = {"due": due_lbl, "paid": paid_lbl, "status": status_lbl, "entry": entry}
+
+        self.show_totals(totals)
+
+    def show_totals(self, totals):
+        due, paid, outstanding = totals
+        self.totals_label.configure(text=f"Due: {due:.2f}   Paid: {paid:.2f}   Outstanding: {outstanding:.2f}")
+
+    def show_fee_row(self, student_id, row):
+        # Update a single student's labels in place
+        widgets = self.fee_rows.get(student_id)
+        if not widgets: return
+        widgets["due"].configure(text=f"{row.amount_due:.2f}")
+        widgets["paid"].configure(text=f"{row.amount_paid:.2f}")
+        widgets["status"].configure(text=row.status)
+        widgets["entry"].delete(0, "end")
+
+    @staticmethod
+    def write_fee(session, student_id, term, class_name, amount):
+        """Saves the paid amount; returns the student's refreshed fee row and the class totals."""
+        fee = session.query(Fee).filter_by(student_id=student_id, term=term).one()
+        fee.amount_paid = amount
+        session.commit()
+        row = SchoolFeesTab.fee_rows_query(session, term).filter(Student.id == student_id).one()
+        return row, SchoolFeesTab.fee_totals(session, class_name, term)
+
     def update_fee(self, student_id, term, amount_str):
         try:
             amount = float(amount_str)
-            fee = self.session.query(Fee).filter_by(student_id=student_id, term=term).one()
-            fee.amount_paid = amount
-            self.session.commit()
-            messagebox.showinfo("Success", "Fee updated successfully.")
-            self.load_fees()
         except ValueError:
             messagebox.showerror("Error", "Please enter a valid amount.")
-        except Exception as e:
-            self.session.rollback()
-            messagebox.showerror("Error", f"An error occurred: {e}")
+            return
+
+        def done(result):
+            row, totals = result
+            messagebox.showinfo("Success", "Fee updated successfully.")
+            self.show_fee_row(student_id, row)
+            if self.loaded_term == term:
+                self.show_totals(totals)
+
+        class_name = self.loaded_class
+        self.executor.submit(
+            lambda session: self.write_fee(session, student_id, term, class_name, amount),
+            on_done=done, label="save_fee",
+            on_error=lambda e: messagebox.showerror("Error", f"An error occurred: {e}")
+        )
+
+class AttendanceSummaryTab(ctk.CTkFrame):
+    VIEWS = ["Term to date", "Chronic absentees", "Daily rates"]
+
+    def __init__(self, parent, executor=None):
+        super().__init__(parent)
+        self.executor = executor or InlineExecutor()
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(2, weight=1)
+
+        self.setup_ui()
+        self.load_summary()
+
+    def setup_ui(self):
+        control_frame = ctk.CTkFrame(self)
+        control_frame.grid(row=0, column=0, padx=10, pady=(10, 0), sticky="ew")
+
+        self.view_selector = ctk.CTkSegmentedButton(control_frame, values=self.VIEWS, command=lambda _: self.load_summary())
+        self.view_selector.set(self.VIEWS[0])
+        self.view_selector.pack(side="left", padx=5)
+
+        ctk.CTkLabel(control_frame, text="Class:").pack(side="left", padx=5)
+        self.class_filter = ctk.CTkComboBox(control_frame, values=StudentsListTab.CLASSES, width=100,
+                                            command=lambda _: self.load_summary())
+        self.class_filter.pack(side="left", padx=5)
+
+        ctk.CTkLabel(control_frame, text="Term:").pack(side="left", padx=5)
+        self.term_filter = ctk.CTkOptionMenu(control_frame, values=TERM_OPTIONS, width=70,
+                                             command=lambda _: self.load_summary())
+        self.term_filter.pack(side="left", padx=5)
+
+        # Optional range inside the term; blank = term start / today
+        range_frame = ctk.CTkFrame(self)
+        range_frame.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
+        ctk.CTkLabel(range_frame, text="From:").pack(side="left", padx=5)
+        self.start_entry = ctk.CTkEntry(range_frame, placeholder_text="YYYY-MM-DD", width=110)
+        self.start_entry.pack(side="left", padx=5)
+        ctk.CTkLabel(range_frame, text="To:").pack(side="left", padx=5)
+        self.end_entry = ctk.CTkEntry(range_frame, placeholder_text="YYYY-MM-DD", width=110)
+        self.end_entry.pack(side="left", padx=5)
+        ctk.CTkLabel(range_frame, text="Chronic below %:").pack(side="left", padx=5)
+        self.threshold_entry = ctk.CTkEntry(range_frame, width=60)
+        self.threshold_entry.insert(0, f"{attendance_analytics.CHRONIC_THRESHOLD:g}")
+        self.threshold_entry.pack(side="left", padx=5)
+        ctk.CTkButton(range_frame, text="Refresh", command=self.load_summary).pack(side="left", padx=10)
+
+        self.status_label = ctk.CTkLabel(range_frame, text="")
+        self.status_label.pack(side="right", padx=10)
+
+        self.summary_table = VirtualTable(self, frozen_columns=2)
+        self.summary_table.grid(row=2, column=0, padx=10, pady=(0, 10), sticky="nsew")
+
+    def load_summary(self):
+        view = self.view_selector.get()
+        class_name = self.class_filter.get()
+        class_name = None if class_name == "All" else class_name
+        term = int(self.term_filter.get())
+        try:
+            start = dt_date.fromisoformat(self.start_entry.get().strip()) if self.start_entry.get().strip() else None
+            end = dt_date.fromisoformat(self.end_entry.get().strip()) if self.end_entry.get().strip() else None
+            threshold = float(self.threshold_entry.get() or attendance_analytics.CHRONIC_THRESHOLD)
+        except ValueError:
+            messagebox.showerror("Invalid Filter", "Dates must be YYYY-MM-DD and the threshold a number.")
+            return
+
+        self.executor.submit(
+            lambda session: self.fetch_summary(session, view, class_name, term, start, end, threshold),
+            on_done=lambda result: self.show_summary(view, *result),
+            key="attendance_summary", busy=self.set_busy
+        )
+
+    @staticmethod
+    def fetch_summary(session, view, class_name, term, start, end, threshold):
+        """Returns (start, end, rows); a missing start or end comes from the term calendar (end no later than today)."""
+        first, last = attendance_analytics.term_range(term)
+        start = start or first
+        end = end or min(last or dt_date.today(), dt_date.today())
+        if start is None:
+            return start, end, []
+
+        if view == "Daily rates":
+            rows = attendance_analytics.daily_rates(session, start, end, class_name)
+        elif view == "Chronic absentees":
+            rows = attendance_analytics.chronic_absentees(session, start, end, class_name, threshold)
+        else:
+            rows = attendance_analytics.student_percentages(session, start, end, class_name)
+        return start, end, rows
+
+    def show_summary(self, view, start, end, rows):
+        if view == "Daily rates":
+            self.summary_table.set_columns(["Date", "Class", "Present", "Recorded", "Rate %"],
+                                           [110, 90, 90, 90, 90], ["w", "w", "e", "e", "e"])
+            self.summary_table.set_rows([
+                [row.date.isoformat(), row.class_name, row.present, row.recorded, f"{row.rate:.1f}"] for row in rows
+            ])
+        else:
+            self.summary_table.set_columns(["Student ID", "Name", "Class", "Present", "Recorded", "Attendance %"],
+                                           [100, 220, 80, 80, 80, 110], ["w", "w", "w", "e", "e", "e"])
+            self.summary_table.set_rows([
+                [row.student_id, row.name, row.class_name, row.present, row.recorded, f"{row.percent:.1f}"]
+                for row in rows
+            ])
+
+        if start is None:
+            self.status_label.configure(text="No term calendar (SCHOOL_TERM_STARTS): enter From and To dates.")
+        else:
+            self.status_label.configure(text=f"{start} to {end}: {len(rows)} rows")
+
+    def set_busy(self, busy):
+        if busy:
+            self.status_label.configure(text="Loading...")
+
+
+class SqlDebugPanel(ctk.CTkToplevel):
+    """Live view of the SQL monitor: queries and SQL time per action, slow statements, N+1 hints, reference cache hits."""
+    REFRESH_MS = 1000
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("SQL Debug")
+        self.geometry("900x500")
+        self.shown_state = None
+
+        control_frame = ctk.CTkFrame(self)
+        control_frame.pack(fill="x", padx=10, pady=10)
+        ctk.CTkButton(control_frame, text="Clear", command=self.clear).pack(side="left", padx=5)
+        self.summary_label = ctk.CTkLabel(control_frame, text="")
+        self.summary_label.pack(side="left", padx=10)
+
+        self.report_box = ctk.CTkTextbox(self, font=("Courier", 12), wrap="none")
+        self.report_box.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+        self.refresh()
+
+    def clear(self):
+        monitor.clear()
+        reference_data.cache.reset_stats()
+        self.shown_state = None
+        self.refresh()
+
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+        actions = monitor.recent()
+        # Rewrite the text only when something new finished, so scrolling isn't reset every second
+        if (len(actions), actions[0] if actions else None) != self.shown_state:
+            self.shown_state = (len(actions), actions[0] if actions else None)
+            self.report_box.configure(state="normal")
+            self.report_box.delete("1.0", "end")
+            self.report_box.insert("end", self.format_report(actions))
+            self.report_box.configure(state="disabled")
+
+        flagged = sum(1 for stats in actions if stats.repeated())
+        cache = reference_data.cache.stats()
+        self.summary_label.configure(
+            text=f"{len(actions)} actions, {flagged} with repeated statements | "
+                 f"outside actions: {monitor.unattributed_queries} queries, {monitor.unattributed_seconds * 1000:.1f} ms | "
+                 f"reference cache: {cache['hits']} hits, {cache['misses']} misses"
+        )
+        self.after(self.REFRESH_MS, self.refresh)
+
+    @staticmethod
+    def format_report(actions):
+        lines = [f"{'Action':<20} {'Queries':>8} {'SQL ms':>9} {'Total ms':>9}  Notes"]
+        for stats in actions:
+            notes = []
+            if stats.repeated():
+                notes.append("possible N+1")
+            if stats.slow:
+                notes.append(f"{len(stats.slow)} slow")
+            lines.append(f"{stats.name:<20} {stats.queries:>8} {stats.sql_seconds * 1000:>9.1f} "
+                         f"{stats.duration * 1000:>9.1f}  {', '.join(notes)}")
+            for shape, count in stats.repeated():
+                lines.append(f"    {count}x  {shape}")
+            for seconds, statement in stats.slow:
+                lines.append(f"    {seconds * 1000:.1f} ms  {statement}")
+        return "\n".join(lines)
+
 
 class EnterpriseSchoolManagementApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Enterprise School Management System")
-        self.session = Session()
+        # All tab loads and saves run on background DB workers, each in its own short session
+        # (models.session_scope); tabs only ever hold plain rows
+        self.executor = QueryExecutor(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.debug_panel = None
+        self.root.bind("<F12>", self.show_debug_panel)
 
         self.setup_tabs()
 
     def setup_tabs(self):
-        self.tabview = ctk.CTkTabview(self.root)
+        self.tabview = ctk.CTkTabview(self.root, command=self.on_tab_changed)
         self.tabview.pack(fill="both", expand=True, padx=10, pady=10)
 
-        self.tabview.add("Students List")
-        self.tabview.add("School Fees")
-        self.tabview.add("Student Registration")
-        self.tabview.add("Marks Entry")
-        self.tabview.add("Broadsheet")
-        self.tabview.add("Attendance")
-
-        # Initialize Enterprise Tabs
-        self.students_list_tab = StudentsListTab(self.tabview.tab("Students List"), self.session)
-        self.school_fees_tab = SchoolFeesTab(self.tabview.tab("School Fees"), self.session)
-
-        # Initialize Original Tabs from forms.py
-        from forms import StudentRegistrationTab, MarksEntryTab, BroadsheetTab, AttendanceTab
-        self.marks_tab = MarksEntryTab(self.tabview.tab("Marks Entry"), self.session)
-        self.student_tab = StudentRegistrationTab(self.tabview.tab("Student Registration"), self.session,
-                                                  on_student_added_callback=self.refresh_tabs)
-        self.sheet_tab = BroadsheetTab(self.tabview.tab("Broadsheet"), self.session)
-        self.attendance_tab = AttendanceTab(self.tabview.tab("Attendance"), self.session)
-
-        # Layout Tabs
-        self.students_list_tab.pack(fill="both", expand=True)
-        self.school_fees_tab.pack(fill="both", expand=True)
-        self.student_tab.pack(fill="both", expand=True)
-        self.marks_tab.pack(fill="both", expand=True)
-        self.sheet_tab.pack(fill="both", expand=True)
-        self.attendance_tab.pack(fill="both", expand=True)
+        # Tabs are built (and forms.py imported) the first time they are shown
+        self.tab_factories = {
+            "Students List": ("students_list_tab", self.create_students_list_tab),
+            "School Fees": ("school_fees_tab", self.create_school_fees_tab),
+            "Student Registration": ("student_tab", self.create_student_tab),
+            "Marks Entry": ("marks_tab", self.create_marks_tab),
+            "Broadsheet": ("sheet_tab", self.create_sheet_tab),
+            "Attendance": ("attendance_tab", self.create_attendance_tab),
+            "Attendance Summary": ("attendance_summary_tab", self.create_attendance_summary_tab),
+        }
+        self.tab_build_times = {} # {tab name: seconds taken to build it}
+        for name, (attribute, _) in self.tab_factories.items():
+            self.tabview.add(name)
+            setattr(self, attribute, None)
+
+        self.build_tab(self.tabview.get())
+
+    def on_tab_changed(self):
+        self.build_tab(self.tabview.get())
+
+    def build_tab(self, name):
+        attribute, factory = self.tab_factories[name]
+        tab = getattr(self, attribute)
+        if tab is None:
+            start = time.perf_counter()
+            tab = factory(self.tabview.tab(name))
+            tab.pack(fill="both", expand=True)
+            setattr(self, attribute, tab)
+            self.tab_build_times[name] = time.perf_counter() - start
+        return tab
+
+    def create_students_list_tab(self, parent):
+        return StudentsListTab(parent, self.executor)
+
+    def create_school_fees_tab(self, parent):
+        return SchoolFeesTab(parent, self.executor)
+
+    def create_student_tab(self, parent):
+        from forms import StudentRegistrationTab
+        return StudentRegistrationTab(parent, on_student_added_callback=self.refresh_tabs)
+
+    def create_marks_tab(self, parent):
+        from forms import MarksEntryTab
+        return MarksEntryTab(parent, self.executor, on_marks_saved=self.on_marks_saved)
+
+    def create_sheet_tab(self, parent):
+        from forms import BroadsheetTab
+        return BroadsheetTab(parent, self.executor)
+
+    def create_attendance_tab(self, parent):
+        from forms import AttendanceTab
+        return AttendanceTab(parent, self.executor)
+
+    def create_attendance_summary_tab(self, parent):
+        return AttendanceSummaryTab(parent, self.executor)
 
     def refresh_tabs(self):
-        self.marks_tab.load_students()
-        self.students_list_tab.load_students()
+        # Tabs not built yet will load fresh data when first opened
+        if self.marks_tab:
+            self.marks_tab.load_students()
+        if self.students_list_tab:
+            self.students_list_tab.load_students()
+
+    def on_marks_saved(self, student_id, term, totals):
+        # Patch the open broadsheet in place rather than reloading the whole class
+        if self.sheet_tab:
+            self.sheet_tab.apply_marks(student_id, term, totals)
+
+    def show_debug_panel(self, event=None):
+        if self.debug_panel and self.debug_panel.winfo_exists():
+            self.debug_panel.lift()
+        else:
+            self.debug_panel = SqlDebugPanel(self.root)
+
+    def on_close(self):
+        self.executor.shutdown()
+        self.root.destroy()
@@ -0,0 +1,94 @@
+"""Headless broadsheet export, streamed straight from the database.
+
+Writes one CSV per class and term, with the same columns as the Broadsheet tab export
+(Student ID, Name, one column per subject code). Marks are read in chunks and pivoted
+one student at a time, so memory use does not depend on the size of the marks table.
+
+Usage:
+    python exports.py OUTPUT_DIR [--term 1 --term 2] [--class JSS1] [--gzip] [--chunk-size 2000]
+"""
+import argparse
+import csv
+import gzip
+import os
+from datetime import date as dt_date
+from itertools import groupby
+
+from sqlalchemy import and_
+from models import Student, Subject, Mark, session_scope
+from calculations import GradeCalculator
+
+
+def format_score(score):
+    # Broadsheet cell text: whole-number totals, "-" when there is no mark
+    return f"{score:.0f}" if isinstance(score, float) else score
+
+
+def broadsheet_filename(class_name, term, compress=False):
+    return f"Broadsheet_{class_name}_Term{term}_{dt_date.today()}.csv" + (".gz" if compress else "")
+
+
+def stream_broadsheet(session, term, subjects, class_name=None, chunk_size=1000):
+    """Yields (class_name, row) for every student, ordered by class then name.
+
+    `subjects` is the ordered list of (id, code) pairs that make up the mark columns.
+    Rows are pivoted from a chunked (student, mark) stream, one student at a time.
+    """
+    query = session.query(
+        Student.class_name, Student.id, Student.student_id, Student.name, Mark.subject_id, Mark.total
+    ).outerjoin(
+        Mark, and_(Mark.student_id == Student.id, Mark.term == term)
+    )
+    if class_name is not None:
+        query = query.filter(Student.class_name == class_name)
+    query = query.order_by(Student.class_name, Student.name, Student.id).yield_per(chunk_size)
+
+    for (student_class, _), marks in groupby(query, key=lambda r: (r.class_name, r.id)):
+        first = next(marks)
+        scores = {first.subject_id: first.total}
+        scores.update((m.subject_id, m.total) for m in marks)
+
+        row = [first.student_id, first.name]
+        row.extend(format_score(scores.get(subject_id, "-")) for subject_id, _ in subjects)
+        yield student_class, row
+
+
+def export_school(output_dir, terms=GradeCalculator.TERMS, class_name=None, compress=False, chunk_size=1000, progress=print):
+    """Writes Broadsheet_<class>_Term<term>_<date>.csv(.gz) files for every class and term. Returns the paths."""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    with session_scope() as session:
+        subjects = session.query(Subject.id, Subject.subject_code).order_by(Subject.id).all()
+        header = ["Student ID", "Name"] + [code for _, code in subjects]
+
+        for term in terms:
+            rows = stream_broadsheet(session, term, subjects, class_name, chunk_size)
+            for student_class, class_rows in groupby(rows, key=lambda r: r[0]):
+                path = os.path.join(output_dir, broadsheet_filename(student_class, term, compress))
+                opener = gzip.open if compress else open
+                count = 0
+                with opener(path, mode='wt', newline='', encoding='utf-8') as file:
+                    writer = csv.writer(file)
+                    writer.writerow(header)
+                    for _, row in class_rows:
+                        writer.writerow(row)
+                        count += 1
+                paths.append(path)
+                if progress:
+                    progress(f"{student_class} term {term}: {count} students -> {path}")
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export broadsheets for every class and term")
+    parser.add_argument("output_dir", help="directory the CSV files are written to")
+    parser.add_argument("--term", type=int, action="append", help="term to export (repeatable, default: all)")
+    parser.add_argument("--class", dest="class_name", help="export only this class")
+    parser.add_argument("--gzip", action="store_true", help="gzip-compress the CSV files")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows fetched from the database per chunk")
+    args = parser.parse_args()
+
+    from main import prepare_database
+    prepare_database() # Creates or upgrades the schema when this runs before the app ever has
+
+    export_school(args.output_dir, terms=args.term or GradeCalculator.TERMS, class_name=args.class_name,
+                  compress=args.gzip, chunk_size=args.chunk_size)
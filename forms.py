@@ -1,14 +1,26 @@
+import csv
 import tkinter as tk
-from tkinter import messagebox
+from datetime import date as dt_date
+from tkinter import messagebox, filedialog
 import customtkinter as ctk
+import numpy as np
+from sqlalchemy import and_
 from sqlalchemy.exc import IntegrityError
-from models import Session, Student, Subject, Mark, Attendance
-from calculations import GradeCalculator
+from models import TERMS, Student, Mark, Attendance, bulk_upsert, session_scope
+import reference_data
+import mark_statistics
+from student_search import search_students
+from calculations import GradeCalculator, TermSummaryCalculator
+from attendance_store import AttendanceBitmaps
+from db_worker import InlineExecutor
+from exports import format_score
+from widgets import VirtualTable
+
+TERM_OPTIONS = [str(term) for term in TERMS]
 
 class StudentRegistrationTab(ctk.CTkFrame):
-    def __init__(self, parent, session, on_student_added_callback):
+    def __init__(self, parent, on_student_added_callback):
         super().__init__(parent)
-        self.session = session
         self.on_student_added_callback = on_student_added_callback
         self.setup_ui()
 
@@ -52,10 +64,11 @@ class StudentRegistrationTab(ctk.CTkFrame):
             return
 
         try:
-            # Create new student
-            new_student = Student(student_id=s_id, name=name, class_name=class_name)
-            self.session.add(new_student)
-            self.session.commit()
+            # Create new student (committed when the scope ends)
+            with session_scope() as session:
+                session.add(Student(student_id=s_id, name=name, class_name=class_name))
+            reference_data.students_changed()
+            mark_statistics.marks_changed() # Class matrices list every student, with or without marks
             
             messagebox.showinfo("Success", f"Student {name} added successfully!")
             
@@ -68,44 +81,54 @@ class StudentRegistrationTab(ctk.CTkFrame):
                 self.on_student_added_callback()
                 
         except IntegrityError:
-            self.session.rollback()
             messagebox.showerror("Error", f"Student ID '{s_id}' already exists.")
         except Exception as e:
-            self.session.rollback()
             messagebox.showerror("Error", f"Failed to add student: {str(e)}")
 
 
 class MarksEntryTab(ctk.CTkFrame):
-    def __init__(self, parent, session):
+    STUDENT_MATCHES = 20 # Students offered in the typeahead list
+    def __init__(self, parent, executor=None, on_marks_saved=None):
         super().__init__(parent)
-        self.session = session
-        self.active_students = []
+        self.executor = executor or InlineExecutor()
+        self.on_marks_saved = on_marks_saved # Called with (student.id, term, {subject.id: total}) after a save
+        self.subjects = []
+        self.entries = {} # {subject_id: {'ca': var, 'exam': var, 'total': label, 'grade': label}}
+        self.subject_entry = None # "By subject" grid, built the first time that mode is chosen
+        self.offered_students = set() # "ID - Name" strings the student list has offered
         
         self.grid_columnconfigure(0, weight=1)
-        self.grid_rowconfigure(1, weight=1) # Scrollable part expands
+        self.grid_rowconfigure(2, weight=1) # Scrollable part expands
         
         self.setup_ui()
         self.load_subjects()
         self.load_students() # Initial load
 
     def setup_ui(self):
+        # Entry mode: every subject for one student, or one subject for a whole class
+        self.mode_switch = ctk.CTkSegmentedButton(self, values=["By student", "By subject"], command=self.set_mode)
+        self.mode_switch.set("By student")
+        self.mode_switch.grid(row=0, column=0, padx=10, pady=(10, 0), sticky="w")
+
         # Top Bar
-        top_frame = ctk.CTkFrame(self)
-        top_frame.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
+        self.top_frame = ctk.CTkFrame(self)
+        self.top_frame.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
         
-        ctk.CTkLabel(top_frame, text="Student:").pack(side="left", padx=10)
+        ctk.CTkLabel(self.top_frame, text="Student:").pack(side="left", padx=10)
+        # Typing searches (name words or ID prefix); the list holds the top matches only
         self.student_var = ctk.StringVar(value="")
-        self.student_combo = ctk.CTkOptionMenu(top_frame, variable=self.student_var, width=250)
+        self.student_combo = ctk.CTkComboBox(self.top_frame, variable=self.student_var, width=250)
         self.student_combo.pack(side="left", padx=10)
+        self.student_combo.bind("<KeyRelease>", self.on_student_typed)
         
-        ctk.CTkLabel(top_frame, text="Term:").pack(side="left", padx=10)
+        ctk.CTkLabel(self.top_frame, text="Term:").pack(side="left", padx=10)
         self.term_var = ctk.StringVar(value="1")
-        self.term_combo = ctk.CTkOptionMenu(top_frame, variable=self.term_var, values=["1", "2", "3"], width=80)
+        self.term_combo = ctk.CTkOptionMenu(self.top_frame, variable=self.term_var, values=TERM_OPTIONS, width=80)
         self.term_combo.pack(side="left", padx=10)
 
         # Marks Grid (Scrollable)
         self.marks_frame = ctk.CTkScrollableFrame(self, label_text="Results Entry")
-        self.marks_frame.grid(row=1, column=0, padx=10, pady=5, sticky="nsew")
+        self.marks_frame.grid(row=2, column=0, padx=10, pady=5, sticky="nsew")
         
         # Headers
         headers = ["Subject", "CA (40)", "Exam (60)", "Total", "Grade"]
@@ -117,27 +140,60 @@ class MarksEntryTab(ctk.CTkFrame):
             
         # Footer
         self.save_btn = ctk.CTkButton(self, text="Save Marks", command=self.save_marks, height=40, width=200, font=("Roboto", 14, "bold"))
-        self.save_btn.grid(row=2, column=0, pady=15)
+        self.save_btn.grid(row=3, column=0, pady=15)
+
+    def set_mode(self, mode):
+        by_subject = mode == "By subject"
+        for widget in (self.top_frame, self.marks_frame, self.save_btn):
+            if by_subject:
+                widget.grid_remove()
+            else:
+                widget.grid()
+        if by_subject:
+            if self.subject_entry is None:
+                self.subject_entry = SubjectMarksEntry(self, self.executor, self.on_marks_saved)
+            self.subject_entry.grid(row=1, column=0, rowspan=3, sticky="nsew")
+        elif self.subject_entry is not None:
+            self.subject_entry.grid_remove()
 
-    def load_students(self):
-        # Refresh student list
-        students = self.session.query(Student).all()
-        self.active_students = students
-        if students:
-            student_list = [f"{s.student_id} - {s.name}" for s in students]
+    def load_students(self, search=""):
+        # Refresh student list: the first matches for `search` (the first students by name when empty)
+        self.executor.submit(
+            lambda session: self.fetch_students(session, search),
+            on_done=lambda students: self.show_students(students, typed=bool(search)), key="marks_students"
+        )
+        if not search and self.subject_entry is not None:
+            self.subject_entry.load_options() # New students may mean a new class
+
+    @staticmethod
+    def fetch_students(session, search="", limit=STUDENT_MATCHES):
+        return search_students(session, search, limit)
+
+    def on_student_typed(self, event=None):
+        text = self.student_var.get()
+        if text not in self.offered_students: # A picked entry isn't a search
+            self.load_students(text)
+
+    def show_students(self, students, typed=False):
+        student_list = [f"{s.student_id} - {s.name}" for s in students]
+        self.offered_students.update(student_list)
+        if typed:
+            # Leave what is being typed alone; just offer the matches
+            self.student_combo.configure(values=student_list or ["No matches"])
+        elif student_list:
             self.student_combo.configure(values=student_list)
             # Preserve selection if possible, else select first
-            current = self.student_var.get()
-            if current not in student_list:
+            if self.student_var.get() not in self.offered_students:
                 self.student_var.set(student_list[0])
         else:
             self.student_combo.configure(values=["No Students"])
             self.student_var.set("No Students")
 
     def load_subjects(self):
-        self.subjects = self.session.query(Subject).all()
-        self.entries = {} # {subject_id: {'ca': var, 'exam': var, 'total': label, 'grade': label}}
-        
+        self.executor.submit(reference_data.subjects, on_done=self.build_subject_rows, key="marks_subjects")
+
+    def build_subject_rows(self, subjects):
+        self.subjects = subjects
         for i, sub in enumerate(self.subjects, 1):
             # Name
             ctk.CTkLabel(self.marks_frame, text=sub.subject_name, anchor="w").grid(row=i, column=0, sticky="ew", padx=5)
@@ -186,59 +242,311 @@ class MarksEntryTab(ctk.CTkFrame):
         student_str = self.student_var.get()
         if not student_str or student_str == "No Students":
             return
+        if student_str not in self.offered_students:
+            messagebox.showwarning("Select Student", "Pick a student from the list (type part of a name or ID to search).")
+            return
             
-        try:
-            student_id_str = student_str.split(' - ')[0]
-            student = self.session.query(Student).filter_by(student_id=student_id_str).first()
-            if not student: return
-            
-            term = int(self.term_var.get())
-            
-            for sub in self.subjects:
-                widgets = self.entries[sub.id]
-                # Guardrails: Default to 0 if empty/invalid
-                try:
-                    ca = float(widgets['ca'].get() or 0)
-                except ValueError: ca = 0.0
-                
-                try:
-                    exam = float(widgets['exam'].get() or 0)
-                except ValueError: exam = 0.0
-                
-                total = ca + exam
-                grade = GradeCalculator.calculate_grade(total)
-                
-                # DB Update/Insert
-                mark = self.session.query(Mark).filter_by(student_id=student.id, subject_id=sub.id, term=term).first()
-                if mark:
-                    mark.continuous_assessment = ca
-                    mark.exams = exam
-                    mark.total = total
-                    mark.grade = grade
-                else:
-                    self.session.add(Mark(student_id=student.id, subject_id=sub.id, term=term, 
-                                          continuous_assessment=ca, exams=exam, total=total, grade=grade))
+        student_id_str = student_str.split(' - ')[0]
+        term = int(self.term_var.get())
+        
+        rows = []
+        for sub in self.subjects:
+            widgets = self.entries[sub.id]
+            # Guardrails: Default to 0 if empty/invalid
+            try:
+                ca = float(widgets['ca'].get() or 0)
+            except ValueError: ca = 0.0
             
-            self.session.commit()
-            messagebox.showinfo("Saved", f"Marks updated for {student.name}")
+            try:
+                exam = float(widgets['exam'].get() or 0)
+            except ValueError: exam = 0.0
             
-        except Exception as e:
-            self.session.rollback()
-            messagebox.showerror("Error", str(e))
+            total = ca + exam
+            grade = GradeCalculator.calculate_grade(total)
+            rows.append({'subject_id': sub.id, 'term': term,
+                         'continuous_assessment': ca, 'exams': exam, 'total': total, 'grade': grade})
+        
+        self.executor.submit(
+            lambda session: self.write_marks(session, student_id_str, rows),
+            on_done=lambda student: self.marks_saved(student, term, rows),
+            busy=self.set_busy, label="save_marks"
+        )
+
+    @staticmethod
+    def write_marks(session, student_id_str, rows):
+        # Runs on a DB worker. Returns the student's (id, name), or None if the student no longer exists.
+        student = session.query(Student.id, Student.name).filter_by(student_id=student_id_str).first()
+        if not student: return None
+        
+        # DB Update/Insert: one INSERT ... ON CONFLICT DO UPDATE for all subjects
+        rows = [dict(row, student_id=student.id) for row in rows]
+        bulk_upsert(session, Mark, rows, ['student_id', 'subject_id', 'term'])
+        TermSummaryCalculator.refresh_students(session, [student.id])
+        session.commit()
+        mark_statistics.marks_changed()
+        return student
+
+    def marks_saved(self, student, term, rows):
+        if not student:
+            messagebox.showwarning("Not Found", "That student no longer exists.")
+            return
+        messagebox.showinfo("Saved", f"Marks updated for {student.name}")
+        if self.on_marks_saved:
+            self.on_marks_saved(student.id, term, {row['subject_id']: row['total'] for row in rows})
+
+    def set_busy(self, busy):
+        self.save_btn.configure(state="disabled" if busy else "normal", text="Saving..." if busy else "Save Marks")
+
+
+class SubjectMarksEntry(ctk.CTkFrame):
+    """Spreadsheet-style entry of one subject's marks for a whole class and term.
+
+    Only rows whose CA or exam text differs from what was loaded are written, all in one
+    transaction. Enter / Down and Up move between rows in the same column; Tab moves across.
+    """
+    FIELDS = ('ca', 'exam')
+
+    def __init__(self, parent, executor=None, on_marks_saved=None):
+        super().__init__(parent)
+        self.executor = executor or InlineExecutor()
+        self.on_marks_saved = on_marks_saved
+        self.subject_ids = {} # {subject name: subject.id}
+        self.rows = [] # One dict per student: ids, vars, widgets and the loaded values
+        self.dirty = set() # Indexes into self.rows with unsaved changes
+        self.loaded = None # (class_name, subject_id, term) of the grid on screen
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self.setup_ui()
+        self.load_options()
+
+    def setup_ui(self):
+        ctrl = ctk.CTkFrame(self)
+        ctrl.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
+
+        ctk.CTkLabel(ctrl, text="Class:").pack(side="left", padx=5)
+        self.class_menu = ctk.CTkOptionMenu(ctrl, values=[""], width=110)
+        self.class_menu.pack(side="left", padx=5)
+
+        ctk.CTkLabel(ctrl, text="Subject:").pack(side="left", padx=5)
+        self.subject_menu = ctk.CTkOptionMenu(ctrl, values=[""], width=200)
+        self.subject_menu.pack(side="left", padx=5)
+
+        ctk.CTkLabel(ctrl, text="Term:").pack(side="left", padx=5)
+        self.term_menu = ctk.CTkOptionMenu(ctrl, values=TERM_OPTIONS, width=70)
+        self.term_menu.pack(side="left", padx=5)
+
+        self.load_btn = ctk.CTkButton(ctrl, text="Load", command=self.load_grid, width=80)
+        self.load_btn.pack(side="left", padx=10)
+        self.status_label = ctk.CTkLabel(ctrl, text="")
+        self.status_label.pack(side="left", padx=5)
+
+        self.grid_frame = ctk.CTkScrollableFrame(self, label_text="Class Results Entry")
+        self.grid_frame.grid(row=1, column=0, padx=10, pady=5, sticky="nsew")
+        self.grid_frame.grid_columnconfigure(1, weight=2)
+        for col, h in enumerate(["Student ID", "Name", "CA (40)", "Exam (60)", "Total", "Grade"]):
+            ctk.CTkLabel(self.grid_frame, text=h, font=("Roboto", 12, "bold")).grid(row=0, column=col, padx=5, pady=5)
+
+        self.save_btn = ctk.CTkButton(self, text="Save Changes", command=self.save_changes, state="disabled",
+                                      height=40, width=200, font=("Roboto", 14, "bold"))
+        self.save_btn.grid(row=2, column=0, pady=15)
+
+    def load_options(self):
+        self.executor.submit(
+            lambda session: (reference_data.class_names(session), reference_data.subjects(session)),
+            on_done=lambda options: self.show_options(*options), key="subject_marks_options"
+        )
+
+    def show_options(self, class_names, subjects):
+        self.subject_ids = {sub.subject_name: sub.id for sub in subjects}
+        for menu, values in ((self.class_menu, list(class_names)), (self.subject_menu, list(self.subject_ids))):
+            values = values or [""]
+            menu.configure(values=values)
+            if menu.get() not in values:
+                menu.set(values[0])
+
+    def load_grid(self):
+        class_name = self.class_menu.get()
+        subject_id = self.subject_ids.get(self.subject_menu.get())
+        term = int(self.term_menu.get())
+        if not class_name or subject_id is None:
+            messagebox.showwarning("Selection Error", "Please select a class and a subject.")
+            return
+        if self.dirty and not messagebox.askyesno("Unsaved Changes", f"Discard {len(self.dirty)} unsaved changes?"):
+            return
+
+        self.executor.submit(
+            lambda session: self.fetch_grid(session, class_name, subject_id, term),
+            on_done=lambda students: self.show_grid((class_name, subject_id, term), students),
+            key="subject_marks", busy=self.set_busy
+        )
+
+    @staticmethod
+    def fetch_grid(session, class_name, subject_id, term):
+        """Rows of (id, student_id, name, continuous_assessment, exams) for the class; scores are None without a mark."""
+        return session.query(
+            Student.id, Student.student_id, Student.name, Mark.continuous_assessment, Mark.exams
+        ).outerjoin(
+            Mark, and_(Mark.student_id == Student.id, Mark.subject_id == subject_id, Mark.term == term)
+        ).filter(Student.class_name == class_name).order_by(Student.name).all()
+
+    def show_grid(self, loaded, students):
+        for row in self.rows:
+            for widget in row['widgets']:
+                widget.destroy()
+        self.rows = []
+        self.dirty.clear()
+        self.loaded = loaded
+
+        for i, student in enumerate(students):
+            has_mark = student.continuous_assessment is not None
+            loaded = (student.continuous_assessment, student.exams) if has_mark else None
+            values = {'ca': f"{student.continuous_assessment:g}" if has_mark else "",
+                      'exam': f"{student.exams:g}" if has_mark else ""}
+            row = {'id': student.id, 'loaded': loaded, 'vars': {}, 'entries': {}}
+            id_lbl = ctk.CTkLabel(self.grid_frame, text=student.student_id)
+            name_lbl = ctk.CTkLabel(self.grid_frame, text=student.name, anchor="w")
+            row['total'] = ctk.CTkLabel(self.grid_frame, text="-")
+            row['grade'] = ctk.CTkLabel(self.grid_frame, text="-")
+            id_lbl.grid(row=i + 1, column=0, padx=5)
+            name_lbl.grid(row=i + 1, column=1, padx=5, sticky="ew")
+            row['total'].grid(row=i + 1, column=4)
+            row['grade'].grid(row=i + 1, column=5)
+
+            for col, field in enumerate(self.FIELDS):
+                var = tk.StringVar(value=values[field])
+                entry = ctk.CTkEntry(self.grid_frame, textvariable=var, width=70)
+                entry.grid(row=i + 1, column=2 + col, padx=2)
+                entry.bind("<Return>", lambda e, r=i, f=field: self.move_focus(r + 1, f))
+                entry.bind("<Down>", lambda e, r=i, f=field: self.move_focus(r + 1, f))
+                entry.bind("<Up>", lambda e, r=i, f=field: self.move_focus(r - 1, f))
+                var.trace_add('write', lambda *args, r=i: self.cell_changed(r))
+                row['vars'][field] = var
+                row['entries'][field] = entry
+
+            row['widgets'] = [id_lbl, name_lbl, row['total'], row['grade'], *row['entries'].values()]
+            self.rows.append(row)
+            self.recalc(i)
+        self.update_save_button()
+
+    def move_focus(self, index, field):
+        if 0 <= index < len(self.rows):
+            self.rows[index]['entries'][field].focus_set()
+        return "break"
+
+    def scores(self, index):
+        """(ca, exam) of a row as numbers, or None when both cells are empty.
+
+        Invalid text counts as 0, as in the student view.
+        """
+        texts = [self.rows[index]['vars'][field].get().strip() for field in self.FIELDS]
+        if not any(texts):
+            return None
+        values = []
+        for text in texts:
+            try:
+                values.append(float(text or 0))
+            except ValueError:
+                values.append(0.0)
+        return tuple(values)
+
+    def recalc(self, index):
+        row = self.rows[index]
+        scores = self.scores(index)
+        if scores is None:
+            row['total'].configure(text="-")
+            row['grade'].configure(text="-", text_color=["black", "white"])
+            return
+        total = sum(scores)
+        grade = GradeCalculator.calculate_grade(total)
+        row['total'].configure(text=f"{total:.1f}")
+        row['grade'].configure(text=grade, text_color="red" if grade=='F' else ("#00C853" if grade=='A' else ["black", "white"]))
+
+    def cell_changed(self, index):
+        self.recalc(index)
+        if self.scores(index) != self.rows[index]['loaded']:
+            self.dirty.add(index)
+        else:
+            self.dirty.discard(index)
+        self.update_save_button()
+
+    def update_save_button(self):
+        count = len(self.dirty)
+        self.save_btn.configure(state="normal" if count else "disabled",
+                                text=f"Save Changes ({count})" if count else "Save Changes")
+
+    def save_changes(self):
+        if not self.dirty or not self.loaded:
+            return
+        class_name, subject_id, term = self.loaded
+        rows = []
+        for index in sorted(self.dirty):
+            ca, exam = self.scores(index) or (0.0, 0.0) # Clearing a mark saves zeros, as in the student view
+            total = ca + exam
+            rows.append({'student_id': self.rows[index]['id'], 'subject_id': subject_id, 'term': term,
+                         'continuous_assessment': ca, 'exams': exam, 'total': total,
+                         'grade': GradeCalculator.calculate_grade(total)})
+
+        loaded = self.loaded
+        self.executor.submit(
+            lambda session: self.write_changes(session, rows),
+            on_done=lambda _: self.changes_saved(loaded, rows),
+            busy=self.set_busy, label="save_subject_marks"
+        )
+
+    @staticmethod
+    def write_changes(session, rows):
+        # Runs on a DB worker: every changed cell in one upsert and one transaction
+        bulk_upsert(session, Mark, rows, ['student_id', 'subject_id', 'term'])
+        TermSummaryCalculator.refresh_students(session, sorted({row['student_id'] for row in rows}))
+        session.commit()
+        mark_statistics.marks_changed()
+
+    def changes_saved(self, loaded, rows):
+        # Rows are matched by student, and only while the grid that was saved is still on screen
+        index_of = {row['id']: i for i, row in enumerate(self.rows)} if loaded == self.loaded else {}
+        for mark in rows:
+            index = index_of.get(mark['student_id'])
+            if index is not None:
+                # What was written becomes the new baseline; cells edited again since stay dirty
+                row = self.rows[index]
+                row['loaded'] = (mark['continuous_assessment'], mark['exams'])
+                if self.scores(index) is None:
+                    for var in row['vars'].values():
+                        var.set("0") # Show the zeros that were written for a cleared row
+                self.cell_changed(index)
+            if self.on_marks_saved:
+                self.on_marks_saved(mark['student_id'], mark['term'], {mark['subject_id']: mark['total']})
+        self.status_label.configure(text=f"Saved {len(rows)} marks.")
+
+    def set_busy(self, busy):
+        self.status_label.configure(text="Working..." if busy else "")
+        self.load_btn.configure(state="disabled" if busy else "normal") # A new grid mid-save would lose its baseline
+        if busy:
+            self.save_btn.configure(state="disabled")
+        else:
+            self.update_save_button()
 
 
 class BroadsheetTab(ctk.CTkFrame):
-    def __init__(self, parent, session):
+    CLASSES = ["JSS1", "JSS2", "JSS3", "SSS1", "SSS2", "SSS3"]
+
+    def __init__(self, parent, executor=None):
         super().__init__(parent)
-        self.session = session
+        self.executor = executor or InlineExecutor()
         self.broadsheet_data = None # Stores pivoted data for export
         self.students = []
         self.subjects = []
+        self.loaded_term = None
+        self.row_index = {} # {student.id: table row}, for patching single rows after mark saves
+        self.stats_visible = False
         
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
         
         self.setup_ui()
+        self.load_class_counts()
 
     def setup_ui(self):
         # --- Controls Frame ---
@@ -248,40 +556,68 @@ class BroadsheetTab(ctk.CTkFrame):
         # Class Filter
         ctk.CTkLabel(ctrl, text="Class:").pack(side="left", padx=5)
         
-        # Determine class options dynamically (assuming Student model is available)
-        class_values = [f"{cls} ({self.get_class_population(cls)})" for cls in ["JSS1", "JSS2", "JSS3", "SSS1", "SSS2", "SSS3"]]
-        if not self.session.query(Student).first():
-            class_values = ["JSS1 (0)"] # Default if DB is empty
-            
-        self.class_filter_raw = ctk.CTkComboBox(ctrl, values=class_values, width=150)
+        # Options show each class's population once load_class_counts returns
+        # Changing a filter reloads straight away; the executor drops superseded loads
+        self.class_filter_raw = ctk.CTkComboBox(ctrl, values=["JSS1 (0)"], width=150, command=lambda _: self.load_sheet())
         self.class_filter_raw.pack(side="left", padx=5)
         
         # Term Filter
         ctk.CTkLabel(ctrl, text="Term:").pack(side="left", padx=5)
-        self.term_filter = ctk.CTkOptionMenu(ctrl, values=["1", "2", "3"], width=70)
+        self.term_filter = ctk.CTkOptionMenu(ctrl, values=TERM_OPTIONS, width=70, command=lambda _: self.load_sheet())
         self.term_filter.pack(side="left", padx=5)
         
         # Load Button
         ctk.CTkButton(ctrl, text="Load Broadsheet", command=self.load_sheet).pack(side="left", padx=20)
+        self.stats_btn = ctk.CTkButton(ctrl, text="Show Statistics", command=self.toggle_statistics, width=120)
+        self.stats_btn.pack(side="left", padx=5)
+
+        self.status_label = ctk.CTkLabel(ctrl, text="")
+        self.status_label.pack(side="left", padx=5)
         
         # Export Button
         self.export_btn = ctk.CTkButton(ctrl, text="Export to CSV", command=self.export_to_csv, state="disabled")
         self.export_btn.pack(side="right", padx=10)
         
-        # --- Broadsheet Grid (Scrollable) ---
-        self.sheet_frame = ctk.CTkScrollableFrame(self, orientation="horizontal") 
-        self.sheet_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=5)
+        # --- Broadsheet Grid (virtualized: only visible cells are drawn) ---
+        self.sheet_table = VirtualTable(self, frozen_columns=2)
+        self.sheet_table.grid(row=1, column=0, sticky="nsew", padx=10, pady=5)
+
+        # --- Subject statistics panel (hidden until Show Statistics) ---
+        self.stats_panel = ctk.CTkFrame(self)
+        self.stats_panel.grid_columnconfigure(0, weight=1)
+        self.stats_panel.grid_rowconfigure(1, weight=1)
+        stats_ctrl = ctk.CTkFrame(self.stats_panel, fg_color="transparent")
+        stats_ctrl.grid(row=0, column=0, sticky="ew", padx=5, pady=5)
+        self.stats_scope = ctk.CTkSegmentedButton(stats_ctrl, values=["Class", "Year group"],
+                                                  command=lambda _: self.load_statistics())
+        self.stats_scope.set("Class")
+        self.stats_scope.pack(side="left", padx=5)
+        self.stats_label = ctk.CTkLabel(stats_ctrl, text="")
+        self.stats_label.pack(side="left", padx=10)
+        headers = mark_statistics.SUMMARY_HEADERS
+        self.stats_table = VirtualTable(self.stats_panel, frozen_columns=1)
+        self.stats_table.set_columns(headers, [80] + [62] * (len(headers) - 1))
+        self.stats_table.grid(row=1, column=0, sticky="nsew", padx=5, pady=(0, 5))
     
-    def get_class_population(self, class_name):
-        # Counts how many students are in a given class
-        entries = self.session.query(Student).filter_by(class_name=class_name).count()
-        return entries
+    def load_class_counts(self):
+        self.executor.submit(self.fetch_class_counts, on_done=self.show_class_counts, key="broadsheet_classes")
+
+    @staticmethod
+    def fetch_class_counts(session):
+        """{class_name: number of students} (cached reference data)"""
+        return reference_data.class_counts(session)
+
+    def show_class_counts(self, counts):
+        class_values = [f"{cls} ({counts.get(cls, 0)})" for cls in self.CLASSES]
+        if not counts:
+            class_values = ["JSS1 (0)"] # Default if DB is empty
+        self.class_filter_raw.configure(values=class_values)
+        self.class_filter_raw.set(class_values[0])
 
     def load_sheet(self):
         """Fetches and displays the broadsheet data for the selected class and term."""
         # Clear previous data
-        for widget in self.sheet_frame.winfo_children():
-            widget.destroy()
+        self.sheet_table.set_rows([])
             
         # Get filters
         class_name_full = self.class_filter_raw.get()
@@ -292,56 +628,115 @@ class BroadsheetTab(ctk.CTkFrame):
             messagebox.showwarning("Selection Error", "Please select a class.")
             return
 
-        # Data Fetch
-        self.students = self.session.query(Student).filter_by(class_name=class_name).order_by(Student.name).all()
-        self.subjects = self.session.query(Subject).all()
+        # Fetch on a DB worker; a newer load supersedes this one
+        self.executor.submit(
+            lambda session: self.fetch_sheet(session, class_name, term),
+            on_done=lambda data: self.show_sheet(class_name, term, *data),
+            key="broadsheet", busy=self.set_busy
+        )
+
+    @staticmethod
+    def fetch_sheet(session, class_name, term):
+        """Returns (students, subjects, {student.id: {subject.id: total}}) as plain rows."""
+        students = session.query(Student.id, Student.student_id, Student.name).filter_by(
+            class_name=class_name
+        ).order_by(Student.name).all()
+        subjects = reference_data.subjects(session)
+        if not students or not subjects:
+            return students, subjects, {}
+
+        # Fetch marks efficiently by joining Student (to filter by class)
+        marks = session.query(Mark.student_id, Mark.subject_id, Mark.total).join(
+            Student, Mark.student_id == Student.id
+        ).filter(Mark.term == term, Student.class_name == class_name)
+        
+        # Pivot Data (Map: student_id -> {subject_id -> total_score})
+        data_map = {s.id: {} for s in students}
+        for student_id, subject_id, total in marks:
+            if student_id in data_map:
+                data_map[student_id][subject_id] = total
+        return students, subjects, data_map
+
+    def show_sheet(self, class_name, term, students, subjects, data_map):
+        self.students = students
+        self.subjects = subjects
+        self.loaded_term = term
+        self.row_index = {student.id: i for i, student in enumerate(students)}
         
         if not self.students or not self.subjects:
             messagebox.showinfo("No Data", f"No students or subjects found for {class_name}.")
             self.export_btn.configure(state="disabled")
             return
 
-        # Fetch marks efficiently by joining Student (to filter by class)
-        # Assuming Mark has a relationship 'student'
-        marks = self.session.query(Mark).filter(
-            Mark.term == term, 
-            Mark.student.has(class_name=class_name)
-        ).all()
-        
-        # Pivot Data (Map: student_id -> {subject_id -> total_score})
-        data_map = {s.id: {} for s in self.students}
-        for m in marks:
-            if m.student_id in data_map:
-                data_map[m.student_id][m.subject_id] = m.total
-
         self.broadsheet_data = data_map # Store for export
         self.export_btn.configure(state="normal")
         
         # --- Render Grid ---
-        
-        # 0. Set up column configuration for better alignment
-        self.sheet_frame.grid_columnconfigure(0, weight=0) # ID
-        self.sheet_frame.grid_columnconfigure(1, weight=1) # Name
-        for i in range(2, len(self.subjects) + 2):
-             self.sheet_frame.grid_columnconfigure(i, weight=0) # Marks
-        
-        # Header Row
         headers = ["Student ID", "Name"] + [s.subject_code for s in self.subjects]
-        for c, h in enumerate(headers):
-            ctk.CTkLabel(self.sheet_frame, text=h, font=("Roboto", 12, "bold"), width=80).grid(row=0, column=c, padx=5, pady=5)
-            
-        # Student Rows
-        for r, student in enumerate(self.students, 1):
-            # ID
-            ctk.CTkLabel(self.sheet_frame, text=student.student_id).grid(row=r, column=0, padx=5)
-            # Name
-            ctk.CTkLabel(self.sheet_frame, text=student.name, anchor="w").grid(row=r, column=1, padx=5, sticky="w")
-            
-            # Marks
-            for c, sub in enumerate(self.subjects, 2):
-                score = data_map[student.id].get(sub.id, "-")
-                score_text = f"{score:.0f}" if isinstance(score, float) else score
-                ctk.CTkLabel(self.sheet_frame, text=score_text).grid(row=r, column=c, padx=5)
+        widths = [100, 200] + [70] * len(self.subjects)
+        anchors = ["center", "w"] + ["center"] * len(self.subjects)
+        self.sheet_table.set_columns(headers, widths, anchors)
+        self.sheet_table.set_rows([self.format_row(student) for student in self.students])
+        self.load_statistics()
+
+    def apply_marks(self, student_id, term, totals):
+        """Patches one student's row after their marks were saved ({subject.id: total}), without a reload.
+
+        Ignored unless the student is on the sheet currently shown for that term.
+        """
+        if term != self.loaded_term or student_id not in self.row_index or not self.broadsheet_data:
+            return
+        self.broadsheet_data[student_id].update(totals)
+        row = self.row_index[student_id]
+        self.sheet_table.update_row(row, self.format_row(self.students[row]))
+        self.load_statistics()
+
+    def toggle_statistics(self):
+        self.stats_visible = not self.stats_visible
+        if self.stats_visible:
+            self.stats_panel.grid(row=2, column=0, sticky="nsew", padx=10, pady=(0, 10))
+            self.grid_rowconfigure(2, weight=1)
+            self.load_statistics()
+        else:
+            self.stats_panel.grid_remove()
+            self.grid_rowconfigure(2, weight=0)
+        self.stats_btn.configure(text="Hide Statistics" if self.stats_visible else "Show Statistics")
+
+    def load_statistics(self):
+        # Only while the panel is open; the mark matrix is cached until marks change
+        if not self.stats_visible:
+            return
+        class_name = self.class_filter_raw.get().split(' ')[0]
+        if not class_name:
+            return
+        term = int(self.term_filter.get())
+        year = mark_statistics.year_group(class_name) if self.stats_scope.get() == "Year group" else None
+        self.executor.submit(
+            lambda session: self.fetch_statistics(session, class_name, term, year),
+            on_done=self.show_statistics, key="broadsheet_stats"
+        )
+
+    @staticmethod
+    def fetch_statistics(session, class_name, term, year=None):
+        """(caption, one display row per subject) for the class, or its whole year group"""
+        matrix, stats, _ = mark_statistics.statistics_for(session, term, class_name, year)
+        caption = f"{year or class_name}, term {term}: {len(matrix.students)} students, {int(stats['count'].sum())} marks"
+        return caption, mark_statistics.summary_rows(matrix.subjects, stats)
+
+    def show_statistics(self, result):
+        caption, rows = result
+        self.stats_label.configure(text=caption)
+        self.stats_table.set_rows(rows)
+
+    def set_busy(self, busy):
+        self.status_label.configure(text="Loading..." if busy else "")
+
+    def format_row(self, student):
+        # Display values for one broadsheet row: ID, name, then a score per subject
+        row = [student.student_id, student.name]
+        for sub in self.subjects:
+            row.append(format_score(self.broadsheet_data[student.id].get(sub.id, "-")))
+        return row
 
     def export_to_csv(self):
         """Exports the currently loaded broadsheet data to a CSV file."""
@@ -370,15 +765,7 @@ class BroadsheetTab(ctk.CTkFrame):
 
                 # Data Rows
                 for student in self.students:
-                    row_data = [student.student_id, student.name]
-                    
-                    # Marks
-                    for sub in self.subjects:
-                        score = self.broadsheet_data[student.id].get(sub.id, "-")
-                        score_text = f"{score:.0f}" if isinstance(score, float) else score
-                        row_data.append(score_text)
-                        
-                    writer.writerow(row_data)
+                    writer.writerow(self.format_row(student))
 
             messagebox.showinfo("Export Success", f"Broadsheet data saved to:\n{filename}")
             
@@ -387,13 +774,21 @@ class BroadsheetTab(ctk.CTkFrame):
 
 
 class AttendanceTab(ctk.CTkFrame):
-    def __init__(self, parent, session):
+    def __init__(self, parent, executor=None):
         super().__init__(parent)
-        self.session = session
+        self.executor = executor or InlineExecutor()
         self.current_class = None
         self.setup_ui()
-        self.attendance_widgets = {} # {student_id: {date_str: CheckboxVar, 'percentage': label}}
+        self.students = []
         self.loaded_dates = []
+        self.row_index = {} # {student.id: row in attendance_matrix}
+        # Class attendance as (student x date) bool matrices: current state, last saved state,
+        # and which cells already have a row in the database
+        self.attendance_matrix = np.zeros((0, 0), dtype=bool)
+        self.saved_matrix = np.zeros((0, 0), dtype=bool)
+        self.recorded = np.zeros((0, 0), dtype=bool)
+        self.percentage_labels = {} # {student.id: label}
+        self.load_class_names()
 
     def setup_ui(self):
         self.grid_columnconfigure(0, weight=1)
@@ -405,15 +800,12 @@ class AttendanceTab(ctk.CTkFrame):
 
         ctk.CTkLabel(ctrl_frame, text="Class:").pack(side="left", padx=5)
         
-        # Get class values dynamically
-        unique_classes = [result[0] for result in self.session.query(Student.class_name).distinct().all()]
-        class_values = unique_classes if unique_classes else ["JSS1"]
-        
-        self.class_filter = ctk.CTkComboBox(ctrl_frame, values=class_values, width=150)
+        # Filled with the classes that have students once load_class_names returns
+        self.class_filter = ctk.CTkComboBox(ctrl_frame, values=["JSS1"], width=150)
         self.class_filter.pack(side="left", padx=5)
 
-        load_btn = ctk.CTkButton(ctrl_frame, text="Load Class", command=self.load_class)
-        load_btn.pack(side="left", padx=10)
+        self.load_btn = ctk.CTkButton(ctrl_frame, text="Load Class", command=self.load_class)
+        self.load_btn.pack(side="left", padx=10)
         
         self.add_date_btn = ctk.CTkButton(ctrl_frame, text="Add New Date", command=self.add_new_attendance_column, state="disabled")
         self.add_date_btn.pack(side="left", padx=10)
@@ -424,23 +816,70 @@ class AttendanceTab(ctk.CTkFrame):
         self.export_btn = ctk.CTkButton(ctrl_frame, text="Export to CSV", command=self.export_to_csv, state="disabled")
         self.export_btn.pack(side="right", padx=10)
 
+        self.status_label = ctk.CTkLabel(ctrl_frame, text="")
+        self.status_label.pack(side="right", padx=5)
+
         # --- Scrollable Attendance Grid ---
         self.attendance_grid = ctk.CTkScrollableFrame(self, orientation="horizontal") 
         self.attendance_grid.grid(row=1, column=0, sticky="nsew", padx=10, pady=5)
+
+    def load_class_names(self):
+        self.executor.submit(self.fetch_class_names, on_done=self.show_class_names, key="attendance_classes")
+
+    @staticmethod
+    def fetch_class_names(session):
+        return list(reference_data.class_names(session))
+
+    def show_class_names(self, class_names):
+        class_values = class_names if class_names else ["JSS1"]
+        self.class_filter.configure(values=class_values)
+        self.class_filter.set(class_values[0])
+
+    @staticmethod
+    def _as_date(value):
+        # Attendance.date is a Date column; also accept ISO text from databases not yet upgraded
+        return value if isinstance(value, dt_date) else dt_date.fromisoformat(str(value)[:10])
         
     def load_class(self):
         class_name = self.class_filter.get().split(' ')[0]
         if not class_name: return
 
-        # Clear existing
-        for widget in self.attendance_grid.winfo_children():
-            widget.destroy()
-        self.attendance_widgets = {}
-        self.loaded_dates = []
+        self.executor.submit(
+            lambda session: self.fetch_class(session, class_name),
+            on_done=lambda data: self.show_class(class_name, *data),
+            key="attendance", busy=self.set_busy
+        )
+
+    @staticmethod
+    def fetch_class(session, class_name):
+        """Returns (students, dates, present matrix, recorded matrix) for the class from two queries."""
+        students = session.query(Student.id, Student.student_id, Student.name).filter_by(
+            class_name=class_name
+        ).order_by(Student.name).all()
+
+        # Fetch the whole class's attendance in one query
+        records = session.query(Attendance.student_id, Attendance.date, Attendance.is_present).join(
+            Student, Attendance.student_id == Student.id
+        ).filter(Student.class_name == class_name).all()
+
+        dates = sorted({AttendanceTab._as_date(r.date) for r in records})
+        row_index = {student.id: i for i, student in enumerate(students)}
+        col_index = {att_date: j for j, att_date in enumerate(dates)}
+
+        matrix = np.zeros((len(students), len(dates)), dtype=bool)
+        recorded = np.zeros_like(matrix)
+        for student_id, att_date, is_present in records:
+            i, j = row_index[student_id], col_index[AttendanceTab._as_date(att_date)]
+            matrix[i, j] = bool(is_present)
+            recorded[i, j] = True
+        return students, dates, matrix, recorded
+
+    def show_class(self, class_name, students, dates, matrix, recorded):
         self.current_class = class_name
-        
-        self.students = self.session.query(Student).filter_by(class_name=class_name).order_by(Student.name).all()
+        self.students = students
         if not self.students:
+            for widget in self.attendance_grid.winfo_children():
+                widget.destroy()
             messagebox.showinfo("Empty Class", f"No students found in {class_name}.")
             self.add_date_btn.configure(state="disabled")
             self.save_btn.configure(state="disabled")
@@ -451,18 +890,31 @@ class AttendanceTab(ctk.CTkFrame):
         self.save_btn.configure(state="normal")
         self.export_btn.configure(state="normal")
 
+        self.loaded_dates = dates
+        self.row_index = {student.id: i for i, student in enumerate(self.students)}
+        self.attendance_matrix = matrix
+        self.recorded = recorded
+        self.saved_matrix = self.attendance_matrix.copy()
+
+        self.render_grid()
+
+    def set_busy(self, busy):
+        self.status_label.configure(text="Working..." if busy else "")
+        # No edits to the loaded grid while it is being replaced or saved
+        self.load_btn.configure(state="disabled" if busy else "normal")
+        for button in (self.add_date_btn, self.save_btn):
+            button.configure(state="disabled" if busy or not self.students else "normal")
+
+    def render_grid(self):
+        # Clear existing
+        for widget in self.attendance_grid.winfo_children():
+            widget.destroy()
+        self.percentage_labels = {}
+
         # Initial Headers: Name, (Dates...), Percentage
-        headers = ["Student Name"]
         col = 0
-        ctk.CTkLabel(self.attendance_grid, text=headers[0], font=("Roboto", 12, "bold"), width=150).grid(row=0, column=col, padx=5, pady=5)
+        ctk.CTkLabel(self.attendance_grid, text="Student Name", font=("Roboto", 12, "bold"), width=150).grid(row=0, column=col, padx=5, pady=5)
         col += 1
-
-        # Fetch all unique attendance dates for this class
-        date_records = self.session.query(Attendance.date).filter(
-            Attendance.student.has(class_name=class_name)
-        ).distinct().order_by(Attendance.date).all()
-        
-        self.loaded_dates = [r[0] for r in date_records]
         
         # Load date headers
         for att_date in self.loaded_dates:
@@ -472,45 +924,30 @@ class AttendanceTab(ctk.CTkFrame):
         # Percentage Header
         ctk.CTkLabel(self.attendance_grid, text="Attendance %", font=("Roboto", 12, "bold"), width=100).grid(row=0, column=col, padx=5, pady=5)
         
-        # Load student rows and existing data
-        row = 1
-        for student in self.students:
-            self.attendance_widgets[student.id] = {'percentage': None, 'attendance': {}}
-            
-            # Name
+        # Student rows, read from the matrix
+        for i, student in enumerate(self.students):
+            row = i + 1
             ctk.CTkLabel(self.attendance_grid, text=student.name, anchor="w", width=150).grid(row=row, column=0, sticky="w", padx=5)
             
-            # Attendance data for each loaded date
-            col = 1
-            for att_date in self.loaded_dates:
-                self.add_attendance_checkbox(student, att_date, row, col)
-                col += 1
+            for j in range(len(self.loaded_dates)):
+                self.add_attendance_checkbox(student, i, j, row, j + 1)
             
             # Percentage Label
             percent_lbl = ctk.CTkLabel(self.attendance_grid, text="0.0%", width=100)
-            percent_lbl.grid(row=row, column=col, padx=5)
-            self.attendance_widgets[student.id]['percentage'] = percent_lbl
+            percent_lbl.grid(row=row, column=len(self.loaded_dates) + 1, padx=5)
+            self.percentage_labels[student.id] = percent_lbl
             
             self.calculate_percentage(student.id)
-            row += 1
 
-    def add_attendance_checkbox(self, student, att_date, row, col):
-        date_str = att_date.strftime("%Y-%m-%d")
+    def add_attendance_checkbox(self, student, i, j, row, col):
+        var = tk.IntVar(value=int(self.attendance_matrix[i, j]))
         
-        # Check if record exists for this student/date
-        record = self.session.query(Attendance).filter_by(student_id=student.id, date=att_date).first()
-        initial_value = 1 if (record and record.is_present) else 0
+        def toggle():
+            self.attendance_matrix[i, j] = bool(var.get())
+            self.calculate_percentage(student.id)
 
-        # Boolean Var for Checkbox
-        var = tk.IntVar(value=initial_value)
-        
-        # Checkbox
-        checkbox = ctk.CTkCheckBox(self.attendance_grid, text="", variable=var, 
-                                   command=lambda s_id=student.id: self.calculate_percentage(s_id))
+        checkbox = ctk.CTkCheckBox(self.attendance_grid, text="", variable=var, command=toggle)
         checkbox.grid(row=row, column=col, padx=2, pady=2)
-        
-        # Store widget reference
-        self.attendance_widgets[student.id]['attendance'][date_str] = var
 
     def add_new_attendance_column(self):
         if not self.current_class: return
@@ -519,72 +956,73 @@ class AttendanceTab(ctk.CTkFrame):
         new_date_str = ctk.CTkInputDialog(text="Enter Attendance Date (YYYY-MM-DD):", title="New Attendance Date").get_input()
         if not new_date_str: return
         
-        # try:
-        #     new_date = dt_date.fromisoformat(new_date_str)
-        # except ValueError:
-        #     messagebox.showerror("Invalid Date", "Please enter the date in YYYY-MM-DD format.")
-        #     # return
+        try:
+            new_date = dt_date.fromisoformat(new_date_str.strip())
+        except ValueError:
+            messagebox.showerror("Invalid Date", "Please enter the date in YYYY-MM-DD format.")
+            return
 
         if new_date in self.loaded_dates:
             messagebox.showwarning("Duplicate Date", "Attendance for this date is already loaded.")
             return
             
-        # 1. Update list of loaded dates
-        self.loaded_dates.append(new_date)
-        self.loaded_dates.sort()
+        # 1. Insert an empty column at the date's sorted position
+        j = int(np.searchsorted(np.array(self.loaded_dates, dtype="datetime64[D]"), np.datetime64(new_date)))
+        self.loaded_dates.insert(j, new_date)
+        self.attendance_matrix = np.insert(self.attendance_matrix, j, False, axis=1)
+        self.saved_matrix = np.insert(self.saved_matrix, j, False, axis=1)
+        self.recorded = np.insert(self.recorded, j, False, axis=1)
         
-        # 2. Re-render the grid to place the new column correctly
-        self.load_class() # Easiest way to re-render: clear and reload.
+        # 2. Re-render the grid from memory; nothing is re-queried
+        self.render_grid()
 
     def calculate_percentage(self, student_id):
-        widget_data = self.attendance_widgets.get(student_id)
-        if not widget_data: return
+        label = self.percentage_labels.get(student_id)
+        if label is None: return
         
-        total_days = len(self.loaded_dates)
-        if total_days == 0:
-            percentage = 0.0
-        else:
-            present_days = sum(var.get() for var in widget_data['attendance'].values())
-            percentage = (present_days / total_days) * 100
-        
-        widget_data['percentage'].configure(text=f"{percentage:.1f}%")
+        percentage = self.attendance_percentages()[self.row_index[student_id]]
+        label.configure(text=f"{percentage:.1f}%")
+
+    def attendance_percentages(self):
+        # Percentage present per student (row) over the loaded dates
+        if self.attendance_matrix.shape[1] == 0:
+            return np.zeros(len(self.students))
+        return self.attendance_matrix.mean(axis=1) * 100
 
     def save_attendance(self):
         if not self.students or not self.loaded_dates: return
         
-        try:
-            for student in self.students:
-                student_id = student.id
-                widget_data = self.attendance_widgets[student_id]['attendance']
-                
-                for date_str, var in widget_data.items():
-                    att_date = dt_date.fromisoformat(date_str)
-                    is_present = bool(var.get())
-                    
-                    # Check if record exists
-                    att_record = self.session.query(Attendance).filter_by(student_id=student_id, date=att_date).first()
-                    
-                    if att_record:
-                        # Update
-                        att_record.is_present = is_present
-                    else:
-                        # Insert
-                        new_record = Attendance(student_id=student_id, date=att_date, is_present=is_present)
-                        self.session.add(new_record)
-                        
-            self.session.commit()
-            messagebox.showinfo("Saved", f"Attendance for {len(self.loaded_dates)} days updated successfully.")
-            
-        except Exception as e:
-            self.session.rollback()
-            messagebox.showerror("Error", f"Failed to save attendance: {str(e)}")
+        # Only cells that changed, plus cells of new dates that have no row yet
+        dirty = (self.attendance_matrix != self.saved_matrix) | ~self.recorded
+        rows = [
+            {'student_id': self.students[i].id,
+             'date': self.loaded_dates[j],
+             'is_present': bool(self.attendance_matrix[i, j])}
+            for i, j in zip(*np.nonzero(dirty))
+        ]
+        saved = self.attendance_matrix.copy()
+
+        def write(session):
+            bulk_upsert(session, Attendance, rows, ['student_id', 'date'])
+            AttendanceBitmaps.refresh_students(session, {r['student_id'] for r in rows}, {r['date'] for r in rows})
+            session.commit()
+
+        def done(_):
+            self.saved_matrix = saved
+            self.recorded[:] = True
+            messagebox.showinfo("Saved", f"Attendance for {len(self.loaded_dates)} days updated successfully ({len(rows)} changes).")
+
+        self.executor.submit(
+            write, on_done=done, busy=self.set_busy, label="save_attendance",
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to save attendance: {str(e)}")
+        )
             
     def export_to_csv(self):
         if not self.students or not self.loaded_dates:
             messagebox.showwarning("No Data", "Load a class before exporting.")
             return
             
-        filename = tk.filedialog.asksaveasfilename(
+        filename = filedialog.asksaveasfilename(
             defaultextension=".csv",
             filetypes=[("CSV files", "*.csv")],
             initialfile=f"Attendance_{self.current_class}_{dt_date.today()}.csv"
@@ -593,6 +1031,7 @@ class AttendanceTab(ctk.CTkFrame):
         if not filename: return
 
         try:
+            percentages = self.attendance_percentages()
             with open(filename, mode='w', newline='', encoding='utf-8') as file:
                 writer = csv.writer(file)
                 
@@ -601,20 +1040,14 @@ class AttendanceTab(ctk.CTkFrame):
                 writer.writerow(header)
 
                 # Data Rows
-                for student in self.students:
-                    widget_data = self.attendance_widgets[student.id]
+                for i, student in enumerate(self.students):
                     row_data = [student.student_id, student.name]
                     
                     # Attendance status
-                    for att_date in self.loaded_dates:
-                        date_str = att_date.strftime("%Y-%m-%d")
-                        # Use the checkmark var value (1 for present, 0 for absent) or fetch from DB if not loaded
-                        present = widget_data['attendance'].get(date_str, tk.IntVar(value=0)).get()
-                        row_data.append("P" if present == 1 else "A")
+                    row_data.extend("P" if present else "A" for present in self.attendance_matrix[i])
                         
                     # Percentage
-                    percent_text = widget_data['percentage'].cget("text")
-                    row_data.append(percent_text)
+                    row_data.append(f"{percentages[i]:.1f}%")
                     
                     writer.writerow(row_data)
 
@@ -627,7 +1060,6 @@ class SchoolManagementApp:
     def __init__(self, root):
         self.root = root
         self.root.title("School Management System")
-        self.session = Session()
         
         self.setup_tabs()
         
@@ -641,11 +1073,12 @@ class SchoolManagementApp:
         self.tabview.add("Attendance")
         
         # Initialize Tabs
-        self.marks_tab = MarksEntryTab(self.tabview.tab("Marks Entry"), self.session)
-        self.student_tab = StudentRegistrationTab(self.tabview.tab("Student Registration"), self.session, 
+        self.marks_tab = MarksEntryTab(self.tabview.tab("Marks Entry"),
+                                       on_marks_saved=lambda *change: self.sheet_tab.apply_marks(*change))
+        self.student_tab = StudentRegistrationTab(self.tabview.tab("Student Registration"),
                                                   on_student_added_callback=self.refresh_marks_tab)
-        self.sheet_tab = BroadsheetTab(self.tabview.tab("Broadsheet"), self.session)
-        self.attendance_tab = AttendanceTab(self.tabview.tab("Attendance"), self.session)
+        self.sheet_tab = BroadsheetTab(self.tabview.tab("Broadsheet"))
+        self.attendance_tab = AttendanceTab(self.tabview.tab("Attendance"))
 
         # Layout Tabs
         self.student_tab.pack(fill="both", expand=True)
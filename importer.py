@@ -0,0 +1,297 @@
+"""Bulk import of students, marks, fees and attendance from CSV files.
+
+Usage:
+    python importer.py students students.csv
+    python importer.py marks marks.csv --batch-size 1000 --rejects marks_rejects.csv
+    python importer.py attendance attendance.csv --resume
+
+Expected columns (header row required):
+    students:   student_id, name, class_name
+    marks:      student_id, subject_code, term, ca, exam
+    fees:       student_id, term, amount_due, amount_paid
+    attendance: student_id, date (YYYY-MM-DD), present (1/0, P/A, yes/no, true/false)
+
+The file is read as a stream and handled in batches: each batch is validated, then
+upserted and committed as one transaction, so re-importing a file updates rows
+instead of duplicating them. Rows that fail validation are written to the rejects
+file with the reason. After every committed batch the position is saved to
+<file>.import-state.json; --resume skips the rows already committed by an
+interrupted run of the same (unchanged) file.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import date as dt_date
+from itertools import islice
+
+import numpy as np
+from calculations import GradeCalculator, TermSummaryCalculator
+from attendance_store import AttendanceBitmaps
+from models import Session, Student, Subject, Mark, Fee, Attendance, bulk_upsert
+
+PRESENT_VALUES = {'1': True, 'p': True, 'present': True, 'yes': True, 'y': True, 'true': True,
+                  '0': False, 'a': False, 'absent': False, 'no': False, 'n': False, 'false': False}
+
+
+class RowError(ValueError):
+    pass
+
+
+def _text(row, column, max_length):
+    value = (row.get(column) or '').strip()
+    if not value:
+        raise RowError(f"missing {column}")
+    if len(value) > max_length:
+        raise RowError(f"{column} longer than {max_length} characters")
+    return value
+
+
+def _number(row, column, low=0, high=None):
+    try:
+        value = float((row.get(column) or '').strip() or 0)
+    except ValueError:
+        raise RowError(f"{column} is not a number")
+    if value < low or (high is not None and value > high):
+        raise RowError(f"{column} must be between {low} and {high}" if high is not None else f"{column} must be >= {low}")
+    return value
+
+
+def _term(row):
+    try:
+        term = int((row.get('term') or '').strip())
+    except ValueError:
+        raise RowError("term is not a number")
+    if term not in GradeCalculator.TERMS:
+        raise RowError(f"term must be one of {', '.join(map(str, GradeCalculator.TERMS))}")
+    return term
+
+
+def _student_ids(session, batch):
+    # One query per batch: student_id string -> students.id
+    codes = {(row.get('student_id') or '').strip() for _, row in batch}
+    found = session.query(Student.student_id, Student.id).filter(Student.student_id.in_(codes)).all()
+    return dict(found)
+
+
+def _student(row, student_ids):
+    code = _text(row, 'student_id', 20)
+    if code not in student_ids:
+        raise RowError(f"unknown student {code}")
+    return student_ids[code]
+
+
+# --- Validators: (session, [(line, row)], context) -> (valid rows, [(line, row, reason)]) ---
+# `context` persists across the batches of one import (e.g. the subject lookup).
+
+def validate_students(session, batch, context):
+    rejects, seen = [], {}
+    for line, row in batch:
+        try:
+            record = {'student_id': _text(row, 'student_id', 20),
+                      'name': _text(row, 'name', 100),
+                      'class_name': _text(row, 'class_name', 10)}
+        except RowError as e:
+            rejects.append((line, row, str(e)))
+            continue
+        seen[record['student_id']] = record # Last row wins within a batch, as it would across batches
+    return list(seen.values()), rejects
+
+
+def validate_marks(session, batch, context):
+    if 'subjects' not in context:
+        context['subjects'] = dict(session.query(Subject.subject_code, Subject.id).all())
+    subjects = context['subjects']
+    student_ids = _student_ids(session, batch)
+
+    records, rejects = {}, []
+    for line, row in batch:
+        try:
+            student_id = _student(row, student_ids)
+            code = _text(row, 'subject_code', 10)
+            if code not in subjects:
+                raise RowError(f"unknown subject {code}")
+            ca = _number(row, 'ca', 0, 40)
+            exam = _number(row, 'exam', 0, 60)
+            term = _term(row)
+        except RowError as e:
+            rejects.append((line, row, str(e)))
+            continue
+        records[(student_id, subjects[code], term)] = {
+            'student_id': student_id, 'subject_id': subjects[code], 'term': term,
+            'continuous_assessment': ca, 'exams': exam, 'total': ca + exam,
+        }
+
+    valid = list(records.values())
+    # Grade the whole batch at once
+    grades = GradeCalculator.calculate_grades(np.array([r['total'] for r in valid], dtype=float))
+    for record, grade in zip(valid, grades):
+        record['grade'] = str(grade)
+    return valid, rejects
+
+
+def validate_fees(session, batch, context):
+    student_ids = _student_ids(session, batch)
+    records, rejects = {}, []
+    for line, row in batch:
+        try:
+            record = {'student_id': _student(row, student_ids), 'term': _term(row),
+                      'amount_due': _number(row, 'amount_due'), 'amount_paid': _number(row, 'amount_paid')}
+        except RowError as e:
+            rejects.append((line, row, str(e)))
+            continue
+        records[(record['student_id'], record['term'])] = record
+    return list(records.values()), rejects
+
+
+def validate_attendance(session, batch, context):
+    student_ids = _student_ids(session, batch)
+    records, rejects = {}, []
+    for line, row in batch:
+        try:
+            student_id = _student(row, student_ids)
+            try:
+                att_date = dt_date.fromisoformat(_text(row, 'date', 10))
+            except ValueError:
+                raise RowError("date must be YYYY-MM-DD")
+            present = PRESENT_VALUES.get((row.get('present') or '').strip().lower())
+            if present is None:
+                raise RowError("present must be 1/0, P/A, yes/no or true/false")
+        except RowError as e:
+            rejects.append((line, row, str(e)))
+            continue
+        records[(student_id, att_date)] = {'student_id': student_id, 'date': att_date, 'is_present': present}
+    return list(records.values()), rejects
+
+
+# --- Writers: upsert one validated batch inside the caller's transaction ---
+
+def write_students(session, rows):
+    bulk_upsert(session, Student, rows, ['student_id'])
+
+
+def write_marks(session, rows):
+    bulk_upsert(session, Mark, rows, ['student_id', 'subject_id', 'term'])
+    TermSummaryCalculator.refresh_students(session, {r['student_id'] for r in rows})
+
+
+def write_fees(session, rows):
+    bulk_upsert(session, Fee, rows, ['student_id', 'term'])
+
+
+def write_attendance(session, rows):
+    bulk_upsert(session, Attendance, rows, ['student_id', 'date'])
+    AttendanceBitmaps.refresh_students(session, {r['student_id'] for r in rows}, {r['date'] for r in rows})
+
+
+IMPORTERS = {
+    'students': (validate_students, write_students),
+    'marks': (validate_marks, write_marks),
+    'fees': (validate_fees, write_fees),
+    'attendance': (validate_attendance, write_attendance),
+}
+
+
+# --- Checkpointing ---
+
+def _state_path(path):
+    return path + '.import-state.json'
+
+
+def _fingerprint(kind, path):
+    stat = os.stat(path)
+    return {'kind': kind, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def _load_checkpoint(kind, path):
+    try:
+        with open(_state_path(path), encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return 0, 0
+    if state.get('fingerprint') != _fingerprint(kind, path):
+        return 0, 0 # File changed since the interrupted run; start over (upserts make this safe)
+    return state.get('rows_done', 0), state.get('rejected', 0)
+
+
+def _save_checkpoint(kind, path, rows_done, rejected):
+    tmp = _state_path(path) + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'fingerprint': _fingerprint(kind, path), 'rows_done': rows_done, 'rejected': rejected}, f)
+    os.replace(tmp, _state_path(path))
+
+
+def run_import(kind, path, batch_size=500, rejects_path=None, resume=False, progress=print):
+    """Imports one CSV file. Returns (rows imported, rows rejected) for this run."""
+    validate, write = IMPORTERS[kind]
+    rows_done, earlier_rejects = _load_checkpoint(kind, path) if resume else (0, 0)
+    rejects_path = rejects_path or path + '.rejects.csv'
+
+    session = Session()
+    imported = rejected = 0
+    context = {}
+    start = time.perf_counter()
+    try:
+        with open(path, newline='', encoding='utf-8-sig') as source, \
+                open(rejects_path, 'a' if rows_done else 'w', newline='', encoding='utf-8') as rejects_file:
+            reader = csv.DictReader(source)
+            rejects_writer = csv.writer(rejects_file)
+            if not rows_done:
+                rejects_writer.writerow(['line', 'reason'] + (reader.fieldnames or []))
+
+            rows = ((reader.line_num, row) for row in reader)
+            if rows_done:
+                progress(f"Resuming {path} after {rows_done} rows")
+                for _ in islice(rows, rows_done):
+                    pass
+
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+
+                valid, rejects = validate(session, batch, context)
+                try:
+                    write(session, valid)
+                    session.commit()
+                except Exception:
+                    session.rollback()
+                    raise
+
+                rows_done += len(batch)
+                imported += len(valid)
+                rejected += len(rejects)
+                for line, row, reason in rejects:
+                    rejects_writer.writerow([line, reason] + [row.get(name, '') for name in reader.fieldnames])
+                rejects_file.flush()
+                _save_checkpoint(kind, path, rows_done, earlier_rejects + rejected)
+
+                rate = rows_done / max(time.perf_counter() - start, 1e-9)
+                progress(f"{kind}: {rows_done} rows read, {imported} imported, {rejected} rejected ({rate:,.0f} rows/s)")
+    finally:
+        session.close()
+
+    if os.path.exists(_state_path(path)): # Only written once a batch commits
+        os.remove(_state_path(path))
+    if not (earlier_rejects + rejected) and os.path.exists(rejects_path):
+        os.remove(rejects_path)
+    return imported, rejected
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import CSV data into the school database")
+    parser.add_argument("kind", choices=sorted(IMPORTERS), help="what the file contains")
+    parser.add_argument("path", help="CSV file with a header row")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows validated and committed per transaction")
+    parser.add_argument("--rejects", help="where rejected rows are written (default: <file>.rejects.csv)")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted import of the same file")
+    args = parser.parse_args()
+
+    from main import prepare_database
+    prepare_database() # Creates or upgrades the schema when this runs before the app ever has
+
+    imported, rejected = run_import(args.kind, args.path, args.batch_size, args.rejects, args.resume)
+    print(f"Done: {imported} imported, {rejected} rejected.")
+    sys.exit(1 if rejected else 0)
@@ -0,0 +1,182 @@
+"""SQL instrumentation: queries per UI action, time spent in SQL, slow statements and N+1 hints.
+Also StartupTimer, for the startup timing report.
+
+Every statement run through an instrumented engine is counted against the action that is
+current on its thread:
+
+    with monitor.action("student_details"):
+        ...queries...
+
+QueryExecutor jobs are actions automatically (named after their key or label). When one
+statement shape runs REPEAT_THRESHOLD or more times inside a single action, the action is
+flagged as a likely N+1 pattern (a query per row instead of one query for all rows).
+
+Environment variables:
+    SCHOOL_SQL_LOG      path of a JSON-lines file; one object is appended per finished action
+    SCHOOL_SQL_SLOW_MS  statements slower than this are reported (default 50)
+    SCHOOL_STARTUP_LOG  path of a JSON-lines file; one startup report is appended per launch
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+REPEAT_THRESHOLD = 5
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAM_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUE_ROWS = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+
+
+def statement_shape(statement):
+    """The statement with literals and parameter lists collapsed, so `IN (?, ?, ?)` and `IN (?)` match."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _LITERALS.sub("?", shape)
+    shape = _PARAM_LISTS.sub("(?)", shape)
+    return _VALUE_ROWS.sub(r"\1", shape)
+
+
+class ActionStats:
+    """Statements recorded while one action was running."""
+
+    def __init__(self, name):
+        self.name = name
+        self.thread = threading.current_thread().name
+        self.started = time.time()
+        self.duration = 0.0
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.shapes = Counter()
+        self.slow = [] # [(seconds, statement)]
+
+    def record(self, statement, seconds, slow_seconds):
+        self.queries += 1
+        self.sql_seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+        if seconds >= slow_seconds:
+            self.slow.append((seconds, _WHITESPACE.sub(" ", statement).strip()))
+
+    def repeated(self, threshold=REPEAT_THRESHOLD):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def to_dict(self):
+        return {
+            "action": self.name,
+            "thread": self.thread,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "duration_ms": round(self.duration * 1000, 2),
+            "queries": self.queries,
+            "sql_ms": round(self.sql_seconds * 1000, 2),
+            "slow": [{"ms": round(s * 1000, 2), "sql": sql} for s, sql in self.slow],
+            "repeated": [{"count": count, "sql": shape} for shape, count in self.repeated()],
+        }
+
+
+class SqlMonitor:
+    """Collects ActionStats from the engines it is installed on.
+
+    The newest `history` finished actions are kept for the debug panel. Statements run outside
+    any action are only added to the `unattributed` totals.
+    """
+
+    def __init__(self, slow_ms=None, log_path=None, history=200):
+        self.slow_seconds = float(slow_ms if slow_ms is not None else os.environ.get("SCHOOL_SQL_SLOW_MS", 50)) / 1000
+        self.log_path = log_path if log_path is not None else os.environ.get("SCHOOL_SQL_LOG")
+        self.history = deque(maxlen=history)
+        self.unattributed_queries = 0
+        self.unattributed_seconds = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def install(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        return engine
+
+    @contextmanager
+    def action(self, name):
+        """Attributes the statements run on this thread to `name` until the block ends. Nested actions fold into the outer one."""
+        if getattr(self._local, "current", None) is not None:
+            yield self._local.current
+            return
+
+        stats = self._local.current = ActionStats(name)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.duration = time.perf_counter() - start
+            self._local.current = None
+            self._finish(stats)
+
+    def recent(self):
+        """Finished actions, newest first."""
+        with self._lock:
+            return list(reversed(self.history))
+
+    def clear(self):
+        with self._lock:
+            self.history.clear()
+            self.unattributed_queries = 0
+            self.unattributed_seconds = 0.0
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - getattr(self._local, "started", time.perf_counter())
+        stats = getattr(self._local, "current", None)
+        if stats is not None:
+            stats.record(statement, seconds, self.slow_seconds)
+        else:
+            with self._lock:
+                self.unattributed_queries += 1
+                self.unattributed_seconds += seconds
+
+    def _finish(self, stats):
+        with self._lock:
+            self.history.append(stats)
+        if self.log_path:
+            line = json.dumps(stats.to_dict())
+            with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class StartupTimer:
+    """Named checkpoints measured from `started` (a time.perf_counter() value)."""
+
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.checkpoints = [] # [(name, seconds since started)]
+
+    def mark(self, name):
+        self.checkpoints.append((name, time.perf_counter() - self.started))
+
+    def report(self):
+        lines, previous = ["Startup timing:"], 0.0
+        for name, seconds in self.checkpoints:
+            lines.append(f"    {name:<22} {seconds * 1000:8.1f} ms  (+{(seconds - previous) * 1000:.1f})")
+            previous = seconds
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "checkpoints_ms": {name: round(seconds * 1000, 1) for name, seconds in self.checkpoints},
+        }
+
+    def write_log(self, path=None):
+        path = path or os.environ.get("SCHOOL_STARTUP_LOG")
+        if path:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(self.to_dict()) + "\n")
+
+
+# Shared by the application engine (installed in models.py) and the DB workers
+monitor = SqlMonitor()
@@ -1,45 +1,133 @@
-import tkinter as tk
-from enterprise_forms import EnterpriseSchoolManagementApp
-from models import Session, Subject, Attendance
+import time
+STARTED = time.perf_counter() # The startup report measures from here, before the heavier imports
+
+import argparse
+from instrumentation import StartupTimer
+# Only models is imported up front: the rest is needed by upgrades, which an up-to-date database skips
+from models import (DEFAULT_SUBJECTS, SCHEMA_VERSION, Base, Session, Subject, Mark, TermSummary, Attendance,
+                    AttendanceBitmap, SchoolDay, engine, ensure_indexes, get_schema_version, merge_duplicate_marks,
+                    normalize_attendance_dates, set_schema_version)
 
 def initialize_subjects():
     """Pre-populate the 20 subjects"""
+    import reference_data
     session = Session()
-    
+
     if session.query(Subject).count() == 0:
-        subjects_data = [
-            ("MATH", "Mathematics"), ("ENG", "English"), ("PHY", "Physics"),
-            ("CHEM", "Chemistry"), ("BIO", "Biology"), ("HIST", "History"),
-            ("GEO", "Geography"), ("COMM", "Commerce"), ("ACC", "Accounts"),
-            ("AGRIC", "Agricultural Science"), ("LIT", "Literature"),
-            ("FRENCH", "French"), ("ARABIC", "Arabic"), ("IRS", "Islamic Studies"),
-            ("CRK", "Christian Knowledge"), ("CIVIC", "Civic Education"),
-            ("COMP", "Computer Science"), ("FOOD", "Food & Nutrition"),
-            ("ART", "Fine Arts"), ("MUSIC", "Music")
-        ]
-        
-        for code, name in subjects_data:
+        for code, name in DEFAULT_SUBJECTS:
             subject = Subject(subject_code=code, subject_name=name)
             session.add(subject)
-        
+
         session.commit()
+        reference_data.subjects_changed()
         print("20 subjects initialized successfully!")
     session.close()
 
-if __name__ == "__main__":
-    # Initialize database with subjects
+def upgrade_marks_table():
+    """Merges duplicate marks left by older versions and enforces one mark per student/subject/term"""
+    session = Session()
+    try:
+        removed = merge_duplicate_marks(session)
+        if removed:
+            print(f"Merged {removed} duplicate mark rows.")
+        return removed
+    finally:
+        session.close()
+
+def initialize_term_summaries(force=False):
+    """Builds the term_summary table from marks (always when force, else only if it is empty)"""
+    from calculations import TermSummaryCalculator
+    session = Session()
+    try:
+        if force or (session.query(TermSummary).first() is None and session.query(Mark).first() is not None):
+            count = TermSummaryCalculator.rebuild(session)
+            session.commit()
+            print(f"Term summaries rebuilt ({count} rows).")
+    finally:
+        session.close()
+
+def upgrade_attendance():
+    """Converts free-text attendance dates to YYYY-MM-DD and rebuilds the school calendar and attendance bitmaps
+    from the configured term starts (older versions guessed terms from gaps between dates)"""
+    from attendance_store import AttendanceBitmaps, AttendanceCalendarError
+    session = Session()
+    try:
+        rewritten, rejected = normalize_attendance_dates(session)
+        if rewritten:
+            print(f"Normalized {rewritten} attendance date formats.")
+        if rejected:
+            print(f"Moved {rejected} attendance rows with unreadable dates to the attendance_rejects table.")
+        if session.query(Attendance).first() is None:
+            return
+        try:
+            days, bitmaps = AttendanceBitmaps.rebuild(session)
+            print(f"Attendance bitmaps built ({days} school days, {bitmaps} rows).")
+        except AttendanceCalendarError as e:
+            session.rollback()
+            session.query(AttendanceBitmap).delete(synchronize_session=False)
+            session.query(SchoolDay).delete(synchronize_session=False)
+            print(f"Attendance reports are unavailable. {e}")
+        session.commit()
+    finally:
+        session.close()
+
+def prepare_database():
+    """Creates or upgrades the schema and seed data, unless the database is already at SCHEMA_VERSION.
+
+    On an up-to-date database this costs one PRAGMA on SQLite, or reading the schema_version row
+    elsewhere. Returns True if an upgrade ran.
+    """
+    if get_schema_version(engine) == SCHEMA_VERSION:
+        return False
+    from student_search import ensure_search_index
+    Base.metadata.create_all(engine)
+    ensure_indexes(engine)
+    ensure_search_index(engine)
     initialize_subjects()
-    
+    merged = upgrade_marks_table()
+    initialize_term_summaries(force=bool(merged))
+    upgrade_attendance()
+    set_schema_version(engine)
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="School Management System")
+    parser.add_argument("--rebuild-summaries", action="store_true",
+                        help="rebuild the term_summary table from marks and exit")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long each startup step took once the window is shown")
+    args = parser.parse_args()
+    timer = StartupTimer(STARTED)
+    timer.mark("imports")
+
+    prepare_database()
+    timer.mark("database ready")
+
+    if args.rebuild_summaries:
+        initialize_term_summaries(force=True)
+        raise SystemExit
+
     # Start the application
     import customtkinter as ctk
-    
+    from enterprise_forms import EnterpriseSchoolManagementApp
+    timer.mark("ui imports")
+
     # Set theme
     ctk.set_appearance_mode("System")  # Modes: "System" (standard), "Dark", "Light"
     ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
-    
+
     root = ctk.CTk()
     # Set initial window size
     root.geometry("1100x800")
-    
+
     app = EnterpriseSchoolManagementApp(root)
-    root.mainloop()
\ No newline at end of file
+    timer.mark("first tab built")
+
+    def first_window():
+        timer.mark("first window")
+        timer.write_log()
+        if args.startup_report:
+            print(timer.report())
+
+    root.after_idle(first_window)
+    root.mainloop()
@@ -0,0 +1,163 @@
+"""Per-subject mark statistics for a class or a whole year group, computed with NumPy.
+
+The marks of a class (or year group) and term are pivoted into a dense students x subjects
+matrix of totals, with NaN where a student has no mark. Every statistic is then one
+vectorised pass over the matrix columns: count, mean, median, standard deviation, min, max,
+pass rate, percentiles, grade distribution, and each student's z-score per subject.
+
+Matrices are cached per (scope, term) until marks are saved in this process
+(`marks_changed`) or the cache TTL expires (which picks up imports from elsewhere).
+
+    python mark_statistics.py --term 1 --class JSS1
+    python mark_statistics.py --term 1 --year-group JSS1
+"""
+import argparse
+import re
+import warnings
+from collections import namedtuple
+
+import numpy as np
+from models import Student, Mark, session_scope
+from calculations import GradeCalculator
+import reference_data
+from reference_data import ReferenceCache
+
+PERCENTILES = (10, 25, 75, 90)
+
+# Year group of a class: its leading letters and number, so JSS1A, JSS1-2 and JSS1 are all JSS1
+_YEAR_GROUP = re.compile(r"[A-Za-z]+\s*\d+")
+
+MarkMatrix = namedtuple('MarkMatrix', 'students subjects totals')
+"""students: (id, student_id, name, class_name) rows; subjects: (id, subject_code, subject_name) rows;
+totals: read-only float array (students x subjects), NaN where there is no mark."""
+
+matrix_cache = ReferenceCache(ttl=reference_data.cache.ttl, max_entries=16)
+
+
+def year_group(class_name):
+    match = _YEAR_GROUP.match(class_name)
+    return match.group(0).replace(" ", "") if match else class_name
+
+
+def marks_changed():
+    """Call after marks are committed"""
+    matrix_cache.invalidate()
+
+
+def load_matrix(session, term, class_name=None, year=None):
+    """The (cached) MarkMatrix for one class, or for every class in a year group"""
+    return matrix_cache.get(('year', year, term) if year else ('class', class_name, term),
+                            lambda: _build_matrix(session, term, class_name, year))
+
+
+def _build_matrix(session, term, class_name=None, year=None):
+    # For a year group, LIKE narrows to its classes; the exact check keeps JSS10 out of JSS1
+    scope = Student.class_name.like(f"{year}%") if year else Student.class_name == class_name
+    students = [s for s in session.query(Student.id, Student.student_id, Student.name, Student.class_name).filter(
+        scope
+    ).order_by(Student.class_name, Student.name) if not year or year_group(s.class_name) == year]
+    subjects = reference_data.subjects(session)
+    totals = np.full((len(students), len(subjects)), np.nan)
+
+    if students and subjects:
+        marks = session.query(Mark.student_id, Mark.subject_id, Mark.total).join(
+            Student, Mark.student_id == Student.id
+        ).filter(Mark.term == term, scope).all()
+        if marks:
+            row_of = {s.id: i for i, s in enumerate(students)}
+            column_of = {sub.id: j for j, sub in enumerate(subjects)}
+            kept = [m for m in marks if m.student_id in row_of and m.subject_id in column_of and m.total is not None]
+            rows = np.fromiter((row_of[m.student_id] for m in kept), dtype=np.intp, count=len(kept))
+            columns = np.fromiter((column_of[m.subject_id] for m in kept), dtype=np.intp, count=len(kept))
+            totals[rows, columns] = np.fromiter((m.total for m in kept), dtype=float, count=len(kept))
+
+    totals.flags.writeable = False # Shared through the cache
+    return MarkMatrix(tuple(students), tuple(subjects), totals)
+
+
+def subject_statistics(totals):
+    """Column statistics of a students x subjects matrix (NaN = no mark), as arrays with one value per subject.
+
+    Keys: count, mean, median, std, min, max, pass_rate (percent not graded F), percentiles
+    ({p: array}) and grades ({grade: counts}). Values are NaN for subjects without marks.
+    """
+    present = ~np.isnan(totals)
+    count = present.sum(axis=0)
+    has_marks = count > 0
+    safe_count = np.maximum(count, 1)
+
+    filled = np.where(present, totals, 0.0)
+    mean = np.where(has_marks, filled.sum(axis=0) / safe_count, np.nan)
+    deviations = np.where(present, totals - mean, 0.0)
+    std = np.where(has_marks, np.sqrt((deviations ** 2).sum(axis=0) / safe_count), np.nan)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning) # All-NaN columns give NaN, which is what we want
+        median = np.nanmedian(totals, axis=0) if totals.size else np.full(totals.shape[1], np.nan)
+        percentiles = np.nanpercentile(totals, PERCENTILES, axis=0) if totals.size else \
+            np.full((len(PERCENTILES), totals.shape[1]), np.nan)
+        minimum = np.nanmin(totals, axis=0) if totals.size else np.full(totals.shape[1], np.nan)
+        maximum = np.nanmax(totals, axis=0) if totals.size else np.full(totals.shape[1], np.nan)
+
+    grades = GradeCalculator.calculate_grades(filled)
+    distribution = {grade: ((grades == grade) & present).sum(axis=0) for grade in GradeCalculator.GRADING_SCALE}
+    passed = count - distribution['F']
+
+    return {
+        'count': count, 'mean': mean, 'median': median, 'std': std, 'min': minimum, 'max': maximum,
+        'pass_rate': np.where(has_marks, passed * 100 / safe_count, np.nan),
+        'percentiles': dict(zip(PERCENTILES, percentiles)),
+        'grades': distribution,
+    }
+
+
+def z_scores(totals, stats=None):
+    """Each mark's distance from its subject mean in standard deviations (NaN without a mark or spread)"""
+    stats = stats or subject_statistics(totals)
+    std = np.where(stats['std'] > 0, stats['std'], np.nan)
+    return (totals - stats['mean']) / std
+
+
+def statistics_for(session, term, class_name=None, year=None):
+    """Headless entry point: (MarkMatrix, subject statistics, z-scores) for a class or year group"""
+    matrix = load_matrix(session, term, class_name, year)
+    stats = subject_statistics(matrix.totals)
+    return matrix, stats, z_scores(matrix.totals, stats)
+
+
+def summary_rows(subjects, stats):
+    """One row of display text per subject: code, count, mean, median, std, min, max, pass %, percentiles, grades"""
+    def number(value, places=1):
+        return "-" if np.isnan(value) else f"{value:.{places}f}"
+
+    rows = []
+    for j, subject in enumerate(subjects):
+        row = [subject.subject_code, str(int(stats['count'][j]))]
+        row += [number(stats[key][j]) for key in ('mean', 'median', 'std', 'min', 'max', 'pass_rate')]
+        row += [number(stats['percentiles'][p][j]) for p in PERCENTILES]
+        row += [str(int(stats['grades'][grade][j])) for grade in GradeCalculator.GRADING_SCALE]
+        rows.append(row)
+    return rows
+
+
+SUMMARY_HEADERS = (["Subject", "Marks", "Mean", "Median", "Std", "Min", "Max", "Pass %"]
+                   + [f"P{p}" for p in PERCENTILES] + list(GradeCalculator.GRADING_SCALE))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-subject mark statistics")
+    parser.add_argument("--term", type=int, required=True, choices=GradeCalculator.TERMS)
+    scope = parser.add_mutually_exclusive_group(required=True)
+    scope.add_argument("--class", dest="class_name")
+    scope.add_argument("--year-group", dest="year", help="every class in the year group, e.g. JSS1")
+    args = parser.parse_args()
+
+    from main import prepare_database
+    prepare_database() # Creates or upgrades the schema when this runs before the app ever has
+
+    with session_scope() as session:
+        matrix, stats, _ = statistics_for(session, args.term, args.class_name, args.year)
+    print(f"{len(matrix.students)} students, {int(stats['count'].sum())} marks")
+    print("  ".join(f"{h:>7}" for h in SUMMARY_HEADERS))
+    for row in summary_rows(matrix.subjects, stats):
+        print("  ".join(f"{value:>7}" for value in row))
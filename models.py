@@ -1,21 +1,66 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey, Date, Boolean, UniqueConstraint
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, Boolean, LargeBinary, UniqueConstraint, Index, func, inspect, text, select, update, insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
+from db_config import create_configured_engine
+from instrumentation import monitor
 
 Base = declarative_base()
 
+# Terms in a school year; SCHOOL_TERMS changes the count (e.g. 2 or 4), then run main.py --rebuild-summaries
+TERMS = tuple(range(1, int(os.environ.get("SCHOOL_TERMS", 3)) + 1))
+
+# First day of each term, e.g. SCHOOL_TERM_STARTS=2025-09-08,2026-01-05,2026-04-20 (one date per term, in order).
+# Attendance reporting places school days in terms by these dates; without them it has no calendar. See term_starts
+TERM_STARTS = os.environ.get("SCHOOL_TERM_STARTS", "")
+
+def term_starts(setting=None):
+    """The configured first days of terms 1, 2, ... as dates, or None when none are configured.
+
+    Term k runs from its start to the day before term k + 1 starts; the last term runs on.
+    Raises ValueError when the setting is malformed.
+    """
+    setting = TERM_STARTS if setting is None else setting
+    if not setting.strip():
+        return None
+    try:
+        starts = [datetime.strptime(value.strip(), '%Y-%m-%d').date() for value in setting.split(',')]
+    except ValueError:
+        raise ValueError(f"SCHOOL_TERM_STARTS must be YYYY-MM-DD dates separated by commas, not {setting!r}")
+    if len(starts) != len(TERMS):
+        raise ValueError(f"SCHOOL_TERM_STARTS has {len(starts)} dates but there are {len(TERMS)} terms")
+    if starts != sorted(set(starts)):
+        raise ValueError("SCHOOL_TERM_STARTS dates must be in increasing order")
+    return starts
+
+# The 20 subjects seeded into a new database
+DEFAULT_SUBJECTS = [
+    ("MATH", "Mathematics"), ("ENG", "English"), ("PHY", "Physics"),
+    ("CHEM", "Chemistry"), ("BIO", "Biology"), ("HIST", "History"),
+    ("GEO", "Geography"), ("COMM", "Commerce"), ("ACC", "Accounts"),
+    ("AGRIC", "Agricultural Science"), ("LIT", "Literature"),
+    ("FRENCH", "French"), ("ARABIC", "Arabic"), ("IRS", "Islamic Studies"),
+    ("CRK", "Christian Knowledge"), ("CIVIC", "Civic Education"),
+    ("COMP", "Computer Science"), ("FOOD", "Food & Nutrition"),
+    ("ART", "Fine Arts"), ("MUSIC", "Music")
+]
+
 class Attendance(Base):
     __tablename__ = 'attendance'
     
     id = Column(Integer, primary_key=True)
     student_id = Column(Integer, ForeignKey('students.id'), nullable=False)
-    date = Column(String(50), nullable=False)
+    date = Column(Date, nullable=False) # Older databases stored text; normalize_attendance_dates converts it
     is_present = Column(Boolean, nullable=False, default=True)
 
     student = relationship("Student", back_populates="attendance_records")
     
-    # Ensures a student has only one record per date
-    __table_args__ = (UniqueConstraint('student_id', 'date', name='_student_date_uc'),)
+    # Ensures a student has only one record per date; the date-first index serves date-range reports
+    __table_args__ = (UniqueConstraint('student_id', 'date', name='_student_date_uc'),
+                      Index('ix_attendance_date_student', 'date', 'student_id'))
 
 class Fee(Base):
     __tablename__ = 'fees'
@@ -42,6 +87,9 @@ class Student(Base):
     attendance_records = relationship("Attendance", order_by=Attendance.date, back_populates="student")
     fees = relationship("Fee", back_populates="student")
 
+    # Keyset pagination in the students list orders by (name, id)
+    __table_args__ = (Index('ix_students_name_id', 'name', 'id'),)
+
 class Subject(Base):
     __tablename__ = 'subjects'
     
@@ -64,7 +112,242 @@ class Mark(Base):
     student = relationship("Student", back_populates="marks")
     subject = relationship("Subject")
 
-# Use SQLite for now (easier setup) - change to PostgreSQL later
-engine = create_engine('sqlite:///school_management.db')
-Base.metadata.create_all(engine)
-Session = sessionmaker(bind=engine)
\ No newline at end of file
+    # One mark per student, subject and term (target of the ON CONFLICT upsert in save_marks)
+    __table_args__ = (UniqueConstraint('student_id', 'subject_id', 'term', name='_student_subject_term_uc'),)
+
+class TermSummary(Base):
+    # Derived from marks; kept current by TermSummaryCalculator on every mark write
+    __tablename__ = 'term_summary'
+
+    id = Column(Integer, primary_key=True)
+    student_id = Column(Integer, ForeignKey('students.id'), nullable=False)
+    term = Column(Integer, nullable=False)
+    subject_count = Column(Integer, default=0)
+    total_sum = Column(Float, default=0)
+    term_average = Column(Float, default=0)
+    cumulative_average = Column(Float, default=0)
+
+    student = relationship("Student")
+
+    __table_args__ = (UniqueConstraint('student_id', 'term', name='_summary_student_term_uc'),)
+
+class AttendanceReject(Base):
+    """Attendance rows set aside by normalize_attendance_dates because their stored date couldn't be read"""
+    __tablename__ = 'attendance_rejects'
+
+    id = Column(Integer, primary_key=True)
+    student_id = Column(Integer, nullable=False)
+    date = Column(String(40), nullable=False) # As it was stored
+    is_present = Column(Boolean, nullable=False)
+    reason = Column(String(200), nullable=False)
+
+class SchoolDay(Base):
+    """The school calendar: a term's days, in date order, are the bit positions in its AttendanceBitmap rows"""
+    __tablename__ = 'school_days'
+
+    id = Column(Integer, primary_key=True)
+    date = Column(Date, nullable=False, unique=True)
+    term = Column(Integer, nullable=False, index=True)
+
+class AttendanceBitmap(Base):
+    """Packed attendance for one student and term (see attendance_store.py), built from the attendance table"""
+    __tablename__ = 'attendance_bitmaps'
+
+    id = Column(Integer, primary_key=True)
+    student_id = Column(Integer, ForeignKey('students.id'), nullable=False)
+    term = Column(Integer, nullable=False)
+    days = Column(Integer, nullable=False) # Calendar days covered; bit i = i-th school day of the term
+    present = Column(LargeBinary, nullable=False) # numpy.packbits of the present flags
+    recorded = Column(LargeBinary, nullable=False) # Days that have an attendance row at all
+
+    __table_args__ = (UniqueConstraint('student_id', 'term', name='_bitmap_student_term_uc'),)
+
+class SchemaVersion(Base):
+    """One row holding the schema version, for backends without SQLite's PRAGMA user_version"""
+    __tablename__ = 'schema_version'
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+
+# SQLite by default (WAL + tuned pragmas); set SCHOOL_DB_URL or a config file for PostgreSQL. See db_config.py
+engine = monitor.install(create_configured_engine())
+Session = sessionmaker(bind=engine)
+
+@contextmanager
+def session_scope():
+    """One unit of work: a fresh Session, committed if the block succeeds, rolled back if it raises, always closed.
+
+    Closing empties the identity map, so nothing loaded inside the block outlives it. Hand widgets
+    plain rows (session.query(Model.column, ...) results), not ORM instances.
+    """
+    session = Session()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+# Bump whenever tables, indexes or seed data change; main.prepare_database() then upgrades
+# older databases once instead of checking the whole schema on every start.
+SCHEMA_VERSION = 5
+
+def get_schema_version(engine):
+    """The version stored in the database: SQLite's user_version, elsewhere the schema_version row (None if absent)"""
+    with engine.connect() as connection:
+        if engine.dialect.name == 'sqlite':
+            return connection.exec_driver_sql('PRAGMA user_version').scalar()
+        return _read_version_row(connection)
+
+def set_schema_version(engine, version=SCHEMA_VERSION):
+    with engine.begin() as connection:
+        if engine.dialect.name == 'sqlite':
+            connection.exec_driver_sql(f'PRAGMA user_version = {int(version)}')
+        else:
+            _write_version_row(connection, version)
+
+def _read_version_row(connection):
+    if not inspect(connection).has_table(SchemaVersion.__tablename__):
+        return None
+    return connection.execute(select(SchemaVersion.version)).scalar()
+
+def _write_version_row(connection, version):
+    SchemaVersion.__table__.create(connection, checkfirst=True)
+    if not connection.execute(update(SchemaVersion).values(version=int(version))).rowcount:
+        connection.execute(insert(SchemaVersion).values(id=1, version=int(version)))
+
+def bulk_upsert(session, model, rows, index_elements, update_columns=None, chunk_size=500):
+    """INSERT ... ON CONFLICT DO UPDATE for a list of row dicts, in as few statements as possible.
+
+    index_elements must match a unique constraint on the table. By default every
+    other column present in the rows is updated on conflict.
+    """
+    if not rows:
+        return
+    if session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    if update_columns is None:
+        update_columns = [key for key in rows[0] if key not in index_elements]
+
+    for start in range(0, len(rows), chunk_size):
+        stmt = insert(model.__table__).values(rows[start:start + chunk_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={column: stmt.excluded[column] for column in update_columns}
+        )
+        session.execute(stmt)
+
+def ensure_indexes(engine):
+    """Creates indexes added to the models after a database was first created (create_all skips existing tables)"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+def merge_duplicate_marks(session):
+    """Clean-up for databases created before marks had a unique constraint.
+
+    Keeps the newest row of every duplicated (student, subject, term) group, then
+    adds the unique index that create_all cannot add to an existing table.
+    Returns the number of rows removed.
+    """
+    keep_ids = session.query(func.max(Mark.id)).group_by(Mark.student_id, Mark.subject_id, Mark.term)
+    removed = session.query(Mark).filter(
+        Mark.id.not_in(keep_ids.scalar_subquery())
+    ).delete(synchronize_session=False)
+
+    columns = ['student_id', 'subject_id', 'term']
+    inspector = inspect(session.connection())
+    has_unique = any(uc['column_names'] == columns for uc in inspector.get_unique_constraints('marks')) or \
+        any(ix['unique'] and ix['column_names'] == columns for ix in inspector.get_indexes('marks'))
+    if not has_unique:
+        session.execute(text(
+            "CREATE UNIQUE INDEX _student_subject_term_uc ON marks (student_id, subject_id, term)"
+        ))
+    session.commit()
+    return removed
+
+ISO_DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S')
+
+# Day and month in either order: 03/04/2025, 3-4-2025
+_NUMERIC_DATE = re.compile(r"(\d{1,2})[/-](\d{1,2})[/-](\d{4})$")
+
+def _date_order(raw_dates):
+    """'dmy' or 'mdy' for the numeric dates of a column, or None when it holds both.
+
+    Decided by the values only one order can read (a first number over 12 is a day, a second
+    one over 12 is a day too); day first when none of them decides it.
+    """
+    day_first = month_first = False
+    for raw in raw_dates:
+        match = _NUMERIC_DATE.match(raw.strip())
+        if match:
+            day_first |= int(match[1]) > 12
+            month_first |= int(match[2]) > 12
+    if day_first and month_first:
+        return None
+    return 'mdy' if month_first else 'dmy'
+
+def _parse_date(value, order='dmy'):
+    for date_format in ISO_DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip()[:19], date_format).date()
+        except ValueError:
+            continue
+    match = _NUMERIC_DATE.match(value.strip())
+    if not match:
+        raise ValueError("unrecognised date")
+    if order is None:
+        raise ValueError("the column has both day/month and month/day dates")
+    first, second, year = (int(part) for part in match.groups())
+    day, month = (first, second) if order == 'dmy' else (second, first)
+    return datetime(year, month, day).date()
+
+def normalize_attendance_dates(session):
+    """Clean-up for databases created when Attendance.date was free text.
+
+    Rewrites every stored date as YYYY-MM-DD (what the Date column reads and writes) and, on
+    PostgreSQL, changes the column type. Numeric dates are read in the one day/month order the
+    column uses (see _date_order). Rows whose date can't be read, including every numeric date
+    of a column that mixes both orders, move to attendance_rejects with the reason.
+
+    Returns (distinct values rewritten, rows moved to attendance_rejects).
+    """
+    connection = session.connection()
+    raw_dates = [row[0] for row in connection.execute(text("SELECT DISTINCT CAST(date AS TEXT) FROM attendance"))]
+    order = _date_order(raw_dates)
+    changed, unreadable = {}, {}
+    for raw in raw_dates:
+        try:
+            iso = _parse_date(raw, order).isoformat()
+        except ValueError as e:
+            unreadable[raw] = str(e)
+            continue
+        if raw != iso:
+            changed[raw] = iso
+
+    rejected = 0
+    for raw, reason in unreadable.items():
+        rejected += connection.execute(text(
+            "INSERT INTO attendance_rejects (student_id, date, is_present, reason) "
+            "SELECT student_id, CAST(date AS TEXT), is_present, :reason FROM attendance WHERE CAST(date AS TEXT) = :raw"
+        ), {'raw': raw, 'reason': reason}).rowcount
+        connection.execute(text("DELETE FROM attendance WHERE CAST(date AS TEXT) = :raw"), {'raw': raw})
+    for raw, iso in changed.items():
+        # Where a student already has the normalized date, the duplicate under the old spelling goes
+        connection.execute(text(
+            "DELETE FROM attendance WHERE CAST(date AS TEXT) = :raw AND student_id IN "
+            "(SELECT student_id FROM attendance WHERE CAST(date AS TEXT) = :iso)"
+        ), {'iso': iso, 'raw': raw})
+        connection.execute(text("UPDATE attendance SET date = :iso WHERE CAST(date AS TEXT) = :raw"), {'iso': iso, 'raw': raw})
+
+    if connection.dialect.name == 'postgresql':
+        column_type = next(c['type'] for c in inspect(connection).get_columns('attendance') if c['name'] == 'date')
+        if not isinstance(column_type, Date):
+            connection.execute(text("ALTER TABLE attendance ALTER COLUMN date TYPE DATE USING date::date"))
+    session.commit()
+    return len(changed), rejected
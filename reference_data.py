@@ -0,0 +1,118 @@
+"""Read-through cache for reference data: subjects, class names and class populations.
+
+These change rarely but are read on nearly every tab load. Each helper takes the caller's
+session and only queries on a miss:
+
+    subjects = reference_data.subjects(session)
+
+Entries expire after a TTL (so writes from another process, e.g. an import, show up
+eventually) and the least recently used entry is dropped when the cache is full. Write paths
+in this process invalidate what they change straight away: adding students clears the class
+entries, seeding subjects clears the subject entry.
+
+Cached values are shared between callers and threads; treat them as read-only.
+
+Environment variables:
+    SCHOOL_CACHE_TTL    seconds an entry stays fresh (default 300; 0 disables caching)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import func
+from models import Student, Subject
+
+SUBJECTS = 'subjects'
+CLASS_NAMES = 'class_names'
+CLASS_COUNTS = 'class_counts'
+CLASS_KEYS = (CLASS_NAMES, CLASS_COUNTS)
+
+
+class ReferenceCache:
+    """A small thread-safe TTL + LRU cache with hit and miss counters."""
+
+    def __init__(self, ttl=300.0, max_entries=32):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict() # {key: (expires_at, value)}, least recently used first
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0 # Bumped by invalidate, so a load that raced an invalidation isn't stored
+
+    def get(self, key, loader):
+        """The cached value for `key`, or loader() (stored) when missing or expired."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self.generation
+
+        value = loader()
+        if self.ttl > 0:
+            with self.lock:
+                if generation != self.generation:
+                    return value
+                self.entries[key] = (time.monotonic() + self.ttl, value)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, *keys):
+        """Drops the given keys, or everything when none are given."""
+        with self.lock:
+            self.generation += 1
+            if not keys:
+                self.entries.clear()
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(self.entries), 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def reset_stats(self):
+        with self.lock:
+            self.hits = self.misses = self.evictions = 0
+
+
+cache = ReferenceCache(ttl=float(os.environ.get("SCHOOL_CACHE_TTL", 300)))
+
+
+def subjects(session):
+    """Rows of (id, subject_code, subject_name) in id order"""
+    return cache.get(SUBJECTS, lambda: tuple(
+        session.query(Subject.id, Subject.subject_code, Subject.subject_name).order_by(Subject.id).all()
+    ))
+
+
+def class_names(session):
+    """Names of the classes that have students, sorted"""
+    return cache.get(CLASS_NAMES, lambda: tuple(
+        row[0] for row in session.query(Student.class_name).distinct().order_by(Student.class_name)
+    ))
+
+
+def class_counts(session):
+    """{class_name: number of students}, from one grouped query"""
+    return cache.get(CLASS_COUNTS, lambda: dict(
+        session.query(Student.class_name, func.count(Student.id)).group_by(Student.class_name).all()
+    ))
+
+
+def students_changed():
+    """Call after adding, moving or removing students"""
+    cache.invalidate(*CLASS_KEYS)
+
+
+def subjects_changed():
+    cache.invalidate(SUBJECTS)
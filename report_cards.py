@@ -0,0 +1,310 @@
+"""Batch report cards: one HTML or PDF document per student for a term.
+
+Each card shows the student's subject scores and grades, term and cumulative averages,
+class position and attendance. Everything a class needs is prefetched in a handful of
+queries, then the cards are rendered and written by a process pool while the next class
+is being fetched. Each file is written as soon as it is rendered.
+
+PDFs are produced by a small built-in writer (standard Helvetica fonts, no dependencies),
+so this works offline.
+
+Usage:
+    python report_cards.py OUTPUT_DIR --term 1 [--class JSS1] [--format pdf] [--workers 4]
+
+Files are written to OUTPUT_DIR/<class>/<student id>_Term<term>.<html|pdf>.
+"""
+import argparse
+import html
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date as dt_date
+
+from sqlalchemy import and_
+from models import Student, Mark, TermSummary, session_scope
+import reference_data
+from calculations import GradeCalculator, PositionCalculator
+from attendance_store import AttendanceBitmaps, AttendanceCalendarError, popcount
+
+FORMATS = ('html', 'pdf')
+BATCH_SIZE = 25 # Cards per pool task; one card renders in about a millisecond, so single-card tasks are mostly IPC
+
+
+# --- Prefetch (main process) ---
+
+def fetch_class_cards(session, class_name, term):
+    """Returns a list of plain card dicts, one per student in the class, from four queries plus the cached subjects"""
+    students = session.query(
+        Student.id, Student.student_id, Student.name, TermSummary.subject_count,
+        TermSummary.term_average, TermSummary.cumulative_average
+    ).outerjoin(
+        TermSummary, and_(TermSummary.student_id == Student.id, TermSummary.term == term)
+    ).filter(Student.class_name == class_name).order_by(Student.name).all()
+    if not students:
+        return []
+
+    subjects = {subject.id: subject.subject_name for subject in reference_data.subjects(session)}
+    marks = {}
+    for student_id, subject_id, ca, exams, total, grade in session.query(
+        Mark.student_id, Mark.subject_id, Mark.continuous_assessment, Mark.exams, Mark.total, Mark.grade
+    ).join(Student, Mark.student_id == Student.id).filter(
+        Student.class_name == class_name, Mark.term == term
+    ).order_by(Mark.subject_id):
+        marks.setdefault(student_id, []).append((subjects.get(subject_id, subject_id), ca, exams, total, grade))
+
+    # Same ranking as PositionCalculator.calculate_class_positions, from the rows already loaded
+    positions = PositionCalculator._rank({s.id: s.cumulative_average or 0 for s in students})
+
+    # Days present over the term's school days, from the packed bitmaps. Without a term calendar, or with
+    # bitmaps older than it, the cards say attendance is not available rather than failing the run
+    try:
+        ids, days, present, _, _ = AttendanceBitmaps.load(session, term, class_name)
+    except AttendanceCalendarError:
+        ids, days, present = None, (), None
+    attendance = {}
+    if len(days):
+        for student_id, present_days in zip(ids.tolist(), popcount(present).tolist()):
+            attendance[student_id] = (present_days, len(days), present_days * 100 / len(days))
+
+    today = dt_date.today().isoformat()
+    return [{
+        'student_id': s.student_id, 'name': s.name, 'class_name': class_name, 'term': term,
+        'subjects': marks.get(s.id, []), 'subject_count': s.subject_count or 0,
+        'term_average': s.term_average or 0, 'cumulative_average': s.cumulative_average or 0,
+        'grade': GradeCalculator.calculate_grade(round(s.term_average or 0)),
+        'position': positions[s.id], 'class_size': len(students),
+        'attendance': attendance.get(s.id), 'attendance_available': ids is not None, 'generated': today,
+    } for s in students]
+
+
+# --- Rendering (worker processes) ---
+
+def _ordinal(n):
+    suffix = 'th' if 10 <= n % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+    return f"{n}{suffix}"
+
+
+def _summary_lines(card):
+    lines = [
+        ("Subjects taken", str(card['subject_count'])),
+        ("Term average", f"{card['term_average']:.1f} ({card['grade']})"),
+        ("Cumulative average", f"{card['cumulative_average']:.1f}"),
+        ("Position", f"{_ordinal(card['position'])} of {card['class_size']}"),
+    ]
+    if card['attendance']:
+        present, days, percent = card['attendance']
+        lines.append(("Attendance", f"{present} of {days} days ({percent:.1f}%)"))
+    else:
+        lines.append(("Attendance", "not recorded" if card['attendance_available'] else "not available"))
+    return lines
+
+
+def render_html(card):
+    e = html.escape
+    rows = "\n".join(
+        f"<tr><td>{e(str(name))}</td><td>{ca:g}</td><td>{exams:g}</td><td>{total:g}</td><td>{e(grade or '-')}</td></tr>"
+        for name, ca, exams, total, grade in card['subjects']
+    ) or '<tr><td colspan="5">No results recorded.</td></tr>'
+    summary = "\n".join(f"<tr><th>{e(label)}</th><td>{e(value)}</td></tr>" for label, value in _summary_lines(card))
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Report Card - {e(card['name'])}</title>
+<style>
+body {{ font-family: Helvetica, Arial, sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; margin-bottom: 1.5em; }}
+th, td {{ border: 1px solid #999; padding: 4px 10px; text-align: left; }}
+.results td:not(:first-child) {{ text-align: right; }}
+</style></head>
+<body>
+<h1>Report Card - Term {card['term']}</h1>
+<p><b>{e(card['name'])}</b> ({e(card['student_id'])}), {e(card['class_name'])}</p>
+<table class="results">
+<tr><th>Subject</th><th>CA (40)</th><th>Exam (60)</th><th>Total</th><th>Grade</th></tr>
+{rows}
+</table>
+<table>
+{summary}
+</table>
+<p><small>Generated {card['generated']}</small></p>
+</body></html>
+"""
+
+
+class _PdfWriter:
+    """Just enough PDF for text and rules on A4 pages, using the built-in Helvetica fonts."""
+    WIDTH, HEIGHT, MARGIN = 595, 842, 50
+
+    def __init__(self):
+        self.pages = []
+        self.new_page()
+
+    def new_page(self):
+        self.pages.append([])
+        self.y = self.HEIGHT - self.MARGIN
+
+    def text(self, x, y, value, size=10, bold=False):
+        value = str(value).encode('cp1252', 'replace').decode('latin-1')
+        value = value.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+        self.pages[-1].append(f"BT /{'F2' if bold else 'F1'} {size} Tf {x:.1f} {y:.1f} Td ({value}) Tj ET")
+
+    def line(self, x1, y1, x2, y2):
+        self.pages[-1].append(f"{x1:.1f} {y1:.1f} m {x2:.1f} {y2:.1f} l S")
+
+    def to_bytes(self):
+        objects = [
+            "<< /Type /Catalog /Pages 2 0 R >>",
+            None, # Pages, filled in below
+            "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        ]
+        kids = []
+        for content in self.pages:
+            stream = "\n".join(content).encode('latin-1')
+            objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode('latin-1') + stream + b"\nendstream")
+            objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.WIDTH} {self.HEIGHT}] "
+                           f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {len(objects)} 0 R >>")
+            kids.append(f"{len(objects)} 0 R")
+        objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+        out = bytearray(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(len(out))
+            body = body if isinstance(body, bytes) else body.encode('latin-1')
+            out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+        xref = len(out)
+        out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+        out += "".join(f"{offset:010} 00000 n \n" for offset in offsets).encode()
+        out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+        return bytes(out)
+
+
+def render_pdf(card):
+    pdf = _PdfWriter()
+    left, right = pdf.MARGIN, pdf.WIDTH - pdf.MARGIN
+    columns = [(left, "Subject"), (280, "CA (40)"), (350, "Exam (60)"), (430, "Total"), (495, "Grade")]
+
+    def header_row():
+        for x, title in columns:
+            pdf.text(x, pdf.y, title, bold=True)
+        pdf.line(left, pdf.y - 5, right, pdf.y - 5)
+        pdf.y -= 20
+
+    pdf.text(left, pdf.y, f"Report Card - Term {card['term']}", size=18, bold=True)
+    pdf.y -= 26
+    pdf.text(left, pdf.y, f"{card['name']} ({card['student_id']}), {card['class_name']}", size=12)
+    pdf.y -= 30
+    header_row()
+    for name, ca, exams, total, grade in card['subjects'] or [("No results recorded.", None, None, None, None)]:
+        if pdf.y < pdf.MARGIN + 20:
+            pdf.new_page()
+            header_row()
+        pdf.text(left, pdf.y, name)
+        if total is not None:
+            for (x, _), value in zip(columns[1:], (f"{ca:g}", f"{exams:g}", f"{total:g}", grade or '-')):
+                pdf.text(x, pdf.y, value)
+        pdf.y -= 16
+
+    pdf.line(left, pdf.y + 8, right, pdf.y + 8)
+    pdf.y -= 16
+    for label, value in _summary_lines(card):
+        if pdf.y < pdf.MARGIN:
+            pdf.new_page()
+        pdf.text(left, pdf.y, label, bold=True)
+        pdf.text(200, pdf.y, value)
+        pdf.y -= 16
+    pdf.text(left, pdf.MARGIN - 20, f"Generated {card['generated']}", size=8)
+    return pdf.to_bytes()
+
+
+def card_filename(card, fmt):
+    safe_id = re.sub(r'[^\w.-]', '_', card['student_id'])
+    return f"{safe_id}_Term{card['term']}.{fmt}"
+
+
+def write_card(card, path, fmt):
+    """Renders one card to `path`"""
+    if fmt == 'pdf':
+        with open(path, 'wb') as f:
+            f.write(render_pdf(card))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(render_html(card))
+    return path
+
+
+def write_cards(batch, fmt):
+    """Renders a batch of (card, path) pairs. Runs in a worker process."""
+    return [write_card(card, path, fmt) for card, path in batch]
+
+
+# --- Driver ---
+
+def generate_report_cards(output_dir, term, class_name=None, fmt='html', workers=None, progress=print):
+    """Writes a report card per student (one class, or every class). Returns the paths written.
+
+    workers: render processes (default: CPU count); 0 renders in this process.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    with session_scope() as session:
+        classes = [class_name] if class_name else reference_data.class_names(session)
+
+    # spawn: workers never inherit the parent's database connections
+    pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                               mp_context=multiprocessing.get_context('spawn')) if workers != 0 else None
+    paths, pending, queued = [], set(), 0
+    start = time.perf_counter()
+
+    def collect(block):
+        nonlocal pending
+        if not pending:
+            return
+        done, pending = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            paths.extend(future.result())
+
+    try:
+        for name in classes:
+            # Fetch this class while the pool is still rendering the previous one
+            with session_scope() as session:
+                cards = fetch_class_cards(session, name, term)
+            class_dir = os.path.join(output_dir, re.sub(r'[^\w.-]', '_', name))
+            os.makedirs(class_dir, exist_ok=True)
+
+            batch = [(card, os.path.join(class_dir, card_filename(card, fmt))) for card in cards]
+            for i in range(0, len(batch), BATCH_SIZE):
+                if pool:
+                    pending.add(pool.submit(write_cards, batch[i:i + BATCH_SIZE], fmt))
+                else:
+                    paths.extend(write_cards(batch[i:i + BATCH_SIZE], fmt))
+            queued += len(cards)
+            collect(block=False)
+            if progress:
+                progress(f"{name}: {len(cards)} cards queued; {len(paths)}/{queued} written "
+                         f"({len(paths) / max(time.perf_counter() - start, 1e-9):.1f}/s)")
+
+        while pending:
+            collect(block=True)
+        if progress:
+            progress(f"Done: {len(paths)} report cards in {time.perf_counter() - start:.1f}s -> {output_dir}")
+        return paths
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate report cards for a term")
+    parser.add_argument("output_dir", help="directory the report cards are written to")
+    parser.add_argument("--term", type=int, required=True, choices=GradeCalculator.TERMS)
+    parser.add_argument("--class", dest="class_name", help="only this class (default: every class)")
+    parser.add_argument("--format", choices=FORMATS, default="html")
+    parser.add_argument("--workers", type=int, help="render processes (default: CPU count, 0 = no pool)")
+    args = parser.parse_args()
+
+    from main import prepare_database
+    prepare_database() # Creates or upgrades the schema when this runs before the app ever has
+
+    generate_report_cards(args.output_dir, args.term, args.class_name, args.format, args.workers)
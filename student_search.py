@@ -0,0 +1,104 @@
+"""Typeahead student search: every word of the query is a prefix of a word in the name or of the student ID.
+
+On SQLite the students are mirrored into an FTS5 table, `student_search`, kept in sync by
+triggers on `students` (so imports and other processes stay searchable without any app
+code). A prefix lookup is then an index probe, independent of the number of students.
+Elsewhere, or on a SQLite build without FTS5, the same matching runs as LIKE filters.
+
+    rows = search_students(session, "ada b", limit=20)
+    query = query.filter(search_filter(session, text)) # combine with other filters / paging
+"""
+import re
+
+from sqlalchemy import or_, and_, select, text
+from models import Student
+
+FTS_TABLE = 'student_search'
+
+_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, student_id, content='students', content_rowid='id', prefix='1 2 3')""",
+    f"""CREATE TRIGGER IF NOT EXISTS students_search_insert AFTER INSERT ON students BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, student_id) VALUES (new.id, new.name, new.student_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS students_search_delete AFTER DELETE ON students BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, student_id) VALUES ('delete', old.id, old.name, old.student_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS students_search_update AFTER UPDATE OF name, student_id ON students BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, student_id) VALUES ('delete', old.id, old.name, old.student_id);
+        INSERT INTO {FTS_TABLE}(rowid, name, student_id) VALUES (new.id, new.name, new.student_id);
+    END""",
+]
+
+# Same word boundaries as FTS5's default (unicode61) tokenizer: letters and digits only
+_WORDS = re.compile(r"[^\W_]+")
+# Where the LIKE fallback starts a new word: the separators found in names and student IDs, as LIKE text
+_SEPARATORS = (" ", "/", "-", ".", "\\_", "'")
+
+_fts_engines = {} # {engine: whether it has the search table}
+
+
+def ensure_search_index(engine):
+    """Creates the FTS5 table and its triggers and fills it from `students`. Returns False where FTS5 isn't available."""
+    if engine.dialect.name != 'sqlite':
+        return False
+    try:
+        with engine.begin() as connection:
+            for statement in _FTS_DDL:
+                connection.exec_driver_sql(statement)
+            connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    except Exception as e:
+        if 'fts5' not in str(e).lower():
+            raise
+        return False # SQLite built without FTS5: searches use LIKE
+    finally:
+        _fts_engines.pop(engine, None)
+    return True
+
+
+def _has_fts(session):
+    engine = session.get_bind()
+    if engine not in _fts_engines:
+        _fts_engines[engine] = engine.dialect.name == 'sqlite' and session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :name"), {'name': FTS_TABLE}
+        ).first() is not None
+    return _fts_engines[engine]
+
+
+def query_words(search):
+    return _WORDS.findall(search.lower())
+
+
+def search_filter(session, search):
+    """A filter on Student for the search text, or None when the text has no words"""
+    words = query_words(search)
+    if not words:
+        return None
+    if _has_fts(session):
+        match = " ".join(f'"{word}"*' for word in words)
+        return Student.id.in_(select(text('rowid')).select_from(text(FTS_TABLE)).where(
+            text(f"{FTS_TABLE} MATCH :match").bindparams(match=match)
+        ))
+
+    # Fallback: each word starts a word of the name or of the student ID, as FTS5 would match it
+    def prefix(word):
+        return or_(*[clause for column in (Student.name, Student.student_id) for clause in _word_starts(column, word)])
+    return and_(*[prefix(word) for word in words])
+
+
+def _word_starts(column, word):
+    # The column starts with the word, or the word follows a separator (so "2024" finds JSS1/2024/007)
+    yield column.ilike(f"{word}%")
+    for separator in _SEPARATORS:
+        yield column.ilike(f"%{separator}{word}%", escape="\\")
+
+
+def search_students(session, search, limit=20, class_name=None):
+    """The first `limit` matches as (id, student_id, name, class_name) rows, ordered by name"""
+    query = session.query(Student.id, Student.student_id, Student.name, Student.class_name)
+    criterion = search_filter(session, search)
+    if criterion is not None:
+        query = query.filter(criterion)
+    if class_name:
+        query = query.filter(Student.class_name == class_name)
+    return query.order_by(Student.name, Student.id).limit(limit).all()
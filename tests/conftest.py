@@ -0,0 +1,28 @@
+import os
+import sys
+
+# Every test runs against a private in-memory database, never school_management.db
+os.environ["SCHOOL_DB_URL"] = "sqlite://"
+os.environ["SCHOOL_DB_CONFIG"] = os.devnull
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import reference_data
+import student_search
+from models import Base, Session, engine
+
+
+@pytest.fixture
+def session():
+    """A session on freshly created, empty tables"""
+    Base.metadata.drop_all(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {student_search.FTS_TABLE}") # Not in the metadata
+    student_search._fts_engines.clear()
+    Base.metadata.create_all(engine)
+    reference_data.cache.invalidate()
+    session = Session()
+    try:
+        yield session
+    finally:
+        session.close()
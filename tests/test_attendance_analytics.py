@@ -0,0 +1,46 @@
+from datetime import date
+
+import models
+import attendance_analytics
+from enterprise_forms import AttendanceSummaryTab
+from models import Student, Attendance
+
+STARTS = "2025-09-08,2026-01-05,2026-04-20"
+
+
+def test_term_range_comes_from_the_term_calendar(monkeypatch):
+    monkeypatch.setattr(models, "TERM_STARTS", STARTS)
+    assert attendance_analytics.term_range(1) == (date(2025, 9, 8), date(2026, 1, 4))
+    assert attendance_analytics.term_range(3) == (date(2026, 4, 20), None)
+    assert attendance_analytics.term_range(4) == (None, None)
+    monkeypatch.setattr(models, "TERM_STARTS", "")
+    assert attendance_analytics.term_range(1) == (None, None)
+
+
+def test_summary_for_a_term_covers_only_that_terms_dates(session, monkeypatch):
+    monkeypatch.setattr(models, "TERM_STARTS", STARTS)
+    session.add_all([Student(id=1, student_id="S1", name="Ada Obi", class_name="JSS1"),
+                     Student(id=2, student_id="S2", name="Bola Eze", class_name="JSS1")])
+    # A back-filled term 1 day after a long gap, then term 2
+    session.add_all(Attendance(student_id=s, date=day, is_present=present) for s, day, present in [
+        (1, date(2025, 9, 8), True), (1, date(2025, 12, 1), False), (2, date(2025, 12, 1), True),
+        (1, date(2026, 1, 5), True), (2, date(2026, 1, 5), False)])
+    session.flush()
+
+    start, end, rows = AttendanceSummaryTab.fetch_summary(session, "Students", None, 1, None, None, 90.0)
+    assert (start, end) == (date(2025, 9, 8), date(2026, 1, 4))
+    assert [(row.student_id, row.present, row.recorded) for row in rows] == [("S1", 1, 2), ("S2", 1, 1)]
+
+    start, _, rows = AttendanceSummaryTab.fetch_summary(session, "Students", None, 2, None, None, 90.0)
+    assert start == date(2026, 1, 5)
+    assert [(row.student_id, row.present) for row in rows] == [("S1", 1), ("S2", 0)]
+
+
+def test_summary_without_a_calendar_needs_dates(session, monkeypatch):
+    monkeypatch.setattr(models, "TERM_STARTS", "")
+    session.add_all([Student(id=1, student_id="S1", name="Ada Obi", class_name="JSS1"),
+                     Attendance(student_id=1, date=date(2026, 1, 5), is_present=True)])
+    session.flush()
+    assert AttendanceSummaryTab.fetch_summary(session, "Students", None, 2, None, None, 90.0)[2] == []
+    rows = AttendanceSummaryTab.fetch_summary(session, "Students", None, 2, date(2026, 1, 1), date(2026, 1, 31), 90.0)[2]
+    assert [row.percent for row in rows] == [100.0]
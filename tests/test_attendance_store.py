@@ -0,0 +1,74 @@
+from datetime import date
+
+import pytest
+import models
+from attendance_store import AttendanceBitmaps, AttendanceCalendarError, assign_terms
+from models import Student, Attendance, SchoolDay
+
+STARTS = "2025-09-08,2026-01-05,2026-04-20"
+
+
+def _attendance(session, days):
+    session.add_all([Student(id=1, student_id="S1", name="Ada Obi", class_name="JSS1"),
+                     Student(id=2, student_id="S2", name="Bola Eze", class_name="JSS1")])
+    session.add_all(Attendance(student_id=s, date=day, is_present=(s == 1 or i % 2 == 0))
+                    for i, day in enumerate(days) for s in (1, 2))
+    session.flush()
+
+
+def _calendar(session):
+    return dict(session.query(SchoolDay.date, SchoolDay.term).all())
+
+
+def test_term_starts_parsing(monkeypatch):
+    assert models.term_starts("") is None
+    assert models.term_starts(STARTS) == [date(2025, 9, 8), date(2026, 1, 5), date(2026, 4, 20)]
+    for bad in ("2025-09-08,2026-01-05", "2026-01-05,2025-09-08,2026-04-20", "08/09/2025,2026-01-05,2026-04-20"):
+        with pytest.raises(ValueError):
+            models.term_starts(bad)
+
+
+def test_assign_terms_uses_the_start_dates_not_gaps():
+    starts = models.term_starts(STARTS)
+    # A back-filled day weeks after the last one is still term 1; days before term 1 are in no term
+    assert assign_terms([date(2025, 9, 8), date(2025, 12, 1), date(2026, 1, 5), date(2025, 8, 1)], starts) == {
+        date(2025, 9, 8): 1, date(2025, 12, 1): 1, date(2026, 1, 5): 2}
+
+
+def test_no_calendar_is_built_without_term_starts(session, monkeypatch):
+    monkeypatch.setattr(models, "TERM_STARTS", "")
+    _attendance(session, [date(2026, 1, 5), date(2026, 1, 6)])
+    with pytest.raises(AttendanceCalendarError):
+        AttendanceBitmaps.rebuild(session)
+    AttendanceBitmaps.refresh_students(session, [1, 2], [date(2026, 1, 5)])
+    assert _calendar(session) == {}
+    with pytest.raises(AttendanceCalendarError):
+        AttendanceBitmaps.load(session, 1)
+
+
+def test_recording_from_the_second_term_is_term_two(session, monkeypatch):
+    monkeypatch.setattr(models, "TERM_STARTS", STARTS)
+    _attendance(session, [date(2026, 1, 5), date(2026, 1, 6), date(2026, 1, 7)])
+    AttendanceBitmaps.rebuild(session)
+    assert set(_calendar(session).values()) == {2}
+    assert AttendanceBitmaps.percentages(session, 2) == pytest.approx({1: 100.0, 2: 200 / 3})
+    assert AttendanceBitmaps.percentages(session, 1) == {}
+
+
+def test_saves_place_new_days_and_follow_changed_term_starts(session, monkeypatch):
+    monkeypatch.setattr(models, "TERM_STARTS", STARTS)
+    _attendance(session, [date(2025, 11, 10)])
+    AttendanceBitmaps.refresh_students(session, [1, 2])
+    assert _calendar(session) == {date(2025, 11, 10): 1}
+
+    session.add(Attendance(student_id=1, date=date(2025, 12, 1), is_present=True))
+    AttendanceBitmaps.refresh_students(session, [1], [date(2025, 12, 1)])
+    assert _calendar(session) == {date(2025, 11, 10): 1, date(2025, 12, 1): 1}
+    ids, days, _, _, _ = AttendanceBitmaps.load(session, 1)
+    assert ids.tolist() == [1, 2] and len(days) == 2
+
+    # Term 2 moved earlier: the stored day moves with it on the next save
+    monkeypatch.setattr(models, "TERM_STARTS", "2025-09-08,2025-11-24,2026-04-20")
+    AttendanceBitmaps.refresh_students(session, [1], [date(2025, 12, 1)])
+    assert _calendar(session) == {date(2025, 11, 10): 1, date(2025, 12, 1): 2}
+    assert AttendanceBitmaps.percentages(session, 2) == {1: 100.0}
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+from calculations import GradeCalculator, PositionCalculator, TermSummaryCalculator
+from models import Student, Subject, Mark, TermSummary
+
+
+def test_rank_orders_by_average_descending():
+    assert PositionCalculator._rank({1: 55.0, 2: 90.0, 3: 72.5}) == {2: 1, 3: 2, 1: 3}
+
+
+def test_rank_ties_share_a_position_and_skip_the_next():
+    positions = PositionCalculator._rank({1: 80.0, 2: 90.0, 3: 80.0, 4: 60.0, 5: 0})
+    assert positions == {2: 1, 1: 2, 3: 2, 4: 4, 5: 5}
+
+
+def test_rank_all_tied():
+    assert PositionCalculator._rank({1: 0, 2: 0, 3: 0}) == {1: 1, 2: 1, 3: 1}
+
+
+def test_rank_empty():
+    assert PositionCalculator._rank({}) == {}
+
+
+@pytest.mark.parametrize("averages, expected", [
+    ([60, 80], [60, 70]),
+    ([60, 80, 50], [60, 70, 60]),
+    ([60, 80, 50, 90], [60, 70, 60, 75]),
+])
+def test_cumulative_averages_for_any_number_of_terms(averages, expected):
+    assert GradeCalculator.cumulative_averages(averages).tolist() == expected
+
+
+def test_cumulative_averages_per_student_and_empty_terms():
+    result = GradeCalculator.cumulative_averages([[60, 0, 90], [0, 0, 0]])
+    assert result.tolist() == [[60, 30, 60], [0, 0, 0]]
+    assert GradeCalculator.cumulative_averages(np.zeros((2, 0))).shape == (2, 0)
+
+
+EDGE_SCORES = [0, 49, 49.5, 50, 59, 59.5, 60, 69.5, 70, 79, 79.5, 80, 99.9, 100, 100.5, -1, 150]
+
+
+def test_calculate_grades_matches_calculate_grade():
+    expected = [GradeCalculator.calculate_grade(score) for score in EDGE_SCORES]
+    assert GradeCalculator.calculate_grades(np.array(EDGE_SCORES)).tolist() == expected
+
+
+def test_calculate_grades_band_edges():
+    grades = GradeCalculator.calculate_grades([79.5, 49.5, 80, 100, 100.5, -1])
+    assert grades.tolist() == ['F', 'F', 'A', 'A', 'F', 'F']
+
+
+def test_term_summary_refresh_and_rebuild_agree(session):
+    session.add_all([Student(id=1, student_id="S1", name="Ada Obi", class_name="JSS1"),
+                     Student(id=2, student_id="S2", name="Bola Eze", class_name="JSS1"),
+                     Subject(id=1, subject_code="MATH", subject_name="Mathematics"),
+                     Subject(id=2, subject_code="ENG", subject_name="English")])
+    session.add_all([Mark(student_id=1, subject_id=1, term=1, total=60), Mark(student_id=1, subject_id=2, term=1, total=80),
+                     Mark(student_id=1, subject_id=1, term=2, total=50)])
+    TermSummaryCalculator.refresh_students(session, [1, 2])
+    session.commit()
+
+    def summaries():
+        return session.query(TermSummary.student_id, TermSummary.term, TermSummary.subject_count,
+                             TermSummary.term_average, TermSummary.cumulative_average).order_by(
+            TermSummary.student_id, TermSummary.term).all()
+
+    refreshed = summaries()
+    assert refreshed[:2] == [(1, 1, 2, 70, 70), (1, 2, 1, 50, 60)]
+    assert [row.subject_count for row in refreshed if row.student_id == 2] == [0] * len(GradeCalculator.TERMS)
+
+    TermSummaryCalculator.rebuild(session)
+    session.commit()
+    assert summaries() == refreshed
+
+
+def _recursive_cumulative(term_averages, term):
+    # The original term 1/2/3 definition, one term at a time
+    if term == 1:
+        return term_averages.get(1, 0)
+    return (_recursive_cumulative(term_averages, term - 1) + term_averages.get(term, 0)) / 2
+
+
+def test_class_cumulative_averages_match_the_recursive_definition(session):
+    session.add_all([Student(id=1, student_id="S1", name="Ada Obi", class_name="JSS1"),
+                     Student(id=2, student_id="S2", name="Bola Eze", class_name="JSS1"),
+                     Student(id=3, student_id="S3", name="Chidi Okafor", class_name="JSS1"),
+                     Student(id=4, student_id="S4", name="Dayo Bello", class_name="JSS2"),
+                     Subject(id=1, subject_code="MATH", subject_name="Mathematics"),
+                     Subject(id=2, subject_code="ENG", subject_name="English")])
+    marks = {(1, 1, 1): 60, (1, 2, 1): 80, (1, 1, 2): 50, (1, 1, 3): 90, (2, 1, 2): 75, (4, 1, 1): 40}
+    session.add_all(Mark(student_id=s, subject_id=sub, term=t, total=total) for (s, sub, t), total in marks.items())
+    TermSummaryCalculator.refresh_students(session, [1, 2, 3, 4])
+    session.commit()
+
+    term_averages = {}
+    for (student, _, term), total in marks.items():
+        term_averages.setdefault(student, {}).setdefault(term, []).append(total)
+    term_averages = {s: {t: sum(v) / len(v) for t, v in terms.items()} for s, terms in term_averages.items()}
+
+    for term in (1, 2, 3):
+        expected = {s: _recursive_cumulative(term_averages.get(s, {}), term) for s in (1, 2, 3)}
+        assert GradeCalculator.class_cumulative_averages(session, "JSS1", term) == pytest.approx(expected)
+    assert GradeCalculator.class_cumulative_averages(session, "JSS1", 3)[3] == 0
+    assert GradeCalculator.class_cumulative_averages(session, "SSS3", 1) == {}
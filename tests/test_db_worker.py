@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+from db_worker import QueryExecutor, InlineExecutor
+from models import Student
+
+
+class FakeRoot:
+    """Records after() callbacks instead of running a Tk mainloop; tests call _poll themselves"""
+
+    def after(self, ms, callback):
+        return "poll"
+
+    def after_cancel(self, poll_id):
+        pass
+
+
+@pytest.fixture
+def executor():
+    executor = QueryExecutor(FakeRoot(), max_workers=2, max_in_flight=2)
+    yield executor
+    executor.shutdown()
+
+
+def _drain(executor, timeout=5):
+    """Polls until every submitted job has been delivered"""
+    deadline = time.monotonic() + timeout
+    while executor._in_flight or executor._backlog:
+        assert time.monotonic() < deadline, "jobs did not finish"
+        executor._poll()
+        time.sleep(0.005)
+
+
+def test_results_are_delivered_on_poll(executor):
+    results = []
+    executor.submit(lambda session: 42, on_done=results.append)
+    assert results == [] # Nothing is delivered off the Tk thread
+    _drain(executor)
+    assert results == [42]
+
+
+def test_only_the_latest_job_for_a_key_delivers(executor):
+    results, busy = [], []
+    for value in (1, 2, 3):
+        executor.submit(lambda session, value=value: value, on_done=results.append, key="class", busy=busy.append)
+    _drain(executor)
+    assert results == [3]
+    assert busy == [True, True, True, False] # Busy until the latest job is delivered
+    assert executor._latest == {}
+
+
+def test_jobs_beyond_max_in_flight_wait_for_a_slot(executor):
+    release = threading.Event()
+    results = []
+    for value in (1, 2, 3):
+        executor.submit(lambda session, value=value: release.wait(5) and value, on_done=results.append)
+    assert executor._in_flight == 2 and len(executor._backlog) == 1
+    release.set()
+    _drain(executor)
+    assert sorted(results) == [1, 2, 3]
+
+
+def test_cancel_drops_the_result_and_clears_busy(executor):
+    release = threading.Event()
+    results, busy = [], []
+    executor.submit(lambda session: release.wait(5), on_done=results.append, key="roster", busy=busy.append)
+    executor.cancel("roster")
+    assert busy == [True, False]
+    release.set()
+    _drain(executor)
+    assert results == [] and busy == [True, False]
+
+
+def test_errors_go_to_on_error_and_roll_back(executor, session):
+    def failing(job_session):
+        job_session.add(Student(student_id="S1", name="Ada Obi", class_name="JSS1"))
+        job_session.flush()
+        raise ValueError("bad input")
+
+    errors, results = [], []
+    executor.submit(failing, on_done=results.append, on_error=errors.append)
+    _drain(executor)
+    assert [str(e) for e in errors] == ["bad input"] and results == []
+    assert session.query(Student).count() == 0
+
+
+def test_shutdown_cancels_waiting_jobs():
+    executor = QueryExecutor(FakeRoot(), max_workers=1, max_in_flight=1)
+    release = threading.Event()
+    executor.submit(lambda session: release.wait(5))
+    waiting = executor.submit(lambda session: 1)
+    executor.shutdown()
+    release.set()
+    assert waiting.cancelled
+
+
+def test_inline_executor_runs_jobs_immediately():
+    results, errors = [], []
+    InlineExecutor().submit(lambda session: 7, on_done=results.append)
+    InlineExecutor().submit(lambda session: 1 / 0, on_error=errors.append)
+    assert results == [7] and isinstance(errors[0], ZeroDivisionError)
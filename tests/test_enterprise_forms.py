@@ -0,0 +1,75 @@
+import pytest
+from enterprise_forms import StudentsListTab, SchoolFeesTab
+from models import Student, Fee
+
+
+def _pages(session, class_name="All", search="", page_size=5):
+    pages, after = [], None
+    while True:
+        rows, has_next = StudentsListTab.fetch_page(session, after, class_name, search, page_size)
+        pages.append(rows)
+        if not has_next:
+            return pages
+        after = (rows[-1].name, rows[-1].id)
+
+
+def test_keyset_pages_cover_duplicate_names_exactly_once(session):
+    # Runs of the same name straddle the page boundaries, and ids don't follow name order
+    names = ["Musa Bello"] * 7 + ["Ada Obi"] * 6 + ["Zainab Yusuf", "Ife Eze"] * 4 + ["Ada Obi"]
+    session.add_all(Student(id=100 - i, student_id=f"S{i:02}", name=name, class_name="JSS1" if i % 3 else "JSS2")
+                    for i, name in enumerate(names))
+    session.commit()
+
+    pages = _pages(session)
+    rows = [row for page in pages for row in page]
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 2]
+    assert len({row.id for row in rows}) == len(names) == len(rows)
+    assert [(row.name, row.id) for row in rows] == sorted((row.name, row.id) for row in rows)
+
+    jss2 = [row for page in _pages(session, "JSS2", page_size=2) for row in page]
+    assert sorted(row.id for row in jss2) == sorted(100 - i for i in range(len(names)) if i % 3 == 0)
+
+    ada = [row for page in _pages(session, search="ada", page_size=3) for row in page]
+    assert len(ada) == 7 and len({row.id for row in ada}) == 7
+
+
+def test_a_page_that_ends_exactly_at_the_last_row_has_no_next_page(session):
+    session.add_all(Student(id=i, student_id=f"S{i}", name="Same Name", class_name="JSS1") for i in range(1, 5))
+    session.commit()
+    assert [len(page) for page in _pages(session, page_size=2)] == [2, 2]
+
+
+def _fees_class(session):
+    # (due, paid) per student: paid exactly, overpaid, partial, unpaid, nothing due, and no fee row at all
+    fees = {1: (50000, 50000), 2: (45000, 46000), 3: (60000, 30000), 4: (50000, 0), 5: (0, 0), 6: None}
+    for student_id, fee in fees.items():
+        session.add(Student(id=student_id, student_id=f"S{student_id}", name=f"Student {student_id}", class_name="JSS1"))
+        if fee:
+            session.add(Fee(student_id=student_id, term=1, amount_due=fee[0], amount_paid=fee[1]))
+    session.add_all([Student(id=7, student_id="S7", name="Other Class", class_name="JSS2"),
+                     Fee(student_id=7, term=1, amount_due=10000, amount_paid=0),
+                     Fee(student_id=1, term=2, amount_due=99999, amount_paid=0)])
+    session.commit()
+
+
+def test_fee_status_boundaries_and_missing_rows(session):
+    _fees_class(session)
+    rows, totals = SchoolFeesTab.fetch_fees(session, "JSS1", 1)
+    assert {row.id: row.status for row in rows} == {1: "Paid", 2: "Paid", 3: "Pending", 4: "Pending", 5: "Paid", 6: "Paid"}
+    assert next(row for row in rows if row.id == 6)[3:5] == (0, 0)
+    # The missing fee row is created once, as 0 due / 0 paid
+    assert session.query(Fee).filter_by(student_id=6, term=1).one().amount_due == 0
+    assert len(SchoolFeesTab.fetch_fees(session, "JSS1", 1)[0]) == 6
+    assert session.query(Fee).filter_by(term=1).count() == 7
+
+
+def test_fee_totals_and_a_payment_update(session):
+    _fees_class(session)
+    # Outstanding counts what is still owed; the overpayment doesn't reduce it
+    assert SchoolFeesTab.fee_totals(session, "JSS1", 1) == (205000, 126000, 80000)
+
+    row, totals = SchoolFeesTab.write_fee(session, 3, 1, "JSS1", 60000)
+    assert (row.amount_paid, row.status) == (60000, "Paid")
+    assert totals == (205000, 156000, 50000)
+    row, totals = SchoolFeesTab.write_fee(session, 1, 1, "JSS1", 49999.99)
+    assert row.status == "Pending" and totals[2] == pytest.approx(50000.01)
@@ -0,0 +1,26 @@
+import csv
+import gzip
+import os
+
+from exports import export_school
+from models import Student, Subject, Mark
+
+
+def test_export_school_writes_one_broadsheet_per_class_and_term(session, tmp_path):
+    session.add_all([Student(id=1, student_id="S1", name="Bola Eze", class_name="JSS1"),
+                     Student(id=2, student_id="S2", name="Ada Obi", class_name="JSS1"),
+                     Student(id=3, student_id="S3", name="Chidi Okafor", class_name="JSS2"),
+                     Subject(id=1, subject_code="MATH", subject_name="Mathematics"),
+                     Subject(id=2, subject_code="ENG", subject_name="English"),
+                     Mark(student_id=1, subject_id=1, term=1, total=72.4),
+                     Mark(student_id=1, subject_id=2, term=1, total=55.0),
+                     Mark(student_id=3, subject_id=2, term=1, total=80.0)])
+    session.commit()
+
+    paths = export_school(str(tmp_path), terms=(1,), compress=True, progress=None)
+    assert [os.path.basename(path).split("_")[1] for path in paths] == ["JSS1", "JSS2"]
+    with gzip.open(paths[0], "rt", newline="", encoding="utf-8") as file:
+        assert list(csv.reader(file)) == [["Student ID", "Name", "MATH", "ENG"],
+                                          ["S2", "Ada Obi", "-", "-"], ["S1", "Bola Eze", "72", "55"]]
+    with gzip.open(paths[1], "rt", newline="", encoding="utf-8") as file:
+        assert list(csv.reader(file))[1] == ["S3", "Chidi Okafor", "-", "80"]
@@ -0,0 +1,237 @@
+from datetime import date
+from types import SimpleNamespace
+
+import numpy as np
+import forms
+import mark_statistics
+from forms import SubjectMarksEntry, AttendanceTab, BroadsheetTab, MarksEntryTab
+from models import Student, Subject, Mark, Attendance, TermSummary
+
+
+class FakeWidget:
+    def __init__(self):
+        self.options = {}
+
+    def configure(self, **options):
+        self.options.update(options)
+
+
+class FakeVar:
+    def __init__(self, value=""):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+def _grid(students, loaded=("JSS1", 1, 1)):
+    """A SubjectMarksEntry with fake widgets: students are (id, ca text, exam text)"""
+    entry = SubjectMarksEntry.__new__(SubjectMarksEntry)
+    entry.rows = [{'id': student_id, 'loaded': None, 'vars': {'ca': FakeVar(ca), 'exam': FakeVar(exam)},
+                   'total': FakeWidget(), 'grade': FakeWidget()} for student_id, ca, exam in students]
+    entry.dirty = set()
+    entry.loaded = loaded
+    entry.save_btn, entry.load_btn, entry.status_label = FakeWidget(), FakeWidget(), FakeWidget()
+    entry.saved_events = []
+    entry.on_marks_saved = lambda *event: entry.saved_events.append(event)
+    return entry
+
+
+def _save(entry):
+    """Runs save_changes, capturing the job instead of running it; returns its on_done callback"""
+    jobs = []
+    entry.executor = SimpleNamespace(submit=lambda job, on_done, **options: jobs.append(on_done))
+    entry.save_changes()
+    return jobs[0]
+
+
+def test_saved_rows_become_the_baseline():
+    entry = _grid([(10, "30", "40"), (11, "", "")])
+    entry.cell_changed(0)
+    assert entry.dirty == {0}
+    _save(entry)(None)
+    assert entry.dirty == set() and entry.rows[0]['loaded'] == (30.0, 40.0)
+    assert entry.saved_events == [(10, 1, {1: 70.0})]
+
+
+def test_a_save_finishing_after_another_grid_loaded_leaves_the_new_grid_alone():
+    entry = _grid([(10, "30", "40"), (11, "20", "20")])
+    entry.cell_changed(0)
+    entry.cell_changed(1)
+    done = _save(entry)
+
+    # Another class is shown before the save returns, with the same row positions
+    entry.rows = _grid([(20, "5", "5"), (21, "", "")], loaded=("JSS2", 1, 1)).rows
+    entry.loaded, entry.dirty = ("JSS2", 1, 1), set()
+    done(None)
+    assert [row['loaded'] for row in entry.rows] == [None, None]
+    assert entry.dirty == set()
+    # The marks were written, so the broadsheet is still told about the students that were saved
+    assert [event[0] for event in entry.saved_events] == [10, 11]
+
+
+def test_rows_are_matched_by_student_not_position():
+    entry = _grid([(10, "30", "40"), (11, "20", "20")])
+    entry.cell_changed(1)
+    done = _save(entry)
+    entry.rows.reverse() # Same grid, different order
+    done(None)
+    assert entry.rows[0]['id'] == 11 and entry.rows[0]['loaded'] == (20.0, 20.0)
+    assert entry.rows[1]['loaded'] is None
+
+
+def test_load_is_disabled_while_busy():
+    entry = _grid([])
+    entry.set_busy(True)
+    assert entry.load_btn.options['state'] == "disabled"
+    entry.set_busy(False)
+    assert entry.load_btn.options['state'] == "normal"
+
+
+def _attendance(session):
+    session.add_all([Student(id=1, student_id="S1", name="Bola Eze", class_name="JSS1"),
+                     Student(id=2, student_id="S2", name="Ada Obi", class_name="JSS1"),
+                     Student(id=3, student_id="S3", name="Chidi Okafor", class_name="JSS2"),
+                     Attendance(student_id=1, date=date(2025, 9, 8), is_present=True),
+                     Attendance(student_id=2, date=date(2025, 9, 9), is_present=False),
+                     Attendance(student_id=3, date=date(2025, 9, 10), is_present=True)])
+    session.commit()
+
+
+def _attendance_tab(session, monkeypatch):
+    """An AttendanceTab showing JSS1 with fake widgets; jobs are captured in tab.jobs"""
+    monkeypatch.setattr(forms.messagebox, "showinfo", lambda *args: None)
+    tab = AttendanceTab.__new__(AttendanceTab)
+    tab.jobs = []
+    tab.executor = SimpleNamespace(submit=lambda job, on_done, **options: tab.jobs.append((job, on_done)))
+    tab.add_date_btn, tab.save_btn, tab.export_btn = FakeWidget(), FakeWidget(), FakeWidget()
+    tab.percentage_labels = {}
+    tab.render_grid = lambda: None
+    tab.show_class("JSS1", *AttendanceTab.fetch_class(session, "JSS1"))
+    return tab
+
+
+def _save_attendance(tab, session):
+    """Saves, runs the write on `session` and returns the rows it stored"""
+    tab.save_attendance()
+    write, done = tab.jobs.pop()
+    write(session)
+    done(None)
+    return sorted((a.student_id, a.date, a.is_present) for a in session.query(Attendance).filter(Attendance.student_id < 3))
+
+
+def test_fetch_class_builds_the_attendance_matrix(session):
+    _attendance(session)
+    students, dates, matrix, recorded = AttendanceTab.fetch_class(session, "JSS1")
+    assert [s.name for s in students] == ["Ada Obi", "Bola Eze"]
+    assert dates == [date(2025, 9, 8), date(2025, 9, 9)] # JSS2's day isn't a column
+    assert matrix.tolist() == [[False, False], [True, False]]
+    assert recorded.tolist() == [[False, True], [True, False]]
+
+
+def test_only_changed_and_unrecorded_cells_are_saved(session, monkeypatch):
+    _attendance(session)
+    tab = _attendance_tab(session, monkeypatch)
+    tab.attendance_matrix[0, 1] = True # Ada, 9 Sept: recorded absent, now present
+    assert _save_attendance(tab, session) == [(1, date(2025, 9, 8), True), (1, date(2025, 9, 9), False),
+                                              (2, date(2025, 9, 8), False), (2, date(2025, 9, 9), True)]
+    assert tab.recorded.all() and np.array_equal(tab.saved_matrix, tab.attendance_matrix)
+
+    # Saving again writes nothing (the cleared table stays empty)
+    session.query(Attendance).delete()
+    session.commit()
+    assert _save_attendance(tab, session) == []
+
+
+def test_a_new_date_column_is_inserted_in_order_and_saved_for_everyone(session, monkeypatch):
+    _attendance(session)
+    tab = _attendance_tab(session, monkeypatch)
+    tab.recorded[:] = True # Only the new column is unsaved
+    monkeypatch.setattr(forms.ctk, "CTkInputDialog", lambda **options: SimpleNamespace(get_input=lambda: " 2025-09-05 "))
+    tab.add_new_attendance_column()
+    assert tab.loaded_dates == [date(2025, 9, 5), date(2025, 9, 8), date(2025, 9, 9)]
+    assert tab.attendance_matrix.shape == tab.saved_matrix.shape == tab.recorded.shape == (2, 3)
+    assert tab.recorded[:, 0].tolist() == [False, False]
+
+    tab.attendance_matrix[1, 0] = True
+    stored = _save_attendance(tab, session)
+    assert [row for row in stored if row[1] == date(2025, 9, 5)] == [(1, date(2025, 9, 5), True), (2, date(2025, 9, 5), False)]
+
+
+class FakeTable:
+    def set_columns(self, headers, widths=None, anchors=None):
+        self.headers = headers
+
+    def set_rows(self, rows):
+        self.rows = [list(row) for row in rows]
+
+    def update_row(self, row, values):
+        self.rows[row] = list(values)
+
+
+def _marks(session):
+    session.add_all([Student(id=1, student_id="S1", name="Bola Eze", class_name="JSS1"),
+                     Student(id=2, student_id="S2", name="Ada Obi", class_name="JSS1"),
+                     Subject(id=1, subject_code="MATH", subject_name="Mathematics"),
+                     Subject(id=2, subject_code="ENG", subject_name="English"),
+                     Mark(student_id=1, subject_id=1, term=1, continuous_assessment=30, exams=40, total=70, grade="B")])
+    session.commit()
+
+
+def _broadsheet(session):
+    """A BroadsheetTab showing JSS1, term 1, on a FakeTable"""
+    tab = BroadsheetTab.__new__(BroadsheetTab)
+    tab.sheet_table, tab.export_btn = FakeTable(), FakeWidget()
+    tab.stats_visible = False
+    tab.show_sheet("JSS1", 1, *BroadsheetTab.fetch_sheet(session, "JSS1", 1))
+    return tab
+
+
+def _mark_rows(ca, exam, term=1):
+    return [{'subject_id': subject_id, 'term': term, 'continuous_assessment': ca, 'exams': exam,
+             'total': ca + exam, 'grade': 'C'} for subject_id in (1, 2)]
+
+
+def test_write_marks_upserts_and_refreshes_the_summary(session):
+    _marks(session)
+    mark_statistics.matrix_cache.get("stale", lambda: "matrix")
+    student = MarksEntryTab.write_marks(session, "S1", _mark_rows(25, 40))
+    assert (student.id, student.name) == (1, "Bola Eze")
+    assert sorted(session.query(Mark.subject_id, Mark.total).filter_by(student_id=1)) == [(1, 65), (2, 65)]
+    summary = session.query(TermSummary).filter_by(student_id=1, term=1).one()
+    assert (summary.subject_count, summary.term_average) == (2, 65)
+    assert not mark_statistics.matrix_cache.entries # Statistics see the new marks
+
+
+def test_write_marks_for_a_missing_student_writes_nothing(session):
+    _marks(session)
+    assert MarksEntryTab.write_marks(session, "GONE", _mark_rows(25, 40)) is None
+    assert session.query(Mark).count() == 1
+
+
+def test_apply_marks_patches_only_the_saved_row(session):
+    _marks(session)
+    tab = _broadsheet(session)
+    assert tab.sheet_table.rows == [["S2", "Ada Obi", "-", "-"], ["S1", "Bola Eze", "70", "-"]]
+
+    tab.apply_marks(2, 1, {2: 55.0}) # Only English was saved
+    assert tab.sheet_table.rows == [["S2", "Ada Obi", "-", "55"], ["S1", "Bola Eze", "70", "-"]]
+
+    # The patched sheet matches a reload after the same save
+    MarksEntryTab.write_marks(session, "S1", _mark_rows(30, 50))
+    tab.apply_marks(1, 1, {1: 80.0, 2: 80.0})
+    session.add(Mark(student_id=2, subject_id=2, term=1, total=55))
+    session.commit()
+    assert tab.sheet_table.rows == _broadsheet(session).sheet_table.rows
+
+
+def test_apply_marks_ignores_other_terms_and_students(session):
+    _marks(session)
+    tab = _broadsheet(session)
+    rows = [list(row) for row in tab.sheet_table.rows]
+    tab.apply_marks(1, 2, {1: 10.0}) # Term 2 isn't shown
+    tab.apply_marks(99, 1, {1: 10.0}) # Not in this class
+    assert tab.sheet_table.rows == rows and tab.broadsheet_data[1] == {1: 70}
@@ -0,0 +1,28 @@
+import os
+
+import pytest
+from importer import run_import, _state_path
+from models import Student
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "students.csv"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("text", ["student_id,name,class_name\n", ""])
+def test_import_of_an_empty_file_succeeds_and_cleans_up(session, tmp_path, text):
+    path = _write(tmp_path, text)
+    assert run_import("students", path, progress=lambda message: None) == (0, 0)
+    assert not os.path.exists(_state_path(path))
+    assert not os.path.exists(path + ".rejects.csv")
+
+
+def test_import_writes_rows_and_rejects(session, tmp_path):
+    path = _write(tmp_path, "student_id,name,class_name\nS1,Ada Obi,JSS1\nS2,,JSS1\n")
+    assert run_import("students", path, progress=lambda message: None) == (1, 1)
+    assert session.query(Student.student_id).all() == [("S1",)]
+    assert not os.path.exists(_state_path(path))
+    with open(path + ".rejects.csv", encoding="utf-8") as rejects:
+        assert "missing name" in rejects.read()
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+from instrumentation import SqlMonitor, StartupTimer, statement_shape, REPEAT_THRESHOLD
+
+
+@pytest.mark.parametrize("statements", [
+    ["SELECT * FROM marks WHERE id IN (?, ?, ?)", "SELECT * FROM marks WHERE id IN (?)"],
+    ["SELECT name FROM students\n  WHERE  id = 7", "SELECT name FROM students WHERE id = 12"],
+    ["SELECT 1 FROM students WHERE name = 'O''Neil'", "SELECT 1 FROM students WHERE name = 'Ada'"],
+    ["SELECT total FROM marks WHERE total > 49.5", "SELECT total FROM marks WHERE total > 70"],
+    ["INSERT INTO t (a) VALUES (?), (?), (?)", "INSERT INTO t (a) VALUES (?)"],
+])
+def test_statements_that_differ_only_in_values_share_a_shape(statements):
+    assert len({statement_shape(s) for s in statements}) == 1
+
+
+def test_shapes_keep_names_and_structure():
+    assert statement_shape("SELECT t1.col2 FROM t1 WHERE id IN (?, ?)") == "SELECT t1.col2 FROM t1 WHERE id IN (?)"
+    assert statement_shape("SELECT a FROM t WHERE id = ?") != statement_shape("SELECT b FROM t WHERE id = ?")
+    assert statement_shape("INSERT INTO t (a, b) VALUES (?, ?)") == "INSERT INTO t (a, b) VALUES (?)"
+
+
+@pytest.fixture
+def monitored(tmp_path):
+    monitor = SqlMonitor(slow_ms=0, log_path=str(tmp_path / "sql.jsonl"))
+    return monitor, monitor.install(create_engine("sqlite://"))
+
+
+def test_repeated_statements_in_one_action_are_flagged(monitored):
+    monitor, engine = monitored
+    with monitor.action("student_details"), engine.connect() as connection:
+        for i in range(REPEAT_THRESHOLD):
+            connection.execute(text(f"SELECT {i}"))
+        with monitor.action("nested"): # Folds into the outer action
+            connection.execute(text("SELECT 'x'"))
+
+    [stats] = monitor.recent()
+    assert stats.name == "student_details" and stats.queries == REPEAT_THRESHOLD + 1
+    assert stats.repeated() == [("SELECT ?", REPEAT_THRESHOLD + 1)]
+    assert len(stats.slow) == stats.queries # slow_ms=0 reports every statement
+
+    [line] = open(monitor.log_path, encoding="utf-8").read().splitlines()
+    logged = json.loads(line)
+    assert logged["action"] == "student_details" and logged["repeated"][0]["count"] == REPEAT_THRESHOLD + 1
+
+
+def test_statements_outside_an_action_are_unattributed(monitored):
+    monitor, engine = monitored
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    assert monitor.recent() == [] and monitor.unattributed_queries >= 1
+    monitor.clear()
+    assert monitor.unattributed_queries == 0
+
+
+def test_below_the_threshold_nothing_is_repeated(monitored):
+    monitor, engine = monitored
+    with monitor.action("roster"), engine.connect() as connection:
+        for i in range(REPEAT_THRESHOLD - 1):
+            connection.execute(text(f"SELECT {i}"))
+    assert monitor.recent()[0].repeated() == []
+
+
+def test_startup_timer_checkpoints():
+    timer = StartupTimer(started=0.0)
+    timer.checkpoints = [("imports", 0.1), ("window", 0.25)]
+    assert list(timer.to_dict()["checkpoints_ms"].items()) == [("imports", 100.0), ("window", 250.0)]
+    assert "(+150.0)" in timer.report()
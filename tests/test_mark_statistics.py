@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+import mark_statistics
+from mark_statistics import subject_statistics, z_scores, load_matrix, marks_changed, year_group
+from models import Student, Subject, Mark
+
+NAN = np.nan
+
+
+def test_missing_marks_are_left_out_of_every_statistic():
+    totals = np.array([[80, NAN, 40], [60, NAN, NAN], [NAN, NAN, 45], [70, NAN, 50]], dtype=float)
+    stats = subject_statistics(totals)
+    assert stats['count'].tolist() == [3, 0, 3]
+    assert stats['mean'][0] == pytest.approx(70) and stats['mean'][2] == pytest.approx(45)
+    assert stats['median'][0] == 70 and stats['std'][0] == pytest.approx(np.std([80, 60, 70]))
+    assert (stats['min'][2], stats['max'][2]) == (40, 50)
+    assert stats['pass_rate'].tolist()[0] == 100 and stats['pass_rate'][2] == pytest.approx(100 / 3)
+    assert stats['grades']['F'].tolist() == [0, 0, 2] # A missing mark isn't an F
+    # A subject with no marks at all is NaN, not 0
+    assert all(np.isnan(stats[key][1]) for key in ('mean', 'median', 'std', 'min', 'max', 'pass_rate'))
+
+
+def test_empty_matrices():
+    stats = subject_statistics(np.full((0, 2), NAN))
+    assert stats['count'].tolist() == [0, 0] and np.isnan(stats['median']).all()
+
+
+def test_z_scores_of_a_zero_variance_subject_are_nan():
+    totals = np.array([[70, 40], [70, 60], [70, NAN]], dtype=float)
+    z = z_scores(totals)
+    assert np.isnan(z[:, 0]).all()
+    assert z[:2, 1].tolist() == pytest.approx([-1, 1]) and np.isnan(z[2, 1])
+
+
+def test_year_group():
+    assert [year_group(name) for name in ("JSS1A", "JSS1-2", "JSS 1", "SSS10", "Nursery")] == \
+        ["JSS1", "JSS1", "JSS1", "SSS10", "Nursery"]
+
+
+def test_matrices_are_cached_until_marks_change(session):
+    marks_changed()
+    session.add_all([Student(id=1, student_id="S1", name="Ada Obi", class_name="JSS1A"),
+                     Student(id=2, student_id="S2", name="Bola Eze", class_name="JSS1B"),
+                     Student(id=3, student_id="S3", name="Chidi Okafor", class_name="JSS10"),
+                     Subject(id=1, subject_code="MATH", subject_name="Mathematics"),
+                     Mark(student_id=1, subject_id=1, term=1, total=70),
+                     Mark(student_id=3, subject_id=1, term=1, total=90)])
+    session.commit()
+
+    matrix = load_matrix(session, 1, year="JSS1")
+    assert [s.id for s in matrix.students] == [1, 2] # JSS10 is not in JSS1
+    assert np.array_equal(matrix.totals, [[70], [NAN]], equal_nan=True)
+    assert not matrix.totals.flags.writeable
+
+    session.add(Mark(student_id=2, subject_id=1, term=1, total=55))
+    session.commit()
+    assert load_matrix(session, 1, year="JSS1") is matrix # Still cached
+    marks_changed()
+    assert load_matrix(session, 1, year="JSS1").totals[:, 0].tolist() == [70, 55]
+    assert mark_statistics.matrix_cache.stats()['hits'] >= 1
@@ -0,0 +1,120 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from models import Student, Subject, Mark, Attendance, AttendanceReject, bulk_upsert, merge_duplicate_marks, normalize_attendance_dates, session_scope
+
+MARK_KEY = ['student_id', 'subject_id', 'term']
+
+
+def _student_and_subject(session):
+    session.add_all([Student(id=1, student_id="S1", name="Ada Obi", class_name="JSS1"),
+                     Subject(id=1, subject_code="MATH", subject_name="Mathematics")])
+    session.commit()
+
+
+def test_bulk_upsert_overwrites_an_existing_mark(session):
+    _student_and_subject(session)
+    mark = {'student_id': 1, 'subject_id': 1, 'term': 1, 'continuous_assessment': 20, 'exams': 30, 'total': 50, 'grade': 'D'}
+    bulk_upsert(session, Mark, [mark], MARK_KEY)
+    bulk_upsert(session, Mark, [dict(mark, exams=55, total=75, grade='B')], MARK_KEY)
+    session.commit()
+    assert session.query(Mark.exams, Mark.total, Mark.grade).all() == [(55, 75, 'B')]
+
+
+def test_bulk_upsert_updates_only_the_given_columns(session):
+    _student_and_subject(session)
+    mark = {'student_id': 1, 'subject_id': 1, 'term': 1, 'continuous_assessment': 20, 'exams': 30, 'total': 50, 'grade': 'D'}
+    bulk_upsert(session, Mark, [mark], MARK_KEY)
+    bulk_upsert(session, Mark, [dict(mark, exams=55, total=75, grade='B')], MARK_KEY, update_columns=['exams'])
+    session.commit()
+    assert session.query(Mark.exams, Mark.total, Mark.grade).all() == [(55, 50, 'D')]
+
+
+def test_merge_duplicate_marks_keeps_the_newest_row(session):
+    _student_and_subject(session)
+    # A marks table from before the unique constraint
+    session.execute(text("DROP TABLE marks"))
+    session.execute(text(
+        "CREATE TABLE marks (id INTEGER PRIMARY KEY, student_id INTEGER NOT NULL, subject_id INTEGER NOT NULL, "
+        "term INTEGER NOT NULL, continuous_assessment FLOAT, exams FLOAT, total FLOAT, grade VARCHAR(2))"
+    ))
+    session.execute(text(
+        "INSERT INTO marks (id, student_id, subject_id, term, total) VALUES "
+        "(1, 1, 1, 1, 40), (2, 1, 1, 1, 60), (3, 1, 1, 1, 70), (4, 1, 1, 2, 55)"
+    ))
+
+    assert merge_duplicate_marks(session) == 2
+    assert session.query(Mark.id, Mark.term, Mark.total).order_by(Mark.id).all() == [(3, 1, 70), (4, 2, 55)]
+    assert merge_duplicate_marks(session) == 0
+    with pytest.raises(IntegrityError): # The unique index is in place now
+        session.execute(text("INSERT INTO marks (student_id, subject_id, term, total) VALUES (1, 1, 2, 90)"))
+
+
+def _stored_dates(session, rows):
+    session.add_all([Student(id=1, student_id="S1", name="Ada Obi", class_name="JSS1"),
+                     Student(id=2, student_id="S2", name="Bola Eze", class_name="JSS1")])
+    session.flush()
+    session.execute(text("INSERT INTO attendance (student_id, date, is_present) VALUES (:s, :d, :p)"),
+                    [{'s': s, 'd': d, 'p': p} for s, d, p in rows])
+    session.commit()
+
+
+def _attendance(session):
+    return session.query(Attendance.student_id, Attendance.date, Attendance.is_present).order_by(
+        Attendance.student_id, Attendance.date).all()
+
+
+def test_normalize_attendance_dates_day_first_column(session):
+    _stored_dates(session, [(1, '2025-02-03', True), (1, '03/02/2025', False), (1, '2025-02-04 00:00:00', True),
+                            (2, '03/02/2025', True), (2, '17-02-2025', False)])
+    assert normalize_attendance_dates(session) == (3, 0)
+    # 03/02 is read day first, as 17-02 shows the column is; student 1's duplicate of 3 Feb goes
+    assert _attendance(session) == [(1, date(2025, 2, 3), True), (1, date(2025, 2, 4), True),
+                                    (2, date(2025, 2, 3), True), (2, date(2025, 2, 17), False)]
+    assert normalize_attendance_dates(session) == (0, 0)
+
+
+def test_normalize_attendance_dates_month_first_column(session):
+    _stored_dates(session, [(1, '04/13/2025', True), (1, '03/04/2025', False)])
+    assert normalize_attendance_dates(session) == (2, 0)
+    assert _attendance(session) == [(1, date(2025, 3, 4), False), (1, date(2025, 4, 13), True)]
+
+
+def test_normalize_attendance_dates_rejects_mixed_orders_and_unreadable_dates(session):
+    _stored_dates(session, [(1, '13/04/2025', True), (1, '04/14/2025', True), (2, '03/04/2025', False),
+                            (2, 'last monday', True), (2, '2025-05-01', True)])
+    assert normalize_attendance_dates(session) == (0, 4)
+    assert _attendance(session) == [(2, date(2025, 5, 1), True)]
+    rejects = session.query(AttendanceReject.student_id, AttendanceReject.date, AttendanceReject.reason).order_by(
+        AttendanceReject.date).all()
+    assert [(r.student_id, r.date) for r in rejects] == [
+        (2, '03/04/2025'), (1, '04/14/2025'), (1, '13/04/2025'), (2, 'last monday')]
+    assert rejects[-1].reason == "unrecognised date" and "both" in rejects[0].reason
+
+
+def test_session_scope_commits_and_closes(session):
+    with session_scope() as scoped:
+        student = Student(student_id="S1", name="Ada Obi", class_name="JSS1")
+        scoped.add(student)
+    assert inspect(student).detached # Closed: nothing loaded in the block outlives it
+    assert session.query(Student.name).all() == [("Ada Obi",)]
+
+
+def test_session_scope_rolls_back_and_reraises(session):
+    with pytest.raises(ValueError):
+        with session_scope() as scoped:
+            scoped.add(Student(student_id="S1", name="Ada Obi", class_name="JSS1"))
+            scoped.flush()
+            raise ValueError("failed after the flush")
+    assert session.query(Student).count() == 0
+
+
+def test_session_scope_rolls_back_failed_commits(session):
+    _student_and_subject(session)
+    with pytest.raises(IntegrityError):
+        with session_scope() as scoped:
+            scoped.add(Subject(subject_code="ENG", subject_name="English"))
+            scoped.add(Student(student_id="S1", name="Copy", class_name="JSS1")) # Duplicate student_id
+    assert session.query(Subject.subject_code).all() == [("MATH",)]
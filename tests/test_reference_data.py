@@ -0,0 +1,98 @@
+import pytest
+import reference_data
+from reference_data import ReferenceCache
+from models import Student, Subject
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(reference_data.time, "monotonic", clock)
+    return clock
+
+
+def _counting(value):
+    calls = []
+    def loader():
+        calls.append(value)
+        return value
+    return loader, calls
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = ReferenceCache(ttl=10)
+    loader, calls = _counting("a")
+    cache.get("k", loader)
+    clock.now += 9.9
+    cache.get("k", loader)
+    assert len(calls) == 1
+    clock.now += 0.2
+    cache.get("k", loader)
+    assert len(calls) == 2
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'evictions': 0, 'entries': 1, 'hit_rate': pytest.approx(1 / 3)}
+
+
+def test_the_least_recently_used_entry_is_evicted(clock):
+    cache = ReferenceCache(ttl=10, max_entries=2)
+    cache.get("a", lambda: 1)
+    cache.get("b", lambda: 2)
+    cache.get("a", lambda: 1) # "b" is now the least recently used
+    cache.get("c", lambda: 3)
+    assert list(cache.entries) == ["a", "c"] and cache.evictions == 1
+
+
+def test_a_load_that_races_an_invalidation_is_not_stored(clock):
+    cache = ReferenceCache(ttl=10)
+    def stale_loader():
+        cache.invalidate("k") # e.g. a write commits while the query runs
+        return "stale"
+    assert cache.get("k", stale_loader) == "stale" # The caller still gets its result
+    assert "k" not in cache.entries
+    assert cache.get("k", lambda: "fresh") == "fresh"
+
+
+def test_invalidate_drops_the_given_keys_or_everything(clock):
+    cache = ReferenceCache(ttl=10)
+    for key in "abc":
+        cache.get(key, lambda: key)
+    cache.invalidate("a", "missing")
+    assert list(cache.entries) == ["b", "c"]
+    cache.invalidate()
+    assert not cache.entries
+
+
+def test_a_zero_ttl_disables_caching(clock):
+    cache = ReferenceCache(ttl=0)
+    loader, calls = _counting("a")
+    cache.get("k", loader)
+    cache.get("k", loader)
+    assert len(calls) == 2 and not cache.entries
+
+
+def test_helpers_query_once_until_their_data_changes(session):
+    session.add_all([Student(student_id="S1", name="Ada Obi", class_name="JSS1"),
+                     Student(student_id="S2", name="Bola Eze", class_name="JSS1"),
+                     Subject(subject_code="MATH", subject_name="Mathematics")])
+    session.commit()
+    assert reference_data.class_names(session) == ("JSS1",)
+    assert reference_data.class_counts(session) == {"JSS1": 2}
+    assert [s.subject_code for s in reference_data.subjects(session)] == ["MATH"]
+
+    session.add_all([Student(student_id="S3", name="Chidi Okafor", class_name="JSS2"),
+                     Subject(subject_code="ENG", subject_name="English")])
+    session.commit()
+    assert reference_data.class_names(session) == ("JSS1",) # Cached
+    reference_data.students_changed()
+    assert reference_data.class_names(session) == ("JSS1", "JSS2")
+    assert reference_data.class_counts(session) == {"JSS1": 2, "JSS2": 1}
+    assert len(reference_data.subjects(session)) == 1 # Subjects weren't invalidated
+    reference_data.subjects_changed()
+    assert len(reference_data.subjects(session)) == 2
@@ -0,0 +1,54 @@
+from datetime import date
+
+import models
+from attendance_store import AttendanceBitmaps
+from calculations import TermSummaryCalculator
+from models import Student, Subject, Mark, Attendance, SchoolDay
+from report_cards import fetch_class_cards, render_html
+
+STARTS = "2025-09-08,2026-01-05,2026-04-20"
+
+
+def _class(session):
+    session.add_all([Student(id=1, student_id="S1", name="Ada Obi", class_name="JSS1"),
+                     Student(id=2, student_id="S2", name="Bola Eze", class_name="JSS1"),
+                     Subject(id=1, subject_code="MATH", subject_name="Mathematics")])
+    session.add_all([Mark(student_id=1, subject_id=1, term=2, continuous_assessment=30, exams=40, total=70, grade='B'),
+                     Mark(student_id=2, subject_id=1, term=2, continuous_assessment=35, exams=50, total=85, grade='A')])
+    # Term 2 attendance, plus a term 1 day that must not be counted on the term 2 card
+    session.add_all(Attendance(student_id=s, date=day, is_present=present) for s, day, present in [
+        (1, date(2026, 1, 5), True), (1, date(2026, 1, 6), False), (2, date(2026, 1, 5), True),
+        (2, date(2026, 1, 6), True), (1, date(2025, 12, 1), True)])
+    TermSummaryCalculator.refresh_students(session, [1, 2])
+    session.flush()
+
+
+def _attendance_line(card):
+    return [line for line in render_html(card).splitlines() if "Attendance" in line][0]
+
+
+def test_cards_pair_term_marks_with_the_same_terms_attendance(session, monkeypatch):
+    monkeypatch.setattr(models, "TERM_STARTS", STARTS)
+    _class(session)
+    AttendanceBitmaps.rebuild(session)
+    cards = {card['student_id']: card for card in fetch_class_cards(session, "JSS1", 2)}
+    assert cards["S1"]['attendance'] == (1, 2, 50.0) and cards["S2"]['attendance'] == (2, 2, 100.0)
+    assert (cards["S1"]['position'], cards["S2"]['position']) == (2, 1)
+
+
+def test_cards_without_a_calendar_show_attendance_not_available(session, monkeypatch):
+    monkeypatch.setattr(models, "TERM_STARTS", "")
+    _class(session)
+    cards = fetch_class_cards(session, "JSS1", 2)
+    assert len(cards) == 2 and "not available" in _attendance_line(cards[0])
+
+
+def test_stale_bitmaps_do_not_stop_the_run(session, monkeypatch):
+    monkeypatch.setattr(models, "TERM_STARTS", STARTS)
+    _class(session)
+    AttendanceBitmaps.rebuild(session)
+    session.add(SchoolDay(date=date(2026, 1, 7), term=2)) # A day the bitmaps don't cover yet
+    session.flush()
+    cards = fetch_class_cards(session, "JSS1", 2)
+    assert [card['attendance'] for card in cards] == [None, None]
+    assert "not available" in _attendance_line(cards[0])
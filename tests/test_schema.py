@@ -0,0 +1,27 @@
+import main
+from models import SCHEMA_VERSION, SchemaVersion, Subject, engine, get_schema_version, set_schema_version, \
+    _read_version_row, _write_version_row
+
+
+def test_prepare_database_upgrades_once(session):
+    set_schema_version(engine, 0)
+    assert main.prepare_database()
+    assert get_schema_version(engine) == SCHEMA_VERSION
+    assert session.query(Subject).count() == 20
+    assert not main.prepare_database()
+
+
+def test_version_row_is_created_then_overwritten(session):
+    with engine.begin() as connection:
+        connection.execute(SchemaVersion.__table__.delete())
+        assert _read_version_row(connection) is None
+        _write_version_row(connection, 3)
+        _write_version_row(connection, SCHEMA_VERSION)
+        assert _read_version_row(connection) == SCHEMA_VERSION
+        assert connection.execute(SchemaVersion.__table__.select()).all() == [(1, SCHEMA_VERSION)]
+
+
+def test_missing_version_table_reads_as_no_version(session):
+    SchemaVersion.__table__.drop(engine)
+    with engine.connect() as connection:
+        assert _read_version_row(connection) is None
@@ -0,0 +1,58 @@
+import os
+import sys
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import seed_data
+from run_benchmarks import compare
+
+TABLES = ["students", "marks", "attendance", "fees", "term_summary", "school_days", "attendance_bitmaps"]
+
+
+def _seed(tmp_path, name, **options):
+    url = f"sqlite:///{tmp_path / name}"
+    counts = seed_data.generate(url, classes=2, students=5, terms=2, days=4, **options)
+    engine = create_engine(url)
+    try:
+        with engine.connect() as connection:
+            rows = {table: connection.execute(text(f"SELECT * FROM {table} ORDER BY id")).all() for table in TABLES}
+    finally:
+        engine.dispose()
+    return counts, rows
+
+
+def test_the_same_seed_gives_the_same_rows(tmp_path):
+    counts, rows = _seed(tmp_path, "a.db")
+    assert _seed(tmp_path, "b.db") == (counts, rows)
+    assert _seed(tmp_path, "c.db", seed=7)[1]["marks"] != rows["marks"]
+
+
+def test_counts_match_the_rows_written(tmp_path):
+    counts, rows = _seed(tmp_path, "a.db")
+    assert counts["students"] == len(rows["students"]) == 10
+    assert counts["attendance"] == len(rows["attendance"]) == 10 * 2 * 4
+    assert counts["fees"] == len(rows["fees"]) == 10 * 2
+    assert counts["marks"] == len(rows["marks"])
+    assert counts["attendance_bitmaps"] == len(rows["attendance_bitmaps"]) == 10 * 2
+    assert len(rows["school_days"]) == 2 * 4
+    assert {row.class_name for row in rows["students"]} == {"JSS1", "JSS2"}
+
+
+def test_without_fees(tmp_path):
+    counts, rows = _seed(tmp_path, "a.db", fees=False)
+    assert counts["fees"] == 0 and rows["fees"] == []
+
+
+def test_school_days_are_weekdays_from_the_term_start():
+    days = seed_data.school_days(1, 6)
+    assert days[0] == seed_data.TERM_START[1] and len(days) == 6
+    assert all(day.weekday() < 5 for day in days)
+    assert days == sorted(set(days))
+
+
+def test_compare_reports_only_paths_beyond_the_threshold():
+    baseline = {"results": {"small": {"seconds": {"fast": 0.010, "slow": 0.010}}}}
+    results = {"small": {"seconds": {"fast": 0.014, "slow": 0.016, "new": 1.0}},
+               "large": {"seconds": {"fast": 9.0}}} # No baseline to compare with
+    assert compare(results, baseline, 0.5) == ["small/slow: 16.00 ms vs baseline 10.00 ms"]
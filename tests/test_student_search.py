@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import text
+from models import Student, engine
+from student_search import FTS_TABLE, ensure_search_index, search_students
+
+STUDENTS = [(1, "JSS1/2024/007", "Ada Obi"), (2, "JSS2-2023-118", "Adaeze Okafor"), (3, "SSS1_2024_042", "Bola Ade-Bello"),
+            (4, "B000104", "Chidi O'Neil"), (5, "B000105", "Obi Musa")]
+
+
+@pytest.fixture(params=["fts", "like"])
+def search_session(request, session):
+    """The test session, with students, searched through the FTS5 index or the LIKE fallback"""
+    if request.param == "fts":
+        assert ensure_search_index(engine)
+    session.add_all(Student(id=i, student_id=code, name=name, class_name="JSS1") for i, code, name in STUDENTS)
+    session.commit()
+    return session
+
+
+def _ids(session, search):
+    return [row.id for row in search_students(session, search)]
+
+
+@pytest.mark.parametrize("search, expected", [
+    ("ada", [1, 2]),                # start of any word of the name
+    ("obi", [1, 5]),
+    ("ada ob", [1]),                # every word must match
+    ("OBI ADA", [1]),
+    ("neil", [4]),                  # after an apostrophe
+    ("bello", [3]),                 # after a hyphen
+    ("2024", [1, 3]),               # a part of the student ID
+    ("118", [2]),
+    ("jss", [1, 2]),
+    ("b0001", [4, 5]),
+    ("042", [3]),                   # after an underscore
+    ("da", []),                     # the middle of a word doesn't match
+    ("024", []),
+])
+def test_fts_and_like_match_the_same_students(search_session, search, expected):
+    assert sorted(_ids(search_session, search)) == expected
+
+
+def test_no_words_returns_everyone_in_name_order(search_session):
+    assert _ids(search_session, " ,. ") == [1, 2, 3, 4, 5]
+    assert [row.id for row in search_students(search_session, "", limit=2)] == [1, 2]
+
+
+def test_the_index_follows_inserts_renames_and_deletes(session):
+    assert ensure_search_index(engine)
+    session.add(Student(id=1, student_id="S1", name="Ada Obi", class_name="JSS1"))
+    session.commit()
+    assert _ids(session, "ada") == [1]
+
+    student = session.get(Student, 1)
+    student.name, student.student_id = "Funmi Obi", "JSS3/2025/001"
+    session.commit()
+    assert _ids(session, "ada") == [] and _ids(session, "funmi") == [1] and _ids(session, "2025") == [1]
+    assert _ids(session, "s1") == []
+
+    session.delete(student)
+    session.commit()
+    assert _ids(session, "funmi") == []
+    assert session.execute(text(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH 'funmi'")).scalar() == 0
+
+
+def test_rebuilding_the_index_picks_up_existing_students(session):
+    session.add(Student(id=1, student_id="S1", name="Ada Obi", class_name="JSS1"))
+    session.commit()
+    assert ensure_search_index(engine)
+    assert _ids(session, "obi") == [1]
@@ -0,0 +1,96 @@
+import pytest
+from widgets import VirtualTable
+
+
+class FakeCanvas:
+    """Just enough of tk.Canvas: text items with coords, text and state"""
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.items = {}
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def configure(self, **options):
+        pass
+
+    def create_text(self, x, y, **options):
+        item = len(self.items) + 1
+        self.items[item] = {'coords': (x, y), 'state': "normal", **options}
+        return item
+
+    def coords(self, item, x, y):
+        self.items[item]['coords'] = (x, y)
+
+    def itemconfigure(self, item, **options):
+        self.items[item].update(options)
+
+    def shown(self):
+        """Visible texts, top to bottom then left to right"""
+        visible = [item for item in self.items.values() if item['state'] == "normal"]
+        return [item['text'] for item in sorted(visible, key=lambda item: (item['coords'][1], item['coords'][0]))]
+
+
+class FakeScrollbar:
+    def set(self, first, last):
+        self.view = (first, last)
+
+
+def _table(rows, width=200, height=140, columns=6, frozen=1):
+    """A VirtualTable on fake canvases: 80px columns, 28px rows, so a 200x140 body shows 3 columns and 6 rows"""
+    table = VirtualTable.__new__(VirtualTable)
+    table.row_height, table.font, table.header_font = 28, None, None
+    table.frozen_columns, table.rows, table.x_offset, table.y_offset = frozen, [], 0, 0
+    table.corner, table.header = FakeCanvas(80, 28), FakeCanvas(width, 28)
+    table.frozen, table.body = FakeCanvas(80, height), FakeCanvas(width, height)
+    table._pools = {canvas: [] for canvas in (table.corner, table.header, table.frozen, table.body)}
+    table.v_scroll, table.h_scroll = FakeScrollbar(), FakeScrollbar()
+    table._text_color = "black"
+    table.set_columns([f"H{c}" for c in range(columns)], anchors=["w"] + ["center"] * (columns - 1))
+    table.set_rows([[f"r{r}c{c}" for c in range(columns)] for r in range(rows)])
+    return table
+
+
+def test_only_the_cells_in_view_are_drawn():
+    table = _table(10_000)
+    assert table.frozen.shown() == [f"r{r}c0" for r in range(6)]
+    assert table.body.shown()[:3] == ["r0c1", "r0c2", "r0c3"]
+    assert len(table.body.items) == 6 * 3 and table.header.shown() == ["H1", "H2", "H3"]
+
+
+def test_scrolling_recycles_the_pooled_items():
+    table = _table(10_000)
+    pooled = len(table.body.items)
+    table._yview("moveto", 1.0)
+    assert table.y_offset == 10_000 * 28 - 140
+    assert table.frozen.shown()[-1] == "r9999c0"
+    table._scroll_x(80)
+    assert table.body.shown()[:3] == ["r9995c2", "r9995c3", "r9995c4"]
+    assert table.frozen.shown()[0] == "r9995c0" and table.corner.shown() == ["H0"] # Frozen parts stay put
+    assert len(table.body.items) <= pooled + 6 # At most one more partly visible column
+
+
+def test_spare_items_are_hidden_when_the_view_shrinks():
+    table = _table(10_000)
+    table.set_rows([["only", "row", "", "", "", ""]])
+    assert table.frozen.shown() == ["only"] and table.body.shown() == ["row", "", ""]
+    assert table.v_scroll.view == (0.0, 1.0)
+
+
+def test_update_row_redraws_the_row():
+    table = _table(3)
+    table.update_row(1, ["Ada", "70", "80"]) # Short rows leave the other cells blank
+    assert table.frozen.shown() == ["r0c0", "Ada", "r2c0"]
+    assert table.body.shown()[3:6] == ["70", "80", ""]
+
+
+@pytest.mark.parametrize("args, expected", [
+    (("moveto", 0.5), 500), (("moveto", 2), 900), (("moveto", -1), 0),
+    (("scroll", 2, "units"), 156), (("scroll", 1, "pages"), 300), (("scroll", -50, "units"), 0),
+])
+def test_view_offset_follows_the_tk_scroll_protocol(args, expected):
+    assert VirtualTable._view_offset(args, 100, 1000, 200, 28, 900) == expected
@@ -0,0 +1,221 @@
+import tkinter as tk
+from bisect import bisect_left, bisect_right
+import customtkinter as ctk
+
+
+class VirtualTable(ctk.CTkFrame):
+    """Scrollable table that only draws the cells currently in view.
+
+    Cells are canvas text items kept in a pool and recycled as the view scrolls, so the
+    number of items depends on the window size, not on the number of rows or columns.
+    The header row and the first `frozen_columns` columns stay in place while the rest
+    of the table scrolls.
+    """
+
+    def __init__(self, parent, headers=(), frozen_columns=0, column_widths=None, row_height=28,
+                 font=("Roboto", 12), header_font=("Roboto", 12, "bold"), **kwargs):
+        super().__init__(parent, **kwargs)
+        self.row_height = row_height
+        self.font = font
+        self.header_font = header_font
+        self.frozen_columns = frozen_columns
+        self.rows = []
+        self.x_offset = 0 # Pixels scrolled horizontally (scrolling columns only)
+        self.y_offset = 0 # Pixels scrolled vertically
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(1, weight=1)
+
+        # corner | header
+        # frozen | body
+        self.corner = self._make_canvas(0, 0)
+        self.header = self._make_canvas(0, 1)
+        self.frozen = self._make_canvas(1, 0)
+        self.body = self._make_canvas(1, 1)
+        self._pools = {canvas: [] for canvas in (self.corner, self.header, self.frozen, self.body)}
+
+        self.v_scroll = ctk.CTkScrollbar(self, orientation="vertical", command=self._yview)
+        self.v_scroll.grid(row=1, column=2, sticky="ns")
+        self.h_scroll = ctk.CTkScrollbar(self, orientation="horizontal", command=self._xview)
+        self.h_scroll.grid(row=2, column=1, sticky="ew")
+
+        for canvas in (self.body, self.frozen):
+            canvas.bind("<MouseWheel>", self._on_mousewheel)
+            canvas.bind("<Shift-MouseWheel>", self._on_shift_mousewheel)
+            canvas.bind("<Button-4>", lambda e: self._scroll_rows(-3))
+            canvas.bind("<Button-5>", lambda e: self._scroll_rows(3))
+            canvas.bind("<Shift-Button-4>", lambda e: self._scroll_x(-60))
+            canvas.bind("<Shift-Button-5>", lambda e: self._scroll_x(60))
+        self.body.bind("<Configure>", lambda e: self.redraw())
+
+        self._apply_colors()
+        self.set_columns(headers, column_widths)
+
+    def _make_canvas(self, row, column):
+        canvas = tk.Canvas(self, highlightthickness=0, bd=0, width=0, height=0)
+        canvas.grid(row=row, column=column, sticky="nsew")
+        return canvas
+
+    # --- Data ---
+
+    def set_columns(self, headers, column_widths=None, anchors=None):
+        """headers: list of column titles. column_widths / anchors: per column, optional."""
+        self.headers = list(headers)
+        widths = list(column_widths) if column_widths else [80] * len(self.headers)
+        self.anchors = list(anchors) if anchors else ["center"] * len(self.headers)
+
+        # Left edge of every column, separately for the frozen and scrolling parts
+        self.frozen_widths = widths[:self.frozen_columns]
+        self.scroll_widths = widths[self.frozen_columns:]
+        self.frozen_x = self._edges(self.frozen_widths)
+        self.scroll_x = self._edges(self.scroll_widths)
+
+        frozen_width = self.frozen_x[-1]
+        self.corner.configure(width=frozen_width, height=self.row_height)
+        self.frozen.configure(width=frozen_width)
+        self.header.configure(height=self.row_height)
+        self.x_offset = 0
+        self.redraw()
+
+    def set_rows(self, rows):
+        """rows: list of row value lists (already formatted as text), one per table row."""
+        self.rows = rows
+        self.y_offset = 0
+        self.redraw()
+
+    def update_row(self, row, values):
+        self.rows[row] = list(values)
+        self.redraw()
+
+    @staticmethod
+    def _edges(widths):
+        edges = [0]
+        for width in widths:
+            edges.append(edges[-1] + width)
+        return edges
+
+    # --- Scrolling ---
+
+    def _max_y(self):
+        return max(0, len(self.rows) * self.row_height - self.body.winfo_height())
+
+    def _max_x(self):
+        return max(0, self.scroll_x[-1] - self.body.winfo_width())
+
+    def _yview(self, *args):
+        self.y_offset = self._view_offset(args, self.y_offset, len(self.rows) * self.row_height,
+                                          self.body.winfo_height(), self.row_height, self._max_y())
+        self.redraw()
+
+    def _xview(self, *args):
+        self.x_offset = self._view_offset(args, self.x_offset, self.scroll_x[-1],
+                                          self.body.winfo_width(), 40, self._max_x())
+        self.redraw()
+
+    @staticmethod
+    def _view_offset(args, offset, content, viewport, unit, maximum):
+        # Same protocol as Tk's xview/yview: ('moveto', fraction) or ('scroll', n, 'units'|'pages')
+        if args[0] == "moveto":
+            offset = float(args[1]) * content
+        elif args[0] == "scroll":
+            step = viewport if args[2] == "pages" else unit
+            offset += int(args[1]) * step
+        return int(min(max(offset, 0), maximum))
+
+    def _scroll_rows(self, count):
+        self.y_offset = min(max(self.y_offset + count * self.row_height, 0), self._max_y())
+        self.redraw()
+
+    def _scroll_x(self, pixels):
+        self.x_offset = min(max(self.x_offset + pixels, 0), self._max_x())
+        self.redraw()
+
+    def _on_mousewheel(self, event):
+        self._scroll_rows(-3 if event.delta > 0 else 3)
+
+    def _on_shift_mousewheel(self, event):
+        self._scroll_x(-60 if event.delta > 0 else 60)
+
+    # --- Drawing ---
+
+    def redraw(self):
+        body_width = self.body.winfo_width()
+        body_height = self.body.winfo_height()
+        rh = self.row_height
+
+        # Visible row and scrolling-column ranges
+        first_row = self.y_offset // rh
+        last_row = min(len(self.rows), (self.y_offset + body_height) // rh + 1)
+        first_col = max(0, bisect_right(self.scroll_x, self.x_offset) - 1)
+        last_col = min(len(self.scroll_widths), bisect_left(self.scroll_x, self.x_offset + body_width))
+
+        scroll_cols = [(c, self.scroll_x[c] - self.x_offset, self.scroll_widths[c]) for c in range(first_col, last_col)]
+        frozen_cols = [(c, self.frozen_x[c], self.frozen_widths[c]) for c in range(self.frozen_columns)]
+
+        def cells(columns, offset, row_range, value):
+            items = []
+            for r in row_range:
+                y = (r - first_row) * rh - self.y_offset % rh + rh / 2 if r is not None else rh / 2
+                for c, x, width in columns:
+                    column = c + offset
+                    items.append((x, y, width, self.anchors[column], value(r, column)))
+            return items
+
+        row_range = range(first_row, last_row)
+        cell_text = lambda r, c: self.rows[r][c] if c < len(self.rows[r]) else ""
+        header_text = lambda r, c: self.headers[c]
+
+        self._draw(self.body, cells(scroll_cols, self.frozen_columns, row_range, cell_text), self.font)
+        self._draw(self.frozen, cells(frozen_cols, 0, row_range, cell_text), self.font)
+        self._draw(self.header, cells(scroll_cols, self.frozen_columns, [None], header_text), self.header_font)
+        self._draw(self.corner, cells(frozen_cols, 0, [None], header_text), self.header_font)
+
+        # Scrollbars show the visible fraction
+        total_height = len(self.rows) * rh
+        total_width = self.scroll_x[-1]
+        if total_height > 0 and body_height > 0:
+            self.v_scroll.set(self.y_offset / total_height, min(1.0, (self.y_offset + body_height) / total_height))
+        else:
+            self.v_scroll.set(0, 1)
+        if total_width > 0 and body_width > 0:
+            self.h_scroll.set(self.x_offset / total_width, min(1.0, (self.x_offset + body_width) / total_width))
+        else:
+            self.h_scroll.set(0, 1)
+
+    def _draw(self, canvas, cells, font):
+        # Reuse pooled text items; create more only when the view grows, hide the spare ones
+        pool = self._pools[canvas]
+        while len(pool) < len(cells):
+            pool.append(canvas.create_text(0, 0, font=font, fill=self._text_color))
+
+        for item, (x, y, width, anchor, text) in zip(pool, cells):
+            if anchor == "w":
+                canvas.coords(item, x + 6, y)
+            elif anchor == "e":
+                canvas.coords(item, x + width - 6, y)
+            else:
+                canvas.coords(item, x + width / 2, y)
+            canvas.itemconfigure(item, text=text, anchor=anchor, state="normal")
+        for item in pool[len(cells):]:
+            canvas.itemconfigure(item, state="hidden")
+
+    # --- Theme ---
+
+    def _apply_colors(self):
+        theme = ctk.ThemeManager.theme
+        self._text_color = self._apply_appearance_mode(theme["CTkLabel"]["text_color"])
+        body_bg = self._apply_appearance_mode(theme["CTkFrame"]["fg_color"])
+        header_bg = self._apply_appearance_mode(theme["CTkFrame"]["top_fg_color"])
+
+        for canvas in (self.body, self.frozen):
+            canvas.configure(bg=body_bg)
+        for canvas in (self.header, self.corner):
+            canvas.configure(bg=header_bg)
+        for canvas, pool in self._pools.items():
+            for item in pool:
+                canvas.itemconfigure(item, fill=self._text_color)
+
+    def _set_appearance_mode(self, mode_string):
+        super()._set_appearance_mode(mode_string)
+        if hasattr(self, "_pools"):
+            self._apply_colors()